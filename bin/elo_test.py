@@ -6,67 +6,28 @@ import torch
 from sklearn.preprocessing import StandardScaler
 from pprint import pprint
 
-from ..src.database.models.database import get_db_session
-from ..src.utils.gaming_utils import calculate_moneyline_probs, calculate_kelly_criterion, calculate_winnings
+from fefelson_sports.analytics.elo import EloEngine, load_games
+from fefelson_sports.database.orms.database import get_db_session
+from fefelson_sports.utils.gaming_utils import calculate_moneyline_probs, calculate_kelly_criterion, calculate_winnings
 
 
 
-eloQuery = """
-            SELECT home_id, away_id, home_id = winner_id AS is_winner
-            FROM games AS g
-            WHERE season != 2024 AND game_type = 'season'
-            ORDER BY g.game_id
-            """
-
-
 class Elo:
 
-    _BASE_ELO = 1500
     _K = 20  # how much ratings change after a game
 
-    def __init__(self):
-        # Initialize team ratings
-        self.teamRatings = {}
-        
-        with get_db_session() as session:
-            games = pd.read_sql(eloQuery, session.bind).dropna()
-        all_teams = sorted(set(games["home_id"]))  # Sort for consistency
-        team_to_idx = {team: idx for idx, team in enumerate(all_teams)}
-        games["home_id"] = games["home_id"].map(team_to_idx)
-        games["away_id"] = games["away_id"].map(team_to_idx)
-        for _, game in games.iterrows():
-            self.update_elo(game.home_id, game.away_id, game.is_winner)
+    def __init__(self, season):
+        # one pass over every game through the tracked season, each game only sees the ones before it
+        games = load_games("MLB")
+        self.engine = EloEngine(k=self._K)
+        self.engine.run(games[games["season"] <= season])
+        self.homeProbs = pd.Series(self.engine.probs[0], index=self.engine.games["game_id"])
         print("ELO initialized")
 
 
-
-    def _get_team_ratings(self, teamId):
-        return self.teamRatings.get(teamId, self._BASE_ELO)
-
-
-    def _elo_function(self, teamA, teamB):
-        diff = self._get_team_ratings(teamB) - self._get_team_ratings(teamA)
-        exponent = diff / 400
-        # Logistic function
-        return 1 / (1 + 10**exponent)
-
-
-    def expected_elo(self, teamA, teamB):
-        eloA = self._elo_function(teamA, teamB)
-        eloB = self._elo_function(teamB, teamA)
-        return eloA, eloB
-
-
-
-    def update_elo(self, teamA, teamB, actualA):
-
-        eloA, eloB = self.expected_elo(teamA, teamB)
-
-        teamARatings = self._get_team_ratings(teamA)
-        teamBRatings = self._get_team_ratings(teamB)
-
-        self.teamRatings[teamA] = teamARatings + self._K * (actualA - eloA)
-        self.teamRatings[teamB] = teamBRatings + self._K * (1 - actualA - eloB)
+    def expected_elo(self, gameId):
+        homeElo = float(self.homeProbs[gameId])
+        return homeElo, 1 - homeElo
 
 
 
@@ -77,47 +38,36 @@ class Tracker:
                                                     "elo_bet_total": 0, "elo_bet_num": 0, "elo_bet_return": 0, 
                                                     "model_bet_total": 0, "model_bet_num": 0, "model_bet_return": 0,
                                                     "vig":0, "total": 0})
-        self.elo = Elo()
+        self.elo = Elo(season)
         # Load PyTorch model
         self.model = ResultPredictor()
         self.model.load_state_dict(torch.load("/home/ededub/FEFelson/fefelson_mvp/data/torch_model.pth"))
         self.model.eval()
 
-    def add_game(self, game):
+    def model_probs(self, df):
+        """Home win chance from the model for every game, one forward pass"""
+        with torch.no_grad():
+            outputs = self.model(torch.tensor(df["home_id"].to_numpy(), dtype=torch.long),
+                                    torch.tensor(df["away_id"].to_numpy(), dtype=torch.long),
+                                    torch.tensor(df["home_pitcher_id"].to_numpy(), dtype=torch.long),
+                                    torch.tensor(df["away_pitcher_id"].to_numpy(), dtype=torch.long),
+                                    torch.tensor(df["home_age_years"].to_numpy(), dtype=torch.float),
+                                    torch.tensor(df["home_service_time"].to_numpy(), dtype=torch.float),
+                                    torch.tensor(df["away_age_years"].to_numpy(), dtype=torch.float),
+                                    torch.tensor(df["away_service_time"].to_numpy(), dtype=torch.float))
+        return torch.sigmoid(outputs).reshape(-1).numpy()
+
+
+    def add_game(self, game, homeModel):
         """
         Add a game result and update tracking.
         Args:
-            team (str): Team name
-            elo_prob (float): Elo probability for team (0 to 1)
-            vegas_prob (float): Vegas probability for team (0 to 1)
-            result (int): 1 if team won, 0 if lost
-            game_date (str): Date in 'YYYY-MM-DD' format
+            game: one row of query_db
+            homeModel (float): model probability the home team wins (0 to 1)
         """
-        
-        
-
-
-
-        # Prepare inputs
-        home_team_tensor = torch.tensor([game["home_id"]], dtype=torch.long)
-        home_pitcher_tensor = torch.tensor([game["home_pitcher_id"]], dtype=torch.long)
-        home_years_tensor = torch.tensor([game["home_age_years"]], dtype=torch.float)
-        home_service_tensor = torch.tensor([game["home_service_time"]], dtype=torch.float)
-        
-        away_tensor = torch.tensor([game["away_id"]], dtype=torch.long)
-        away_pitcher_tensor = torch.tensor([game["away_pitcher_id"]], dtype=torch.long)
-        away_years_tensor = torch.tensor([game["away_age_years"]], dtype=torch.float)
-        away_service_tensor = torch.tensor([game["away_service_time"]], dtype=torch.float)
-
-        # Get model-adjusted probability
-        with torch.no_grad():
-            homeModel = self.model(home_team_tensor, away_tensor, home_pitcher_tensor, away_pitcher_tensor, home_years_tensor, home_service_tensor, away_years_tensor, away_service_tensor )
-            homeModel = torch.sigmoid(homeModel).item()
         awayModel = 1 - homeModel
-        
 
-        homeElo, awayElo = self.elo.expected_elo(game["home_id"], game["away_id"])
-        self.elo.update_elo(game["home_id"], game["away_id"], game["is_winner"])
+        homeElo, awayElo = self.elo.expected_elo(game["game_id"])
 
         homeVegas, awayVegas, vig = calculate_moneyline_probs(game.team_money, game.opp_money)
 
@@ -226,7 +176,7 @@ def query_db(season):
                 FROM baseball_bullpen b
                 WHERE b.pitch_order = 1
                 )
-                SELECT game_date, hp_team.team_id AS home_id, hp.player_id AS home_pitcher_id, 
+                SELECT g.game_id, game_date, hp_team.team_id AS home_id, hp.player_id AS home_pitcher_id, 
                         AGE(g.game_date, hp.birthdate) AS home_age_years, EXTRACT(YEAR FROM g.game_date) - hp.rookie_season AS home_service_time,
                         ap_team.team_id AS away_id, ap.player_id AS away_pitcher_id, 
                         AGE(g.game_date, ap.birthdate) AS away_age_years, EXTRACT(YEAR FROM g.game_date) - ap.rookie_season AS away_service_time,
@@ -238,7 +188,8 @@ def query_db(season):
                 LEFT JOIN players AS hp ON hp_team.player_id = hp.player_id
                 LEFT JOIN StartingPitchers AS ap_team ON g.game_id = ap_team.game_id AND g.away_id = ap_team.team_id
                 LEFT JOIN players AS ap ON ap_team.player_id = ap.player_id
-                WHERE season = '{season}'
+                WHERE season = '{season}' AND g.league_id = 'MLB' AND g.game_type = 'season'
+                    AND (g.winner_id IS NOT NULL OR g.game_result = 'tied')
                 ORDER BY g.game_id
                 """
         return pd.read_sql(query, session.bind)  
@@ -278,8 +229,8 @@ def elo_test(season=2024):
 
     df['is_winner'] = df['is_winner'].astype(bool)
 
-    for _, game in df.iterrows():
-        tracker.add_game(game)
+    for (_, game), homeModel in zip(df.iterrows(), tracker.model_probs(df)):
+        tracker.add_game(game, float(homeModel))
         
     try:
         pprint(tracker.get_results())
@@ -288,5 +239,13 @@ def elo_test(season=2024):
     print("\n\n")
 
 
+def elo_sweep(seasons=range(2015, 2025)):
+    # every combination backtested in one replay, the first season only warms the ratings up
+    engine = EloEngine.grid(k=[4, 8, 12, 16, 20, 24, 32], homeAdvantage=[0, 12, 24, 36], seasonRegression=[0, 0.25, 0.5])
+    engine.run(load_games("MLB", seasons))
+    pprint(engine.results(fromSeason=min(seasons) + 1).sort_values("log_loss").head(10))
+
+
 if __name__ == "__main__":
-    elo_test()
\ No newline at end of file
+    elo_test()
+    # elo_sweep()
\ No newline at end of file
@@ -1,29 +1,22 @@
 from datetime import datetime, date, timedelta
-from os import environ, listdir, remove
 from pprint import pprint 
 from pytz import timezone
 
-from fefelson_sports.utils.file_agent import JSONAgent
+from fefelson_sports.database.stores.matchup import MatchupIndex
 from fefelson_sports.utils.gaming_utils import calculate_moneyline_probs, calculate_kelly_criterion, calculate_winnings
 
 
-BASE_PATH = f"{environ['HOME']}/FEFelson/FEFelson_Sports/matchups"
 est = timezone('America/New_York')
 
     
 if __name__ == "__main__":
-    gameList = []
-    for filePath in [f"{BASE_PATH}/{fileName}" for fileName in listdir(BASE_PATH)]:
-        gameList.append(JSONAgent.read(filePath))
-
-    for data in sorted(gameList, key=lambda x: datetime.fromisoformat(x["gameTime"])):
+    index = MatchupIndex()
+    for row in index.rows():
         
-        # if datetime.fromisoformat(data["gameTime"]).date() < date.today():
-        #     remove(filePath)
-
-        if datetime.fromisoformat(data["gameTime"]).date() >= date.today():
+        if row["game_time"].date() >= date.today():
+            data = index.read(row["title"])
 
-            if data["odds"]:
+            if data and data["odds"]:
                 try:
                     awayML = data["odds"][-1]["away_ml"]
                     homeML = data["odds"][-1]["home_ml"]
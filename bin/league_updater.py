@@ -1,21 +1,78 @@
 #!/usr/bin/env python3
-from datetime import datetime
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from multiprocessing import Manager
+from time import perf_counter
 from typing import Optional
 import pytz
 
 from fefelson_sports.models.leagues import MLB, NBA, NCAAB, NFL, NCAAF
+from fefelson_sports.providers import set_replay_mode
+from fefelson_sports.providers.fetch_engine import get_fetch_engine
+from fefelson_sports.providers.page_archive import prune_archive
+from fefelson_sports.utils.logging_manager import set_log_stream
 
 est = pytz.timezone('America/New_York')
 
 
-       
+# simultaneous requests per provider host, shared by every league process
+PROVIDER_LIMITS = {"sports.yahoo.com": 6, "www.espn.com": 6}
+
+
+def update_league(league, hostLimits: dict, replay: bool = False, startDate: Optional[date] = None, endDate: Optional[date] = None) -> tuple:
+    logger = set_log_stream(league.__name__)
+    set_replay_mode(replay)
+    engine = get_fetch_engine()
+    for host, limit in hostLimits.items():
+        engine.set_host_limit(host, limit)
+
+    start = perf_counter()
+    error = None
+    try:
+        if startDate:
+            league().replay(startDate, endDate or date.today())
+        else:
+            league().update()
+    except Exception as e:
+        logger.exception(f"{league.__name__} update failed")
+        error = repr(e)
+    return league.__name__, perf_counter() - start, error
+
+
 
 if __name__ == "__main__":
     # Parse command-line arguments
+    parser = ArgumentParser(description="Update every league's games, matchups and analytics")
+    parser.add_argument("--replay", action="store_true",
+                        help="read provider pages from the raw archive instead of the network")
+    parser.add_argument("--start", type=date.fromisoformat,
+                        help="with --replay, re-normalize every game date from START (YYYY-MM-DD) instead of the daily update")
+    parser.add_argument("--end", type=date.fromisoformat,
+                        help="last game date replayed with --start, defaults to today")
+    parser.add_argument("--leagues", nargs="+", choices=("MLB", "NFL", "NBA", "NCAAB", "NCAAF"),
+                        help="only these leagues")
+    args = parser.parse_args()
+    if args.start and not args.replay:
+        parser.error("--start needs --replay")
 
     timeNow = datetime.now().astimezone(est)
 
-    if timeNow.hour >= 2 and timeNow.hour < 22:
-    
-        for league in (MLB, NFL, NBA, NCAAB, NCAAF, ):
-            league().update()
+    if args.replay or (timeNow.hour >= 2 and timeNow.hour < 22):
+        leagues = tuple(league for league in (MLB, NFL, NBA, NCAAB, NCAAF, ) 
+                            if not args.leagues or league.__name__ in args.leagues)
+        start = perf_counter()
+
+        with Manager() as manager:
+            hostLimits = {host: manager.BoundedSemaphore(n) for host, n in PROVIDER_LIMITS.items()}
+            with ProcessPoolExecutor(max_workers=len(leagues)) as pool:
+                futures = [pool.submit(update_league, league, hostLimits, args.replay, args.start, args.end) for league in leagues]
+                results = [future.result() for future in as_completed(futures)]
+
+        print(f"\n{'league':<8}{'wall (s)':>10}  status")
+        for leagueId, wallTime, error in sorted(results, key=lambda x: -x[1]):
+            print(f"{leagueId:<8}{wallTime:>10.1f}  {error or 'ok'}")
+        print(f"{'total':<8}{perf_counter() - start:>10.1f}")
+
+        if not args.replay:
+            prune_archive()
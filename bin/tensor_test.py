@@ -3,6 +3,7 @@ import torch
 
 from fefelson_sports.tensors.baseball.baseball_atomics import (NumBasesIfHit, IsHR, IsHit, HitDistanceSelect, HitAngleSelect, HitStyleSelect, PitchTypeSelect, PitchXSelect, PitchYSelect, PitchVelocitySelect, IsSwing, SwingResult)
 from fefelson_sports.tensors.baseball.datasets import (NumBasesIfHitDataset, IsHRDataset, IsHitDataset, HitDistanceDataset, HitAngleDataset, HitStyleDataset, PitchTypeDataset, PitchXDataset, PitchYDataset, PitchVelocityDataset, IsSwingDataset, SwingResultDataset)
+from fefelson_sports.tensors.farm import TrainingFarm
 from fefelson_sports.tensors.trainer import BinaryTrainer, ClassifyTrainer, RegressionTrainer
 
 from fefelson_sports.database.models.database import get_db_session
@@ -278,12 +279,25 @@ def pitch_type_select():
             pass
 
 
+def pitch_type_farm():
+    # nightly retrain of every qualified pitcher, one process per core
+    jobs = []
+    for _, row in query_db(PITCHER_QUERY).iterrows():
+        pitcherId = row['pitcher_id']
+        trainerKwargs = {"class_labels": PITCH_TYPE_LABELS, "class_weights": get_pitcher_class_weights(pitcher_id=pitcherId)}
+        jobs.append((pitcherId, PitchTypeSelect, PitchTypeDataset, ClassifyTrainer, trainerKwargs, {}))
+
+    for entityId, result in TrainingFarm(PitchTypeSelect).run(jobs).items():
+        print(f"{entityId:>12}  {result['status']:<10} {result['seconds']:>8.0f}s")
+
+
 if __name__ == "__main__":
 
     torch.manual_seed(42)
     torch.use_deterministic_algorithms(True)
 
     # pitch_type_select()
+    # pitch_type_farm()
     # pitch_velocity_select()
     # pitch_x_select()
     # pitch_y_select()
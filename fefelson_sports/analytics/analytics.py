@@ -1,9 +1,13 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.sql import text
-from typing import Any, List, Tuple
+from typing import Any, Callable, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 
+from .metric_spec import GAMES, MetricSpec, compute_specs, evaluate_specs, pct_spec, ratio_spec, share_spec, spec_columns
+from .running_aggregates import AWAY_HOME, TIME_FRAMES, WINDOWS, RunningAggregates, away_home, away_home_splits
 from ..database.orms.database import get_db_session
 from ..database.stores.base import LeagueStore
 from ..database.orms.analytic_tables import StatMetric, LeagueMetric
@@ -12,6 +16,9 @@ from ..utils.logging_manager import get_logger
 from pprint import pprint
 
 
+# window index column added by Analytics._window_tags
+WINDOW = "_window"
+
 
 ########################################################################################
 ########################################################################################
@@ -23,6 +30,13 @@ class Analytics:
         self.season = LeagueStore().get_current_season(leagueId)
 
 
+    def _and_since(self, since: Optional[date]) -> str:
+        """Extra WHERE clause for fetches that only want games from since on"""
+        if since:
+            return f" AND DATE(g.game_date) >= '{since}'::DATE "
+        return ""
+
+
     def _fetch_team_gaming(self, season: int) -> pd.DataFrame:  
         with get_db_session() as session:
             query = f"""
@@ -87,58 +101,96 @@ class Analytics:
             return  pd.read_sql(query, session.bind)   
 
 
-    def _get_away_home_frames(self, dataFrame: pd.DataFrame) -> List[Tuple[str, pd.DataFrame]]:
-
-        ahFrames = [("all", dataFrame)]
-
-        # Convert game_date to datetime
-
-        for label in ("away", "home"):
-            # Filter by date range
-            ahFrames.append((label, dataFrame[(dataFrame['team_id'] == dataFrame[f"{label}_id"])]))
-        return ahFrames
-
-        
-
-
-    def _get_time_frames(self, dataFrame: pd.DataFrame) -> List[Tuple[str, pd.DataFrame]]:
+    def _window_tags(self, dataFrame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Tags every game row once: WINDOW is the index of the shortest rolling window
+        holding the game (len(WINDOWS) when only the season does) plus its away/home split
+        """
+        gameDates = pd.to_datetime(dataFrame["game_date"]).dt.normalize()
+        windows = np.full(len(dataFrame), len(WINDOWS))
+        for i in reversed(range(len(WINDOWS))):
+            cutoff = pd.Timestamp(date.today() - timedelta(WINDOWS[i][1]))
+            windows[(gameDates >= cutoff).to_numpy()] = i
+        return pd.DataFrame({WINDOW: windows, AWAY_HOME: away_home(dataFrame)}, index=dataFrame.index)
+
+
+    def _time_frame_windows(self) -> List[Tuple[str, int]]:
+        # timeframe and the widest window it takes in, the windows are nested
+        return list(zip(TIME_FRAMES, (len(WINDOWS),) + tuple(range(len(WINDOWS)))))
+
+
+    def _window_sums(self, idType: str, specs: List[MetricSpec], dataFrame: pd.DataFrame) -> List[Tuple[str, str, pd.DataFrame]]:
+        """
+        [(timeFrame, a_h, sums per entity)] from one groupby over (window, entity, split),
+        each timeframe is then a sum over the handful of window rows per entity
+        """
+        tags = self._window_tags(dataFrame)
+        grouped = dataFrame[spec_columns(specs)].groupby([tags[WINDOW], dataFrame[idType], tags[AWAY_HOME]])
+        sums = grouped.sum()
+        sums[GAMES] = grouped.size()
+
+        windowSums = []
+        for timeFrame, widest in self._time_frame_windows():
+            inFrame = sums[sums.index.get_level_values(WINDOW) <= widest].groupby(level=[idType, AWAY_HOME]).sum()
+            windowSums.extend((timeFrame, a_h, splitSums) for a_h, splitSums in away_home_splits(inFrame, idType))
+        return windowSums
+
+
+    def _window_medians(self, idType: str, columns: List[str], dataFrame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Medians indexed by (timeframe, away_home, entity).  Medians don't add up across
+        windows, so only these columns are repeated per timeframe and split for one groupby.
+        """
+        tags = self._window_tags(dataFrame)
+        rows = dataFrame[[idType] + columns]
+        frames = []
+        for timeFrame, widest in self._time_frame_windows():
+            inFrame = (tags[WINDOW] <= widest).to_numpy()
+            for a_h in ("all", "away", "home"):
+                mask = inFrame if a_h == "all" else inFrame & (tags[AWAY_HOME] == a_h).to_numpy()
+                frames.append(rows[mask].assign(timeframe=timeFrame, away_home=a_h))
+        return pd.concat(frames).groupby(["timeframe", AWAY_HOME, idType])[columns].median()
+
+
+    def _valid_sums(self, sums: pd.DataFrame, metric: str = None) -> pd.DataFrame:
+        """
+        Keep entities with at least 60% of the max game count, or of the max metric
+        total when a metric is given
+        """
+        counts = sums[metric or GAMES]
+        validSums = sums[counts >= 0.6 * counts.max()]
+        if metric or len(validSums) > 5:
+            return validSums
+        return sums
 
-        today = datetime.today()
-        timeFrames = [("Season", dataFrame)]
 
-        # Convert game_date to datetime
-        dataFrame['game_date'] = pd.to_datetime(dataFrame['game_date'])
+    def _item_function(self, timeFrame, a_h, entityType, metricLabel, dataFrame, isMax=True):
+        # records = []
+        # records.append(self._set_league_metric(timeFrame, a_h, entityType, metricLabel, dataFrame, isMax))
+        return self._set_league_metric(timeFrame, a_h, entityType, metricLabel, dataFrame, isMax)
 
-        for label, gameDate in (("2Weeks", today-timedelta(14)), 
-                                ("1Month", today-timedelta(31)),
-                                ("2Months", today-timedelta(62))):
 
-            # Filter by date range
-            timeFrames.append((label, dataFrame[(dataFrame['game_date'] >= gameDate)]))
-        return timeFrames
+    def _evaluate_specs(
+                        self,
+                        timeFrame: str,
+                        a_h: str,
+                        idType: str,
+                        entityType: str,
+                        specs: List[MetricSpec],
+                        dataFrame: pd.DataFrame
+                        ) -> List[LeagueMetric]:
 
+        return [self._item_function(timeFrame, a_h, entityType, spec.label, values, spec.isMax) 
+                    for spec, values in zip(specs, evaluate_specs(idType, specs, dataFrame))]
 
-    def _get_valid_group(self, entityId: str, dataFrame: pd.DataFrame) -> pd.DataFrame:
-        # Count the number of games per entity
-        game_counts = dataFrame.groupby(entityId).size().reset_index(name='game_count')
 
-        # Find the maximum game count
-        max_games = game_counts['game_count'].max()
+    def _evaluate_sums(self, timeFrame: str, a_h: str, entityType: str, specs: List[MetricSpec], sums: pd.DataFrame) -> List[LeagueMetric]:
+        return [self._item_function(timeFrame, a_h, entityType, spec.label, values, spec.isMax) 
+                    for spec, values in zip(specs, compute_specs(specs, sums))]
 
-        # Keep only entities that have at least 60% of the max game count
-        valid_group = game_counts[game_counts['game_count'] >= 0.6 * max_games]
 
-        # Merge back with the original filtered dataset to only keep valid teams
-        if len(valid_group) > 5:
-            return dataFrame[dataFrame[entityId].isin(valid_group[entityId])]
-        else:
-            return dataFrame
-
-
-    def _item_function(self, timeFrame, a_h, entityType, metricLabel, dataFrame, isMax=True):
-        # records = []
-        # records.append(self._set_league_metric(timeFrame, a_h, entityType, metricLabel, dataFrame, isMax))
-        return self._set_league_metric(timeFrame, a_h, entityType, metricLabel, dataFrame, isMax)
+    def _item_spec(self, timeFrame: str, a_h: str, idType: str, entityType: str, spec: MetricSpec, dataFrame: pd.DataFrame) -> LeagueMetric:
+        return self._evaluate_specs(timeFrame, a_h, idType, entityType, [spec], dataFrame)[0]
 
 
     def _item_mean(
@@ -194,12 +246,8 @@ class Analytics:
         if not metricLabel:
             metricLabel = stat
 
-        dataFrame = dataFrame.groupby(idType)[[stat, adjust]].apply(
-                        lambda x: x[stat].sum()/(x[adjust].sum() / self._gameMinutes)
-                    ).reset_index(name=metricLabel) 
-        # print("\n\n",metricLabel)
-        # pprint(dataFrame.head())
-        return self._item_function(timeFrame, a_h, entityType, metricLabel, dataFrame, isMax)
+        spec = ratio_spec(stat, adjust, metricLabel, self._gameMinutes, isMax)
+        return self._item_spec(timeFrame, a_h, idType, entityType, spec, dataFrame)
 
 
     def _set_team_minute_adjusted(
@@ -229,11 +277,8 @@ class Analytics:
                             isMax: bool=True
                             ) -> List[Any]:
 
-        dataFrame = dataFrame.groupby(idType)[[one, another]].apply(
-                        lambda x: ((x[one]).sum()/(x[another]).sum())
-                    ).reset_index(name=metricLabel) 
-        
-        return self._item_function(timeFrame, a_h, entityType, metricLabel, dataFrame, isMax)
+        spec = ratio_spec(one, another, metricLabel, isMax=isMax)
+        return self._item_spec(timeFrame, a_h, idType, entityType, spec, dataFrame)
 
 
     def _item_one_per_another_pct(
@@ -249,11 +294,8 @@ class Analytics:
                             isMax: bool=True
                             ) -> List[Any]:
 
-        dataFrame = dataFrame.groupby(idType)[[one, another]].apply(
-                        lambda x: ((x[one]).sum()/(x[another]).sum())*100
-                    ).reset_index(name=metricLabel) 
-        
-        return self._item_function(timeFrame, a_h, entityType, metricLabel, dataFrame, isMax)
+        spec = pct_spec(one, another, metricLabel, isMax)
+        return self._item_spec(timeFrame, a_h, idType, entityType, spec, dataFrame)
 
 
     def _item_per_sum(
@@ -269,10 +311,8 @@ class Analytics:
                     isMax: bool=True
                     ) -> List[Any]:
 
-        dataFrame = dataFrame.groupby(idType)[[one, another]].apply(
-                        lambda x: x[one].sum() / (x[one].sum() + x[another].sum())*100
-                    ).reset_index(name=metricLabel) 
-        return self._item_function(timeFrame, a_h, entityType, metricLabel, dataFrame, isMax)
+        spec = share_spec(one, another, metricLabel, isMax)
+        return self._item_spec(timeFrame, a_h, idType, entityType, spec, dataFrame)
 
 
     def _item_sum(
@@ -337,6 +377,75 @@ class Analytics:
             )
 
 
+    def _incremental_sources(self) -> List[Tuple[str, str, Callable[[Optional[date]], pd.DataFrame], List[MetricSpec], Optional[str]]]:
+        """
+        (entityType, idType, fetch(since), specs, validMetric) for every metric set
+        that can be kept as running sums, empty when the league needs a full rebuild
+        """
+        return []
+
+
+    def _games_before(self, day: date) -> int:
+        with get_db_session() as session:
+            query = f"""
+                    SELECT COUNT(*) AS games FROM games AS g
+                    WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}' AND DATE(g.game_date) < '{day}'::DATE
+                """
+            return int(pd.read_sql(query, session.bind)["games"].iloc[0])
+
+
+    def _update_running_metrics(self):
+        """
+        Re-reads the games still inside the rolling windows into each running
+        aggregate and recomputes every league metric and its quantiles from the aggregates
+        """
+        tableRecords = []
+        aggregates = []
+        for entityType, idType, fetch, specs, validMetric in self._incremental_sources():
+            running = RunningAggregates(self.leagueId, entityType, idType, self.season, spec_columns(specs))
+            if running.settledDate and self._games_before(running.settledDate) != running.settledGames:
+                get_logger().info(f"{self.leagueId} {entityType} games changed before {running.settledDate}, rebuilding aggregates")
+                running.reset()
+
+            # counted before the fetch, a game landing in between shows up as a change next run
+            settleDate = running.settle_date()
+            settleGames = self._games_before(settleDate)
+            added = running.update(fetch(running.settledDate), settleDate, settleGames)
+            get_logger().debug(f"{self.leagueId} {entityType} running aggregates re-read {added} rows")
+
+            for timeFrame in TIME_FRAMES:
+                for a_h, sums in running.split_sums(timeFrame):
+                    tableRecords.extend(self._evaluate_sums(timeFrame, a_h, entityType, specs, self._valid_sums(sums, validMetric)))
+            aggregates.append(running)
+
+        self._upsert_models(tableRecords)
+        # only once the metrics are stored, a failed run re-reads the same games next time
+        for running in aggregates:
+            running.save()
+
+
+    def _upsert_models(self, all_list_models):
+        """
+        Writes the league's metrics and deletes its rows this run did not write,
+        such as a split that emptied out, in one transaction
+        """
+        table = LeagueMetric.__table__
+        keys = [column.name for column in table.primary_key.columns]
+        rows = [{column.name: getattr(model, column.name) for column in table.columns} for model in all_list_models]
+
+        stale = delete(table).where(table.c.league_id == self.leagueId)
+        if rows:
+            stale = stale.where(tuple_(*(table.c[key] for key in keys)).not_in([tuple(row[key] for key in keys) for row in rows]))
+
+        with get_db_session() as session:
+            session.execute(stale)
+            if rows:
+                stmt = insert(table)
+                stmt = stmt.on_conflict_do_update(index_elements=keys, 
+                                                    set_={name: stmt.excluded[name] for name in rows[0] if name not in keys})
+                session.execute(stmt, rows)
+
+
     def _store_models(self, all_list_models):
         # pprint(all_list_models)
         # raise
@@ -351,8 +460,15 @@ class Analytics:
             session.execute(text(f"DELETE FROM stat_metrics WHERE league_id = '{self.leagueId}'"))
 
 
-    def scheduled_analytics(self):
-        # called by extended method
+    def scheduled_analytics(self, incremental: bool = False) -> bool:
+        # called by extended method, True when the running aggregates already stored everything
+        if incremental and self._incremental_sources():
+            self._update_running_metrics()
+            return True
+        # the full rebuild replaces everything the running aggregates summed up
+        for entityType, *_ in self._incremental_sources():
+            RunningAggregates.discard(self.leagueId, entityType)
         self._truncate_tables()
+        return False
         # falls through to inherited class
     
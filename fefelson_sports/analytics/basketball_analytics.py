@@ -1,8 +1,10 @@
+from datetime import date
 import pandas as pd
 from typing import List, Any 
 from pprint import pprint 
 
 from .analytics import Analytics, get_db_session
+from .metric_spec import DiffSpec, MetricSpec, mean_spec, pct_spec, ratio_spec, share_spec
 
 from fefelson_sports.database.stores.analytics import AnalyticsStore
 from fefelson_sports.database.stores.basketball import TeamStatStore
@@ -13,7 +15,7 @@ class BasketballAnalytics(Analytics):
         super().__init__(leagueId)
 
 
-    def _fetch_team_stats(self) -> pd.DataFrame:
+    def _fetch_team_stats(self, since: date = None) -> pd.DataFrame:
          with get_db_session() as session:
             query = f""" 
                         SELECT g.game_id, home_id, away_id, bts.team_id, bts.opp_id, game_date, 
@@ -63,7 +65,7 @@ class BasketballAnalytics(Analytics):
                         FROM basketball_team_stats AS bts
                         INNER JOIN basketball_team_stats AS opp_bts ON bts.game_id = opp_bts.game_id AND bts.team_id = opp_bts.opp_id
                         INNER JOIN games AS g ON bts.game_id = g.game_id
-                        WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}'
+                        WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}'{self._and_since(since)}
                     """
             
             result = pd.read_sql(query, session.bind) 
@@ -75,7 +77,7 @@ class BasketballAnalytics(Analytics):
 
                             FROM basketball_shots AS bs
                             INNER JOIN games AS g ON bs.game_id = g.game_id
-                            WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}' AND clutch = TRUE AND points = 2
+                            WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}'{self._and_since(since)} AND clutch = TRUE AND points = 2
                             GROUP BY g.game_id, team_id
                             """
             clutchTwoResult = pd.read_sql(clutch_two_query, session.bind)
@@ -87,7 +89,7 @@ class BasketballAnalytics(Analytics):
 
                             FROM basketball_shots AS bs
                             INNER JOIN games AS g ON bs.game_id = g.game_id
-                            WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}' AND clutch = TRUE AND points = 1
+                            WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}'{self._and_since(since)} AND clutch = TRUE AND points = 1
                             GROUP BY g.game_id, team_id
                             """
             clutchFTResult = pd.read_sql(clutch_one_query, session.bind)
@@ -99,7 +101,7 @@ class BasketballAnalytics(Analytics):
 
                             FROM basketball_shots AS bs
                             INNER JOIN games AS g ON bs.game_id = g.game_id
-                            WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}' AND clutch = TRUE AND points = 3
+                            WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}'{self._and_since(since)} AND clutch = TRUE AND points = 3
                             GROUP BY g.game_id, team_id
                             """
             clutchThreeResult = pd.read_sql(clutch_three_query, session.bind)
@@ -111,7 +113,7 @@ class BasketballAnalytics(Analytics):
 
                             FROM basketball_shots AS bs
                             INNER JOIN games AS g ON bs.game_id = g.game_id
-                            WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}' AND clutch = TRUE AND points = 2
+                            WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}'{self._and_since(since)} AND clutch = TRUE AND points = 2
                             GROUP BY g.game_id, opp_id
                             """
             clutchDefTwoResult = pd.read_sql(clutch_def_two_query, session.bind)
@@ -123,7 +125,7 @@ class BasketballAnalytics(Analytics):
 
                             FROM basketball_shots AS bs
                             INNER JOIN games AS g ON bs.game_id = g.game_id
-                            WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}' AND clutch = TRUE AND points = 1
+                            WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}'{self._and_since(since)} AND clutch = TRUE AND points = 1
                             GROUP BY g.game_id, opp_id
                             """
             clutchDefFTResult = pd.read_sql(clutch_def_one_query, session.bind)
@@ -135,7 +137,7 @@ class BasketballAnalytics(Analytics):
 
                             FROM basketball_shots AS bs
                             INNER JOIN games AS g ON bs.game_id = g.game_id
-                            WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}' AND clutch = TRUE AND points = 3
+                            WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}'{self._and_since(since)} AND clutch = TRUE AND points = 3
                             GROUP BY g.game_id, opp_id
                             """
             clutchDefThreeResult = pd.read_sql(clutch_def_three_query, session.bind)
@@ -171,41 +173,71 @@ class BasketballAnalytics(Analytics):
                 result["def_clutch_2pa"] + result["def_clutch_3pa"]
             ).astype(int)
 
+            # net rating is a mean of the per game efficiencies, not a ratio of sums
+            for off_def in ("off", "def"):
+                result[f"{off_def}_game_eff"] = (result[f"{off_def}_pts"] * 100) / result[f"{off_def}_poss"]
+
             return result
 
 
     
-    def _set_net_ratings(self, timeFrame, a_h, dataFrame):
-        
-        teamRecords = []
-        efficiency = {}
-        for off_def in ("off", "def"):
-            metricLabel = f"{off_def}_eff"
-            
-            efficiency[off_def] = dataFrame.groupby("team_id")[[f"{off_def}_pts", f"{off_def}_poss"]].apply(
-                        lambda x: ((x[f"{off_def}_pts"] * 100) / x[f"{off_def}_poss"]).mean()
-                    ).reset_index(name=metricLabel)
-            
-        # Merge the two DataFrames on team_id
-        netRating = efficiency["off"].merge(efficiency["def"], left_on='team_id', right_on='team_id')
-        # Calculate Net Rating
-        netRating['net_rating'] = netRating['off_eff'] - netRating['def_eff']
-        
-        return self._item_function(timeFrame, a_h, "team", "net_rating", netRating)
+    def _net_rating_spec(self):
+        return DiffSpec("net_rating", mean_spec("off_game_eff"), mean_spec("def_game_eff"))
 
 
-    def _set_clutch_ts(self, timeFrame, a_h, dataFrame, isMax=True):
+    def _clutch_ts_spec(self, isMax=True):
         off_def = "off" if isMax else "def"
-        metricLabel = f"{off_def}_clutch_ts"
-        dataFrame = dataFrame.groupby("team_id")[[f"{off_def}_clutch_fga", f"{off_def}_clutch_fta", f"{off_def}_clutch_pts"]].apply(
-                        lambda x: (x[f"{off_def}_clutch_pts"].sum() / ( 2 * ( x[f"{off_def}_clutch_fga"].sum() + x[f"{off_def}_clutch_fta"].sum()*.44))) * 100
-                    ).reset_index(name=metricLabel) 
-        return self._item_function(timeFrame, a_h, "team", metricLabel, dataFrame, isMax=isMax)
+        # pts / (2 * (fga + .44 * fta))
+        return MetricSpec(f"{off_def}_clutch_ts", {f"{off_def}_clutch_pts": 1}, 
+                            {f"{off_def}_clutch_fga": 2, f"{off_def}_clutch_fta": .88}, 100, isMax)
+
+
+    def _set_clutch_ts(self, timeFrame, a_h, dataFrame, isMax=True):
+        return self._item_spec(timeFrame, a_h, "team_id", "team", self._clutch_ts_spec(isMax), dataFrame)
+
+
+    def _team_specs(self):
+        return [
+            ratio_spec("pace", "total_time", "pace", self._gameMinutes),
+
+            pct_spec("off_pts", "off_poss", "off_eff"),
+            pct_spec("off_2pm", "off_2pa", "off_2p_pct"),
+            pct_spec("off_ftm", "off_poss", "off_ft_poss"),
+            pct_spec("off_3pm", "off_3pa", "off_3p_pct"),
+            pct_spec("off_ast", "off_fgm", "off_ast_pct"),
+            pct_spec("off_turns", "off_poss", "off_turn_pct", isMax=False),
+            share_spec("off_oreb", "def_dreb", "off_reb_pct"),
+            share_spec("off_2pa", "off_3pa", "off_2_or_3"),
+            pct_spec("off_fb_pts", "off_poss", "off_fb_pct"),
+            pct_spec("off_pts_in_pt", "off_poss", "off_pts_in_pt_pct"),
+            pct_spec("off_3pm", "off_poss", "off_3pm_pct"),
+            self._clutch_ts_spec(),
+
+            pct_spec("def_pts", "def_poss", "def_eff", isMax=False),
+            pct_spec("def_2pm", "def_2pa", "def_2p_pct", isMax=False),
+            pct_spec("def_ftm", "def_poss", "def_ft_poss", isMax=False),
+            pct_spec("def_3pm", "def_3pa", "def_3p_pct", isMax=False),
+            pct_spec("def_ast", "def_fgm", "def_ast_pct", isMax=False),
+            pct_spec("def_turns", "def_poss", "def_turn_pct"),
+            share_spec("off_dreb", "def_oreb", "def_reb_pct"),
+            share_spec("def_2pa", "def_3pa", "def_2_or_3"),
+            pct_spec("def_fb_pts", "def_poss", "def_fb_pct", isMax=False),
+            pct_spec("def_pts_in_pt", "def_poss", "def_pts_in_pt_pct", isMax=False),
+            pct_spec("def_3pm", "def_poss", "def_3pm_pct", isMax=False),
+            self._clutch_ts_spec(isMax=False),
+
+            self._net_rating_spec(),
+        ]
+
+
+    def _incremental_sources(self):
+        return [("team", "team_id", self._fetch_team_stats, self._team_specs(), None)]
 
     
-    def scheduled_analytics(self):
+    def scheduled_analytics(self, incremental: bool = False):
     
-        super().scheduled_analytics()
+        if super().scheduled_analytics(incremental):
+            return
         teamModels = self.scheduled_team_stats()
 
 
@@ -216,39 +248,11 @@ class BasketballAnalytics(Analytics):
 
     def scheduled_team_stats(self):
         tableRecords = []
+        specs = self._team_specs()
         teamStats = self._fetch_team_stats()
-        for timeFrame, dataFrame in self._get_time_frames(teamStats):
-            for a_h, dataFrame in self._get_away_home_frames(dataFrame):
-                teams = super()._get_valid_group("team_id", dataFrame)
-
-                tableRecords.append(self._set_team_minute_adjusted(timeFrame, a_h, "pace", "total_time", teams))
-                tableRecords.append(self._set_net_ratings(timeFrame, a_h, teams))
-
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "off_pts", "off_poss", "off_eff", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "off_2pm", "off_2pa", "off_2p_pct", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "off_ftm", "off_poss", "off_ft_poss", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "off_3pm", "off_3pa", "off_3p_pct", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "off_ast", "off_fgm", "off_ast_pct", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "off_turns", "off_poss", "off_turn_pct", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_per_sum(timeFrame, a_h, "off_oreb", "def_dreb", "off_reb_pct", "team_id", "team", teams))
-                tableRecords.append(self._item_per_sum(timeFrame, a_h, "off_2pa", "off_3pa", "off_2_or_3", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "off_fb_pts", "off_poss", "off_fb_pct", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "off_pts_in_pt", "off_poss", "off_pts_in_pt_pct", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "off_3pm", "off_poss", "off_3pm_pct", "team_id", "team", teams))
-                tableRecords.append(self._set_clutch_ts(timeFrame, a_h, teams))
-
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "def_pts", "def_poss", "def_eff", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "def_2pm", "def_2pa", "def_2p_pct", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "def_ftm", "def_poss", "def_ft_poss", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "def_3pm", "def_3pa", "def_3p_pct", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "def_ast", "def_fgm", "def_ast_pct", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "def_turns", "def_poss", "def_turn_pct", "team_id", "team", teams))
-                tableRecords.append(self._item_per_sum(timeFrame, a_h, "off_dreb", "def_oreb", "def_reb_pct", "team_id", "team", teams))
-                tableRecords.append(self._item_per_sum(timeFrame, a_h, "def_2pa", "def_3pa", "def_2_or_3", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "def_fb_pts", "def_poss", "def_fb_pct", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "def_pts_in_pt", "def_poss", "def_pts_in_pt_pct", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "def_3pm", "def_poss", "def_3pm_pct", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._set_clutch_ts(timeFrame, a_h, teams, isMax=False))
+        for timeFrame, a_h, sums in self._window_sums("team_id", specs, teamStats):
+            teams = self._valid_sums(sums)
+            tableRecords.extend(self._evaluate_sums(timeFrame, a_h, "team", specs, teams))
 
         return tableRecords
 
@@ -0,0 +1,147 @@
+from typing import Iterable, Optional
+import numpy as np
+import pandas as pd
+
+from ..database.orms.database import get_db_session
+
+# for debugging
+# from pprint import pprint
+
+
+########################################################################################
+########################################################################################
+
+
+BASE_ELO = 1500
+
+
+########################################################################################
+########################################################################################
+
+
+def load_games(leagueId: str, seasons: Optional[Iterable[int]] = None) -> pd.DataFrame:
+    """Every finished regular season game of a league, oldest first, is_winner NULL for ties"""
+    seasonStmt = f" AND g.season IN ({', '.join(str(int(s)) for s in seasons)})" if seasons else ""
+    query = f"""
+                SELECT g.game_id, g.game_date, g.season, g.home_id, g.away_id, g.is_neutral_site,
+                        CASE WHEN g.winner_id IS NULL THEN NULL ELSE g.home_id = g.winner_id END AS is_winner
+                FROM games AS g
+                WHERE g.league_id = '{leagueId}' AND g.game_type = 'season'
+                    AND (g.winner_id IS NOT NULL OR g.game_result = 'tied'){seasonStmt}
+                ORDER BY g.game_date, g.game_id
+            """
+    with get_db_session() as session:
+        return pd.read_sql(query, session.bind)
+
+
+def expected_score(ratingA, ratingB, advantage=0):
+    """Chance A beats B, on numbers or arrays"""
+    return 1 / (1 + 10 ** ((ratingB - ratingA - advantage) / 400))
+
+
+########################################################################################
+########################################################################################
+
+
+class EloEngine:
+    """
+    Elo ratings replayed over a league's games for one or many parameter sets at once.
+
+    Ratings live in a (team, parameter set) array indexed by dense team codes, so
+    every game is two row reads and two row writes no matter how many k /
+    home advantage / season regression combinations are being backtested.
+    A new season pulls every rating seasonRegression of the way back to BASE_ELO.
+
+        engine = EloEngine.grid(k=[10, 20, 30], homeAdvantage=[0, 24])
+        engine.run(load_games("MLB"))
+        print(engine.results(fromSeason=2016).sort_values("log_loss"))
+    """
+
+    def __init__(self, *, k=20, homeAdvantage=0, seasonRegression=0, baseElo: float = BASE_ELO):
+        k, homeAdvantage, seasonRegression = np.broadcast_arrays(*(np.atleast_1d(np.asarray(p, dtype=float))
+                                                                        for p in (k, homeAdvantage, seasonRegression)))
+        self.params = pd.DataFrame({"k": k, "home_advantage": homeAdvantage, "season_regression": seasonRegression})
+        self.baseElo = baseElo
+
+        self.teamIds = None
+        self.ratings = None
+        self.games = None
+        self.probs = None
+
+
+    @classmethod
+    def grid(cls, *, k=(20,), homeAdvantage=(0,), seasonRegression=(0,), baseElo: float = BASE_ELO) -> "EloEngine":
+        """Every combination of the given values"""
+        k, homeAdvantage, seasonRegression = np.meshgrid(k, homeAdvantage, seasonRegression, indexing="ij")
+        return cls(k=k.ravel(), homeAdvantage=homeAdvantage.ravel(), seasonRegression=seasonRegression.ravel(), baseElo=baseElo)
+
+
+    def run(self, games: pd.DataFrame) -> np.ndarray:
+        """
+        Replays games (home_id, away_id, is_winner, season, game_date) in date order.
+        Returns the home win chance before every game, [parameter set, game] in that order.
+        """
+        sortBy = [col for col in ("game_date", "game_id") if col in games]
+        games = games.sort_values(sortBy, kind="stable").reset_index(drop=True)
+        nGames = len(games)
+
+        codes, teamIds = pd.factorize(pd.concat([games["home_id"], games["away_id"]], ignore_index=True))
+        home, away = codes[:nGames], codes[nGames:]
+        # ties count half a win
+        actual = games["is_winner"].astype(float).fillna(0.5).to_numpy()
+        seasons = games["season"].to_numpy()
+        newSeason = np.r_[False, seasons[1:] != seasons[:-1]]
+        neutral = games["is_neutral_site"].fillna(False).astype(bool).to_numpy() if "is_neutral_site" in games else np.zeros(nGames, bool)
+
+        k = self.params["k"].to_numpy()
+        advantage = self.params["home_advantage"].to_numpy()
+        noAdvantage = np.zeros_like(advantage)
+        keep = 1 - self.params["season_regression"].to_numpy()
+
+        ratings = np.full((len(teamIds), len(self.params)), float(self.baseElo))
+        probs = np.empty((nGames, len(self.params)))
+        for i in range(nGames):
+            if newSeason[i]:
+                ratings = self.baseElo + keep * (ratings - self.baseElo)
+            h, a = home[i], away[i]
+            p = expected_score(ratings[h], ratings[a], noAdvantage if neutral[i] else advantage)
+            delta = k * (actual[i] - p)
+            ratings[h] += delta
+            ratings[a] -= delta
+            probs[i] = p
+
+        self.teamIds = teamIds
+        self.ratings = ratings
+        self.games = games
+        self.probs = probs.T
+        return self.probs
+
+
+    def team_ratings(self, paramSet: int = 0) -> pd.Series:
+        """Current rating of every team for one parameter set, best first"""
+        return pd.Series(self.ratings[:, paramSet], index=self.teamIds, name="elo").sort_values(ascending=False)
+
+
+    def expected(self, homeId, awayId, paramSet: int = 0, neutral: bool = False) -> float:
+        """Home win chance for a game that has not been played yet"""
+        ratings = self.team_ratings(paramSet)
+        advantage = 0 if neutral else self.params["home_advantage"].iloc[paramSet]
+        return float(expected_score(ratings.get(homeId, self.baseElo), ratings.get(awayId, self.baseElo), advantage))
+
+
+    def results(self, fromSeason: Optional[int] = None) -> pd.DataFrame:
+        """
+        Log loss, Brier score and accuracy of every parameter set, optionally only
+        over games from fromSeason on so the cold start does not count
+        """
+        mask = np.ones(len(self.games), bool) if fromSeason is None else (self.games["season"] >= fromSeason).to_numpy()
+        actual = self.games["is_winner"].astype(float).fillna(0.5).to_numpy()[mask]
+        probs = np.clip(self.probs[:, mask], 1e-7, 1 - 1e-7)
+        decided = actual != 0.5
+
+        results = self.params.copy()
+        results["games"] = int(mask.sum())
+        results["log_loss"] = -(actual * np.log(probs) + (1 - actual) * np.log(1 - probs)).mean(axis=1)
+        results["brier"] = ((probs - actual) ** 2).mean(axis=1)
+        results["accuracy"] = ((probs[:, decided] > 0.5) == (actual[decided] == 1)).mean(axis=1)
+        return results
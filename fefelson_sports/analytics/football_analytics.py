@@ -3,10 +3,68 @@ from typing import List, Any
 from pprint import pprint 
 
 from .analytics import Analytics, get_db_session
+from .metric_spec import DiffSpec, MetricSpec, pct_spec, ratio_spec, share_spec
 
 from fefelson_sports.database.stores.analytics import AnalyticsStore
 from fefelson_sports.database.stores.football import TeamStatStore
 
+
+########################################################################################
+########################################################################################
+
+
+PASS_PROTECT = MetricSpec("off_pass_protect", {"off_sacks": 2, "off_qb_hits": 1}, {"off_pass_plays": 1}, 100, isMax=False)
+
+PASS_RUSH = MetricSpec("def_pass_rush", {"def_sacks": 2, "def_qb_hits": 1}, {"def_pass_plays": 1}, 100)
+
+# (passes defended + 3 * ints) per pass play, less completion rate
+PASS_COVER = DiffSpec("def_pass_cover", 
+                        MetricSpec("def_pass_disrupt", {"def_pass_def": 1, "def_pass_ints": 3}, {"def_pass_plays": 1}),
+                        ratio_spec("def_pass_comp", "def_pass_att", "def_comp_rate"))
+
+
+TEAM_SPECS = [
+    ratio_spec("off_pts", "off_drives", "off_pts"),
+    ratio_spec("off_pass_yards", "off_drives", "off_pass_yards"),
+    ratio_spec("off_rush_yards", "off_drives", "off_rush_yards"),
+    ratio_spec("off_sack_yds_lost", "off_drives", "off_sack_yds_lost", isMax=False),
+    ratio_spec("off_turns", "off_drives", "off_turns", isMax=False),
+    ratio_spec("off_penalty_yards", "off_drives", "off_penalty_yards", isMax=False),
+    share_spec("off_pass_plays", "off_rush_plays", "off_pass_pct"),
+    pct_spec("off_third_conv", "off_third_att", "off_third_pct"),
+    pct_spec("off_fourth_conv", "off_fourth_att", "off_fourth_pct"),
+    pct_spec("off_pass_comp", "off_pass_att", "off_comp_pct"),
+    ratio_spec("off_pass_yards", "off_pass_comp", "off_yards_per_comp"),
+    ratio_spec("off_rush_yards", "off_rush_plays", "off_yards_per_car"),
+    PASS_PROTECT,
+    share_spec("off_fourth_att", "off_fga", "off_go_pct"),
+
+    ratio_spec("def_pts", "def_drives", "def_pts", isMax=False),
+    ratio_spec("def_pass_yards", "def_drives", "def_pass_yards", isMax=False),
+    ratio_spec("def_rush_yards", "def_drives", "def_rush_yards", isMax=False),
+    ratio_spec("def_sack_yds_lost", "def_drives", "def_sack_yds_lost"),
+    ratio_spec("def_turns", "def_drives", "def_turns"),
+    ratio_spec("def_penalty_yards", "def_drives", "def_penalty_yards"),
+    share_spec("def_pass_plays", "def_rush_plays", "def_pass_pct"),
+    pct_spec("def_third_conv", "def_third_att", "def_third_pct", isMax=False),
+    pct_spec("def_fourth_conv", "def_fourth_att", "def_fourth_pct", isMax=False),
+    pct_spec("def_pass_comp", "def_pass_att", "def_comp_pct", isMax=False),
+    ratio_spec("def_pass_yards", "def_pass_comp", "def_yards_per_comp"),
+    ratio_spec("def_rush_yards", "def_rush_plays", "def_yards_per_car", isMax=False),
+    PASS_RUSH,
+    PASS_COVER,
+    share_spec("def_fourth_att", "def_fga", "def_go_pct", isMax=False),
+]
+
+
+# per game medians, not sums
+RETURN_COLUMNS = ["off_kr_yds", "off_pr_yds", "def_kr_yds", "def_pr_yds"]
+
+
+########################################################################################
+########################################################################################
+
+
 class FootballAnalytics(Analytics):
 
     _gameMinutes = 60
@@ -250,41 +308,29 @@ class FootballAnalytics(Analytics):
 
 
     def _pass_coverage(self, timeFrame, a_h, idType, entityType, dataFrame):
-        metricLabel = "def_pass_cover"
-        dataFrame = dataFrame.groupby(idType)[["def_pass_def", "def_pass_ints", "def_pass_att", "def_pass_comp", "def_pass_plays"]].apply(
-                        lambda x: ((x["def_pass_def"].sum() + x['def_pass_ints'].sum()*3) / x['def_pass_plays'].sum()) - (x["def_pass_comp"].sum() / x["def_pass_att"].sum())
-                    ).reset_index(name=metricLabel) 
-        return self._item_function(timeFrame, a_h, entityType, metricLabel, dataFrame)
+        return self._item_spec(timeFrame, a_h, idType, entityType, PASS_COVER, dataFrame)
 
 
     def _pass_protect(self, timeFrame, a_h, idType, entityType, dataFrame):
-        metricLabel = "off_pass_protect"
-        dataFrame = dataFrame.groupby(idType)[["off_sacks", "off_qb_hits", "off_pass_plays"]].apply(
-                        lambda x: ((x["off_sacks"].sum()*2 + x['off_qb_hits'].sum()) / x['off_pass_plays'].sum()) *100
-                    ).reset_index(name=metricLabel) 
-        return self._item_function(timeFrame, a_h, entityType, metricLabel, dataFrame, isMax=False)
+        return self._item_spec(timeFrame, a_h, idType, entityType, PASS_PROTECT, dataFrame)
 
 
     def _pass_rush(self, timeFrame, a_h, idType, entityType, dataFrame):
-        metricLabel = "def_pass_rush"
-        dataFrame = dataFrame.groupby(idType)[["def_sacks", "def_qb_hits", "def_pass_plays"]].apply(
-                        lambda x: ((x["def_sacks"].sum()*2 + x['def_qb_hits'].sum()) / x['def_pass_plays'].sum()) *100
-                    ).reset_index(name=metricLabel) 
-        return self._item_function(timeFrame, a_h, entityType, metricLabel, dataFrame)
+        return self._item_spec(timeFrame, a_h, idType, entityType, PASS_RUSH, dataFrame)
 
 
-    def _kick_return(self, timeFrame, a_h, idType, entityType, dataFrame, isMax=True):
+    def _kick_return(self, timeFrame, a_h, entityType, medians, isMax=True):
+        # medians are per entity for this timeframe and split
         off_def = "off" if isMax else "def"
         metricLabel = f"{off_def}_return_yds"
-        dataFrame = dataFrame.groupby(idType)[[f"{off_def}_kr_yds", f"{off_def}_pr_yds"]].apply(
-                        lambda x: x[f"{off_def}_kr_yds"].median()  + x[f"{off_def}_pr_yds"].median()
-                    ).reset_index(name=metricLabel) 
+        dataFrame = medians[[f"{off_def}_kr_yds", f"{off_def}_pr_yds"]].sum(axis=1, min_count=2).reset_index(name=metricLabel)
         return self._item_function(timeFrame, a_h, entityType, metricLabel, dataFrame, isMax=isMax)
 
 
-    def scheduled_analytics(self):
+    def scheduled_analytics(self, incremental: bool = False):
     
-        super().scheduled_analytics()
+        # return yards are medians, which running sums can't keep, so always a full rebuild
+        super().scheduled_analytics(incremental)
         teamModels = self.scheduled_team_stats()
 
 
@@ -295,45 +341,14 @@ class FootballAnalytics(Analytics):
     def scheduled_team_stats(self):
         tableRecords = []
         teamStats = self._fetch_team_stats()
-        for timeFrame, dataFrame in self._get_time_frames(teamStats):
-            for a_h, dataFrame in self._get_away_home_frames(dataFrame):
-                teams = super()._get_valid_group("team_id", dataFrame) 
-
-                tableRecords.append(self._item_one_per_another(timeFrame, a_h, "off_pts", "off_drives", "off_pts", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another(timeFrame, a_h, "off_pass_yards", "off_drives", "off_pass_yards", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another(timeFrame, a_h, "off_rush_yards", "off_drives", "off_rush_yards", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another(timeFrame, a_h, "off_sack_yds_lost", "off_drives", "off_sack_yds_lost", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_one_per_another(timeFrame, a_h, "off_turns", "off_drives", "off_turns", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_one_per_another(timeFrame, a_h, "off_penalty_yards", "off_drives", "off_penalty_yards", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_per_sum(timeFrame, a_h, "off_pass_plays", "off_rush_plays", "off_pass_pct", "team_id", "team", teams)) 
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "off_third_conv", "off_third_att", "off_third_pct", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "off_fourth_conv", "off_fourth_att", "off_fourth_pct", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "off_pass_comp", "off_pass_att", "off_comp_pct", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another(timeFrame, a_h, "off_pass_yards", "off_pass_comp", "off_yards_per_comp", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another(timeFrame, a_h, "off_rush_yards", "off_rush_plays", "off_yards_per_car", "team_id", "team", teams))
-                tableRecords.append(self._pass_protect(timeFrame, a_h, "team_id", "team", teams))
-                tableRecords.append(self._kick_return(timeFrame, a_h, "team_id", "team", teams) )
-                tableRecords.append(self._item_per_sum(timeFrame, a_h, "off_fourth_att", "off_fga", "off_go_pct", "team_id", "team", teams))
-                
-
-                tableRecords.append(self._item_one_per_another(timeFrame, a_h, "def_pts", "def_drives", "def_pts", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_one_per_another(timeFrame, a_h, "def_pass_yards", "def_drives", "def_pass_yards", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_one_per_another(timeFrame, a_h, "def_rush_yards", "def_drives", "def_rush_yards", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_one_per_another(timeFrame, a_h, "def_sack_yds_lost", "def_drives", "def_sack_yds_lost", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another(timeFrame, a_h, "def_turns", "def_drives", "def_turns", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another(timeFrame, a_h, "def_penalty_yards", "def_drives", "def_penalty_yards", "team_id", "team", teams))
-                tableRecords.append(self._item_per_sum(timeFrame, a_h, "def_pass_plays", "def_rush_plays", "def_pass_pct", "team_id", "team", teams)) 
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "def_third_conv", "def_third_att", "def_third_pct", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "def_fourth_conv", "def_fourth_att", "def_fourth_pct", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_one_per_another_pct(timeFrame, a_h, "def_pass_comp", "def_pass_att", "def_comp_pct", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._item_one_per_another(timeFrame, a_h, "def_pass_yards", "def_pass_comp", "def_yards_per_comp", "team_id", "team", teams))
-                tableRecords.append(self._item_one_per_another(timeFrame, a_h, "def_rush_yards", "def_rush_plays", "def_yards_per_car", "team_id", "team", teams, isMax=False))
-                tableRecords.append(self._pass_rush(timeFrame, a_h, "team_id", "team", teams))
-                tableRecords.append(self._pass_coverage(timeFrame, a_h, "team_id", "team", teams))
-                tableRecords.append(self._kick_return(timeFrame, a_h, "team_id", "team", teams, isMax=False)  )
-                tableRecords.append(self._item_per_sum(timeFrame, a_h, "def_fourth_att", "def_fga", "def_go_pct", "team_id", "team", teams, isMax=False))
-                
-
+        medians = self._window_medians("team_id", RETURN_COLUMNS, teamStats)
+        for timeFrame, a_h, sums in self._window_sums("team_id", TEAM_SPECS, teamStats):
+            teams = self._valid_sums(sums)
+            returns = medians.loc[(timeFrame, a_h)].reindex(teams.index)
+
+            tableRecords.extend(self._evaluate_sums(timeFrame, a_h, "team", TEAM_SPECS, teams))
+            tableRecords.append(self._kick_return(timeFrame, a_h, "team", returns))
+            tableRecords.append(self._kick_return(timeFrame, a_h, "team", returns, isMax=False))
 
         return tableRecords  
 
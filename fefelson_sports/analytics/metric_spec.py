@@ -0,0 +1,123 @@
+from typing import Dict, Iterable, List, Set
+import pandas as pd
+
+# for debugging
+# from pprint import pprint
+
+
+########################################################################################
+########################################################################################
+
+
+# per-row count column the engine adds, so means are sum(stat) / GAMES
+GAMES = "_games"
+
+
+########################################################################################
+########################################################################################
+
+
+class MetricSpec:
+    """
+    A league metric described as weighted column sums:
+
+        scale * sum(w * numerator columns) / sum(w * denominator columns)
+
+    With no denominator the weighted numerator sum is the metric.
+    isMax says whether higher values are better.
+    """
+
+    def __init__(self, label: str, numerator: Dict[str, float], denominator: Dict[str, float] = None,
+                    scale: float = 1, isMax: bool = True):
+        self.label = label
+        self.numerator = numerator
+        self.denominator = denominator or {}
+        self.scale = scale
+        self.isMax = isMax
+
+
+    def columns(self) -> Set[str]:
+        return set(self.numerator) | set(self.denominator)
+
+
+    def compute(self, sums: pd.DataFrame) -> pd.Series:
+        value = sum(sums[col] * weight for col, weight in self.numerator.items())
+        if self.denominator:
+            value = value / sum(sums[col] * weight for col, weight in self.denominator.items())
+        return (value * self.scale).rename(self.label)
+
+
+class DiffSpec(MetricSpec):
+    """Difference of two specs, first - second"""
+
+    def __init__(self, label: str, first: MetricSpec, second: MetricSpec, isMax: bool = True):
+        super().__init__(label, {}, isMax=isMax)
+        self.first = first
+        self.second = second
+
+
+    def columns(self) -> Set[str]:
+        return self.first.columns() | self.second.columns()
+
+
+    def compute(self, sums: pd.DataFrame) -> pd.Series:
+        return (self.first.compute(sums) - self.second.compute(sums)).rename(self.label)
+
+
+########################################################################################
+########################################################################################
+
+
+def mean_spec(metric: str, metricLabel: str = None, isMax: bool = True) -> MetricSpec:
+    return MetricSpec(metricLabel or metric, {metric: 1}, {GAMES: 1}, isMax=isMax)
+
+
+def sum_spec(metric: str, metricLabel: str = None, isMax: bool = True) -> MetricSpec:
+    return MetricSpec(metricLabel or metric, {metric: 1}, isMax=isMax)
+
+
+def ratio_spec(one: str, another: str, metricLabel: str, scale: float = 1, isMax: bool = True) -> MetricSpec:
+    return MetricSpec(metricLabel, {one: 1}, {another: 1}, scale, isMax)
+
+
+def pct_spec(one: str, another: str, metricLabel: str, isMax: bool = True) -> MetricSpec:
+    return MetricSpec(metricLabel, {one: 1}, {another: 1}, 100, isMax)
+
+
+def share_spec(one: str, another: str, metricLabel: str, isMax: bool = True) -> MetricSpec:
+    """one as a percent of one + another"""
+    return MetricSpec(metricLabel, {one: 1}, {one: 1, another: 1}, 100, isMax)
+
+
+########################################################################################
+########################################################################################
+
+
+def spec_columns(specs: Iterable[MetricSpec]) -> List[str]:
+    """Every stat column the specs read, without the game count"""
+    return sorted(set().union(*(spec.columns() for spec in specs)) - {GAMES})
+
+
+def sum_specs(idType: str, specs: Iterable[MetricSpec], dataFrame: pd.DataFrame) -> pd.DataFrame:
+    """One groupby().sum() over every column the specs need, plus the GAMES count"""
+    grouped = dataFrame.groupby(idType)
+    sums = grouped[spec_columns(specs)].sum()
+    sums[GAMES] = grouped.size()
+    return sums
+
+
+def compute_specs(specs: Iterable[MetricSpec], sums: pd.DataFrame) -> List[pd.DataFrame]:
+    """
+    Column arithmetic over per-entity sums indexed by the entity id.
+    Returns one [idType, label] frame per spec, in spec order.
+    """
+    return [spec.compute(sums).reset_index(name=spec.label) for spec in specs]
+
+
+def evaluate_specs(idType: str, specs: Iterable[MetricSpec], dataFrame: pd.DataFrame) -> List[pd.DataFrame]:
+    """
+    One groupby().sum() over every column the specs need, then column arithmetic.
+    Returns one [idType, label] frame per spec, in spec order.
+    """
+    specs = list(specs)
+    return compute_specs(specs, sum_specs(idType, specs, dataFrame))
@@ -1,8 +1,63 @@
+from datetime import date
 import pandas as pd
 from typing import List, Any 
 from pprint import pprint 
 
 from .analytics import Analytics, get_db_session
+from .metric_spec import MetricSpec, mean_spec, ratio_spec, share_spec, sum_spec
+
+
+########################################################################################
+########################################################################################
+
+
+# innings pitched from outs, full_ip + partial_ip / 3
+INNINGS = {"full_ip": 1, "partial_ip": 1/3}
+
+ERA = MetricSpec("era", {"er": 9}, INNINGS, isMax=False)
+K9 = MetricSpec("k9", {"k": 9}, INNINGS)
+WHIP = MetricSpec("whip", {"bba": 1, "ha": 1}, INNINGS, isMax=False)
+OBP = MetricSpec("obp", {"bb": 1, "h": 1}, {"ab": 1, "bb": 1})
+LOB = share_spec("lob", "rbi", "lob", isMax=False)
+
+
+PITCHER_SPECS = [
+    MetricSpec("ip", INNINGS, isMax=False),
+    sum_spec("w"),
+    sum_spec("l", isMax=False),
+    ERA,
+    WHIP,
+    K9,
+]
+
+
+TEAM_SPECS = [
+    mean_spec("r"),
+    mean_spec("h"),
+    ratio_spec("ab", "hr", "hr", isMax=False),
+    mean_spec("sb"),
+    LOB,
+    ratio_spec("h", "ab", "avg"),
+    OBP,
+    ratio_spec("num_bases", "ab", "slg"),
+    mean_spec("errors", isMax=False),
+]
+
+
+BATTER_SPECS = [
+    sum_spec("r"),
+    sum_spec("hr"),
+    sum_spec("rbi"),
+    sum_spec("sb"),
+    ratio_spec("h", "ab", "avg"),
+    OBP,
+    ratio_spec("num_bases", "ab", "slg"),
+]
+
+
+########################################################################################
+########################################################################################
+
 
 class MLBAnalytics(Analytics):
 
@@ -11,21 +66,17 @@ class MLBAnalytics(Analytics):
 
 
     def _era(self, timeFrame, a_h, idType, entityType, dataFrame):
-        metricLabel = "era"
-        dataFrame = dataFrame.groupby(idType)[["er", "full_ip", "partial_ip"]].apply(
-                        lambda x:  (x['er'].sum() * 9) / (x["full_ip"].sum() + x["partial_ip"].sum() / 3)
-                    ).reset_index(name=metricLabel) 
-        return self._item_function(timeFrame, a_h, entityType, metricLabel, dataFrame, False)
+        return self._item_spec(timeFrame, a_h, idType, entityType, ERA, dataFrame)
 
 
-    def _fetch_batter_stats(self) -> pd.DataFrame:
+    def _fetch_batter_stats(self, since: date = None) -> pd.DataFrame:
         with get_db_session() as session:
              query = f""" 
                         SELECT g.game_id, g.away_id, g.home_id, bs.team_id, bs.opp_id, game_date, 
                                 player_id, ab, bb, r, h, hr, rbi, sb 
                         FROM batting_stats AS bs
                         INNER JOIN games AS g ON bs.game_id = g.game_id
-                        WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}'
+                        WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}'{self._and_since(since)}
                     """
              bsResults = pd.read_sql(query, session.bind) 
 
@@ -34,14 +85,14 @@ class MLBAnalytics(Analytics):
                         FROM at_bats AS ab
                         INNER JOIN at_bat_types AS abt on ab.at_bat_type_id = abt.at_bat_type_id
                         INNER JOIN games AS g on ab.game_id = g.game_id
-                        WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}'
+                        WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}'{self._and_since(since)}
                         GROUP BY ab.game_id, batter_id
                     """
              abResults = pd.read_sql(query, session.bind) 
         return pd.merge(bsResults, abResults, how='left', on=['game_id', 'player_id'])
 
 
-    def _fetch_starter_stats(self) -> pd.DataFrame:
+    def _fetch_starter_stats(self, since: date = None) -> pd.DataFrame:
         with get_db_session() as session:
             query = f""" 
                         SELECT g.game_id, g.away_id, g.home_id, ps.team_id, ps.opp_id, game_date, 
@@ -49,12 +100,12 @@ class MLBAnalytics(Analytics):
                         FROM pitching_stats AS ps
                         INNER JOIN games AS g ON ps.game_id = g.game_id
                         INNER JOIN baseball_bullpen AS bb ON ps.game_id = bb.game_id AND ps.team_id = bb.team_id
-                        WHERE g.season = {self.season} AND bb.pitch_order = 1 AND g.league_id = '{self.leagueId}'
+                        WHERE g.season = {self.season} AND bb.pitch_order = 1 AND g.league_id = '{self.leagueId}'{self._and_since(since)}
                     """
             return pd.read_sql(query, session.bind) 
 
 
-    def _fetch_bullpen_stats(self) -> pd.DataFrame:
+    def _fetch_bullpen_stats(self, since: date = None) -> pd.DataFrame:
         with get_db_session() as session:
             query = f""" 
                         SELECT g.game_id, g.away_id, g.home_id, ps.team_id, ps.opp_id, game_date, 
@@ -62,12 +113,12 @@ class MLBAnalytics(Analytics):
                         FROM pitching_stats AS ps
                         INNER JOIN games AS g ON ps.game_id = g.game_id
                         INNER JOIN baseball_bullpen AS bb ON ps.game_id = bb.game_id AND ps.player_id = bb.player_id
-                        WHERE g.season = {self.season} AND bb.pitch_order > 1 AND g.league_id = '{self.leagueId}'
+                        WHERE g.season = {self.season} AND bb.pitch_order > 1 AND g.league_id = '{self.leagueId}'{self._and_since(since)}
                     """
             return pd.read_sql(query, session.bind) 
 
 
-    def _fetch_team_stats(self) -> pd.DataFrame:
+    def _fetch_team_stats(self, since: date = None) -> pd.DataFrame:
         with get_db_session() as session:
              query = f""" 
                         SELECT g.game_id, g.home_id, g.away_id, bts.team_id, bts.opp_id, game_date, 
@@ -75,7 +126,7 @@ class MLBAnalytics(Analytics):
                                 full_ip, partial_ip, bba, ha, k, er
                         FROM baseball_team_stats AS bts
                         INNER JOIN games AS g ON bts.game_id = g.game_id
-                        WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}'
+                        WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}'{self._and_since(since)}
                     """
              bsResults = pd.read_sql(query, session.bind) 
 
@@ -84,69 +135,47 @@ class MLBAnalytics(Analytics):
                         FROM at_bats AS ab
                         INNER JOIN at_bat_types AS abt on ab.at_bat_type_id = abt.at_bat_type_id
                         INNER JOIN games AS g on ab.game_id = g.game_id
-                        WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}'
+                        WHERE g.season = {self.season} AND g.league_id = '{self.leagueId}'{self._and_since(since)}
                         GROUP BY ab.game_id, team_id
                     """
              abResults = pd.read_sql(query, session.bind) 
         return pd.merge(bsResults, abResults, how='left', on=['game_id', 'team_id'])
 
 
-    def _get_valid_group(self, entityId: str, metric, dataFrame: pd.DataFrame) -> pd.DataFrame:
-        # Count the number of games per entity
-        game_counts = dataFrame.groupby(entityId)[metric].sum().reset_index(name='metric_count')
-        # Find the maximum game count
-        max_games = game_counts['metric_count'].max()
-
-        # Keep only entities that have at least 60% of the max game count
-        valid_group = game_counts[game_counts['metric_count'] >= 0.6 * max_games]
-
-        # Merge back with the original filtered dataset to only keep valid teams
-        return dataFrame[dataFrame[entityId].isin(valid_group[entityId])]
-
-
     def _ip(self, timeFrame, a_h, idType, entityType, dataFrame, isMax=True):
-        metricLabel = "ip"
-        dataFrame = dataFrame.groupby(idType)[["partial_ip", "full_ip"]].apply(
-                        lambda x: (x['full_ip'].sum() + x['partial_ip'].sum() / 3) 
-                    ).reset_index(name=metricLabel) 
-        return self._item_function(timeFrame, a_h, entityType, metricLabel, dataFrame, isMax)
+        spec = MetricSpec("ip", INNINGS, isMax=isMax)
+        return self._item_spec(timeFrame, a_h, idType, entityType, spec, dataFrame)
 
 
     def _k9(self, timeFrame, a_h, idType, entityType, dataFrame):
-        metricLabel = "k9"
-        dataFrame = dataFrame.groupby(idType)[["k", "full_ip", "partial_ip"]].apply(
-                        lambda x:  (x['k'].sum() * 9)/(x["full_ip"].sum()+x["partial_ip"].sum()/3) 
-                    ).reset_index(name=metricLabel) 
-        return self._item_function(timeFrame, a_h, entityType, metricLabel, dataFrame)
+        return self._item_spec(timeFrame, a_h, idType, entityType, K9, dataFrame)
 
 
     def _lob(self, timeFrame, a_h, idType, entityType, dataFrame):
-        metricLabel = "lob"
-        dataFrame = dataFrame.groupby(idType)[["lob", "rbi",]].apply(
-                        lambda x: (x["lob"].sum() / (x['lob'].sum() + x['rbi'].sum())) *100
-                    ).reset_index(name=metricLabel) 
-        return self._item_function(timeFrame, a_h, entityType, metricLabel, dataFrame, False)
+        return self._item_spec(timeFrame, a_h, idType, entityType, LOB, dataFrame)
 
 
     def _obp(self, timeFrame, a_h, idType, entityType, dataFrame):
-        metricLabel = "obp"
-        dataFrame = dataFrame.groupby(idType)[["ab", "bb", "h"]].apply(
-                        lambda x: (x["bb"].sum() + x['h'].sum()) / (x['ab'].sum() + x['bb'].sum())
-                    ).reset_index(name=metricLabel) 
-        return self._item_function(timeFrame, a_h, entityType, metricLabel, dataFrame)
+        return self._item_spec(timeFrame, a_h, idType, entityType, OBP, dataFrame)
 
 
     def _whip(self, timeFrame, a_h, idType, entityType, dataFrame):
-        metricLabel = "whip"
-        dataFrame = dataFrame.groupby(idType)[["bba", "ha", "full_ip", "partial_ip"]].apply(
-                        lambda x: (x["bba"].sum() + x['ha'].sum()) / (x["full_ip"].sum() + x["partial_ip"].sum() / 3)
-                    ).reset_index(name=metricLabel) 
-        return self._item_function(timeFrame, a_h, entityType, metricLabel, dataFrame, isMax=False)
+        return self._item_spec(timeFrame, a_h, idType, entityType, WHIP, dataFrame)
 
 
-    def scheduled_analytics(self):
+    def _incremental_sources(self):
+        return [
+            ("team", "team_id", self._fetch_team_stats, TEAM_SPECS, None),
+            ("bullpen", "team_id", self._fetch_bullpen_stats, PITCHER_SPECS, None),
+            ("starter", "player_id", self._fetch_starter_stats, PITCHER_SPECS, "full_ip"),
+            ("player", "player_id", self._fetch_batter_stats, BATTER_SPECS, "ab"),
+        ]
+
+
+    def scheduled_analytics(self, incremental: bool = False):
     
-        super().scheduled_analytics()
+        if super().scheduled_analytics(incremental):
+            return
         teamModels = self.scheduled_team_stats()
         teamBullpen = self.scheduled_team_bullpen_stats()
         starterModels = self.scheduled_starter_stats()
@@ -160,69 +189,35 @@ class MLBAnalytics(Analytics):
     def scheduled_team_bullpen_stats(self):
         tableRecords = []
         teamStats = self._fetch_bullpen_stats()
-        for timeFrame, dataFrame in self._get_time_frames(teamStats):
-            for a_h, dataFrame in self._get_away_home_frames(dataFrame):
-                teams = super()._get_valid_group("team_id", dataFrame)
-
-                [tableRecords.append(x) for x in self._ip(timeFrame, a_h, "team_id", "bullpen", teams, isMax=False)]
-                [tableRecords.append(x) for x in self._item_sum(timeFrame, a_h, "w", "team_id", "bullpen", teams)]
-                [tableRecords.append(x) for x in self._item_sum(timeFrame, a_h, "l", "team_id", "bullpen", teams, isMax=False)]
-                [tableRecords.append(x) for x in self._era(timeFrame, a_h, "team_id", "bullpen", teams)]
-                [tableRecords.append(x) for x in self._whip(timeFrame, a_h, "team_id", "bullpen", teams)]
-                [tableRecords.append(x) for x in self._k9(timeFrame, a_h, "team_id", "bullpen", teams)]
+        for timeFrame, a_h, sums in self._window_sums("team_id", PITCHER_SPECS, teamStats):
+            teams = self._valid_sums(sums)
+            tableRecords.extend(self._evaluate_sums(timeFrame, a_h, "bullpen", PITCHER_SPECS, teams))
         return tableRecords 
 
 
     def scheduled_team_stats(self):
         tableRecords = []
         teamStats = self._fetch_team_stats()
-        for timeFrame, dataFrame in self._get_time_frames(teamStats):
-            for a_h, dataFrame in self._get_away_home_frames(dataFrame):
-                teams = super()._get_valid_group("team_id", dataFrame)
-
-                [tableRecords.append(x) for x in self._item_mean(timeFrame, a_h, "r", "team_id", "team", teams)]
-                [tableRecords.append(x) for x in self._item_mean(timeFrame, a_h, "h", "team_id", "team", teams)]
-                [tableRecords.append(x) for x in self._item_one_per_another(timeFrame, a_h, "ab", "hr", "hr", "team_id", "team", teams, isMax=False)]
-                [tableRecords.append(x) for x in self._item_mean(timeFrame, a_h, "sb", "team_id", "team", teams)]
-                [tableRecords.append(x) for x in self._item_per_sum(timeFrame, a_h, "lob", "rbi", "lob", "team_id", "team", teams, isMax=False)]
-                [tableRecords.append(x) for x in self._item_one_per_another(timeFrame, a_h, "h", "ab", "avg", "team_id", "team", teams)]
-                [tableRecords.append(x) for x in self._obp(timeFrame, a_h, "team_id", "team", teams)]
-                [tableRecords.append(x) for x in self._item_one_per_another(timeFrame, a_h, "num_bases", "ab", "slg", "team_id", "team", teams)]
-                [tableRecords.append(x) for x in self._item_mean(timeFrame, a_h, "errors", "team_id", "team", teams, isMax=False)]
-
+        for timeFrame, a_h, sums in self._window_sums("team_id", TEAM_SPECS, teamStats):
+            teams = self._valid_sums(sums)
+            tableRecords.extend(self._evaluate_sums(timeFrame, a_h, "team", TEAM_SPECS, teams))
         return tableRecords   
 
     def scheduled_starter_stats(self):
         tableRecords = []
         pitcherStats = self._fetch_starter_stats()
-        for timeFrame, dataFrame in self._get_time_frames(pitcherStats):
-            for a_h, dataFrame in self._get_away_home_frames(dataFrame):
-                starters = self._get_valid_group("player_id", "full_ip", dataFrame)
-
-                [tableRecords.append(x) for x in self._ip(timeFrame, a_h, "player_id", "starter", starters, isMax=False)]
-                [tableRecords.append(x) for x in self._item_sum(timeFrame, a_h, "w", "player_id", "starter", starters)]
-                [tableRecords.append(x) for x in self._item_sum(timeFrame, a_h, "l", "player_id", "starter", starters, isMax=False)]
-                [tableRecords.append(x) for x in self._era(timeFrame, a_h, "player_id", "starter", starters)]
-                [tableRecords.append(x) for x in self._whip(timeFrame, a_h, "player_id", "starter", starters)]
-                [tableRecords.append(x) for x in self._k9(timeFrame, a_h, "player_id", "starter", starters)]
-
+        for timeFrame, a_h, sums in self._window_sums("player_id", PITCHER_SPECS, pitcherStats):
+            starters = self._valid_sums(sums, "full_ip")
+            tableRecords.extend(self._evaluate_sums(timeFrame, a_h, "starter", PITCHER_SPECS, starters))
         return tableRecords  
 
 
     def scheduled_batter_stats(self):
         tableRecords = []
         batterStats = self._fetch_batter_stats()
-        for timeFrame, dataFrame in self._get_time_frames(batterStats):
-            for a_h, dataFrame in self._get_away_home_frames(dataFrame):
-                batters = self._get_valid_group("player_id", "ab", dataFrame)
-
-                [tableRecords.append(x) for x in self._item_sum(timeFrame, a_h, "r", "player_id", "player", batters)]
-                [tableRecords.append(x) for x in self._item_sum(timeFrame, a_h, "hr", "player_id", "player", batters)]
-                [tableRecords.append(x) for x in self._item_sum(timeFrame, a_h, "rbi", "player_id", "player", batters)]
-                [tableRecords.append(x) for x in self._item_sum(timeFrame, a_h, "sb", "player_id", "player", batters)]
-                [tableRecords.append(x) for x in self._item_one_per_another(timeFrame, a_h, "h", "ab", "avg", "player_id", "player", batters)]
-                [tableRecords.append(x) for x in self._obp(timeFrame, a_h, "player_id", "player", batters)]
-                [tableRecords.append(x) for x in self._item_one_per_another(timeFrame, a_h, "num_bases", "ab", "slg", "player_id", "player", batters)]
+        for timeFrame, a_h, sums in self._window_sums("player_id", BATTER_SPECS, batterStats):
+            batters = self._valid_sums(sums, "ab")
+            tableRecords.extend(self._evaluate_sums(timeFrame, a_h, "player", BATTER_SPECS, batters))
         return tableRecords       
 
 
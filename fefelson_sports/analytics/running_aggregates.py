@@ -0,0 +1,177 @@
+from datetime import date, timedelta
+from os import environ, makedirs, path, remove
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .metric_spec import GAMES
+from ..utils.file_agent import PickleAgent
+
+# for debugging
+# from pprint import pprint
+
+
+########################################################################################
+########################################################################################
+
+
+BASE_PATH = f"{environ['HOME']}/FEFelson/FEFelson_Sports/leagues"
+
+# rolling timeframes, days back from today
+WINDOWS = (("2Weeks", 14), ("1Month", 31), ("2Months", 62))
+TIME_FRAMES = ("Season",) + tuple(label for label, _ in WINDOWS)
+
+AWAY_HOME = "away_home"
+GAME_DATE = "game_date"
+
+
+########################################################################################
+########################################################################################
+
+
+def away_home(dataFrame: pd.DataFrame) -> np.ndarray:
+    """'home' or 'away' for each team row"""
+    return np.where(dataFrame["team_id"] == dataFrame["home_id"], "home", "away")
+
+
+def away_home_splits(sums: pd.DataFrame, idType: str) -> List[Tuple[str, pd.DataFrame]]:
+    """
+    [(a_h, sums per entity)] for all, away and home from sums indexed by (entity, away_home),
+    skipping empty splits
+    """
+    if sums is None or sums.empty:
+        return []
+
+    splits = [("all", sums.groupby(level=idType).sum())]
+    for label in ("away", "home"):
+        if label in sums.index.get_level_values(AWAY_HOME):
+            splits.append((label, sums.xs(label, level=AWAY_HOME)))
+    return splits
+
+
+########################################################################################
+########################################################################################
+
+
+class RunningAggregates:
+    """
+    Per-entity column sums for one league entity type, kept between analytics runs.
+
+    The rolling windows need old games to drop off again, so the last 62 days are
+    kept as one summed row per (game_date, entity, away_home) and re-read whole
+    on every run: a late game or a corrected boxscore in that stretch simply
+    replaces what was there.  Days that fall out of it are settled into one
+    running sum per (entity, away_home) and never read again.  settledGames is
+    the games table count before settledDate, when it changes a game landed in
+    the settled stretch and the aggregate starts over from the first game.
+    """
+
+    def __init__(self, leagueId: str, entityType: str, idType: str, season: int, columns: List[str], basePath: str = BASE_PATH):
+        self.filePath = self.file_path(leagueId, entityType, basePath)
+        self.idType = idType
+        self.season = season
+        self.columns = list(columns)
+        self.reset()
+        self._load()
+
+
+    @staticmethod
+    def file_path(leagueId: str, entityType: str, basePath: str = BASE_PATH) -> str:
+        return path.join(basePath, leagueId, "analytics", f"{entityType}.{PickleAgent.get_ext()}")
+
+
+    @classmethod
+    def discard(cls, leagueId: str, entityType: str, basePath: str = BASE_PATH):
+        """Drops the saved aggregate, the next incremental run starts from the first game"""
+        filePath = cls.file_path(leagueId, entityType, basePath)
+        if path.exists(filePath):
+            remove(filePath)
+
+
+    @staticmethod
+    def settle_date() -> date:
+        # first day every rolling window can still reach
+        return date.today() - timedelta(max(days for _, days in WINDOWS))
+
+
+    def reset(self):
+        self.settledDate = None
+        self.settledGames = 0
+        self.settledSums = None
+        self.dailySums = None
+
+
+    def _load(self):
+        if not path.exists(self.filePath):
+            return
+        state = PickleAgent.read(self.filePath)
+        # a new season, a changed spec list or an older layout starts over from the first game
+        if "settledDate" not in state or (state["season"], state["idType"], state["columns"]) != (self.season, self.idType, self.columns):
+            return
+        self.settledDate = state["settledDate"]
+        self.settledGames = state["settledGames"]
+        self.settledSums = state["settledSums"]
+        self.dailySums = state["dailySums"]
+
+
+    def save(self):
+        makedirs(path.dirname(self.filePath), exist_ok=True)
+        PickleAgent.write(self.filePath, {
+            "season": self.season,
+            "idType": self.idType,
+            "columns": self.columns,
+            "settledDate": self.settledDate,
+            "settledGames": self.settledGames,
+            "settledSums": self.settledSums,
+            "dailySums": self.dailySums
+        })
+
+
+    def update(self, dataFrame: pd.DataFrame, settleDate: date, settleGames: int) -> int:
+        """
+        dataFrame holds every row from settledDate on (the whole season when nothing
+        is settled yet) and replaces the daily sums.  Days before settleDate are then
+        settled, settleGames being the games table count before it.  Returns the row count.
+        """
+        daily = None
+        if not dataFrame.empty:
+            rows = dataFrame[self.columns].copy()
+            rows[GAME_DATE] = pd.to_datetime(dataFrame[GAME_DATE]).dt.normalize()
+            rows[self.idType] = dataFrame[self.idType]
+            rows[AWAY_HOME] = away_home(dataFrame)
+
+            grouped = rows.groupby([GAME_DATE, self.idType, AWAY_HOME])
+            daily = grouped[self.columns].sum()
+            daily[GAMES] = grouped.size()
+
+        if self.settledDate is None or settleDate > self.settledDate:
+            if daily is not None:
+                settling = daily.index.get_level_values(GAME_DATE) < pd.Timestamp(settleDate)
+                settled = daily[settling].groupby(level=[self.idType, AWAY_HOME]).sum()
+                self.settledSums = settled if self.settledSums is None else self.settledSums.add(settled, fill_value=0)
+                daily = daily[~settling]
+            self.settledDate = settleDate
+            self.settledGames = settleGames
+
+        self.dailySums = daily
+        return len(dataFrame)
+
+
+    def window_sums(self, timeFrame: str) -> Optional[pd.DataFrame]:
+        """
+        Sums per (entity, away_home) for one timeframe
+        """
+        if self.dailySums is None or self.dailySums.empty:
+            return self.settledSums if timeFrame == "Season" else None
+
+        if timeFrame == "Season":
+            recent = self.dailySums.groupby(level=[self.idType, AWAY_HOME]).sum()
+            return recent if self.settledSums is None else self.settledSums.add(recent, fill_value=0)
+
+        cutoff = pd.Timestamp(date.today() - timedelta(dict(WINDOWS)[timeFrame]))
+        daily = self.dailySums[self.dailySums.index.get_level_values(GAME_DATE) >= cutoff]
+        return daily.groupby(level=[self.idType, AWAY_HOME]).sum()
+
+
+    def split_sums(self, timeFrame: str) -> List[Tuple[str, pd.DataFrame]]:
+        return away_home_splits(self.window_sums(timeFrame), self.idType)
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from ..orms.database import get_db_session
 from ..stores.base import ProviderStore
 from ..stores.core import GameStore, PeriodStore, PlayerStore, StadiumStore
+from ..stores.store import BulkWriter
 from ..stores.gaming import GameLineStore, OverUnderStore
 
 # for debugging
@@ -134,8 +135,11 @@ class SQLAlchemyDatabaseAgent(DatabaseAgent):
         pass
 
 
-    def insert_boxscore(self, boxscore: dict, session = None ) -> None:
-        """Insert boxscore data into the database, including common and league-specific data."""
+    def insert_boxscore(self, boxscore: dict, session = None, replace: bool = False) -> None:
+        """
+        Insert boxscore data into the database, including common and league-specific data.
+        With replace the game's existing rows are deleted first so a replay writes over them.
+        """
 
         if not boxscore or not boxscore.get("yahoo"):
             return None
@@ -145,8 +149,12 @@ class SQLAlchemyDatabaseAgent(DatabaseAgent):
             return None 
 
         mapping = self._create_mapping(boxscore, session)
-        self._insert_common_data(boxscore, mapping, session)
-        self._insert_league_specific_data(boxscore, mapping, session)
+        if replace:
+            self.gameStore.delete(boxscore["game_id"], session)
+        # rows are gathered per table and written once each on exit
+        with BulkWriter(session):
+            self._insert_common_data(boxscore, mapping, session)
+            self._insert_league_specific_data(boxscore, mapping, session)
     
 
         
\ No newline at end of file
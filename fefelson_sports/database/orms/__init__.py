@@ -1,4 +1,4 @@
-from .analytic_tables import LeagueMetric, StatMetric
+from .analytic_tables import LeagueMetric, StatMetric, TeamSnapshot
 from .base import League, Organization, Provider, ProviderMapping, Sport, Week
 from .core import Game, Period, Player, Team, Stadium
 from .baseball import (BaseballTeamStat, PitchResultType, AtBatType, Pitch, 
@@ -21,5 +21,5 @@ __all__ = [
     "FootballRushing", "FootballReceiving", "FootballFumbles", "FootballPunting", 
     "FootballKicking", "FootballReturns", "FootballDefense",
     "GameLine", "OverUnder",
-    "LeagueMetric", "StatMetric"
+    "LeagueMetric", "StatMetric", "TeamSnapshot"
 ]
\ No newline at end of file
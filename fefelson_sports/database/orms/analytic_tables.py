@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Numeric, Date
+from sqlalchemy import Column, ForeignKey, Integer, String, Numeric, Date, DateTime, PickleType
 
 from .database import Base
 
@@ -30,4 +30,17 @@ class LeagueMetric(Base):
     q6 = Column(Numeric)                 # quantile6
     q8 = Column(Numeric)                 # quantile8
     q9 = Column(Numeric)                 # quantile9
-    reference_date = Column(Date)           # e.g., '2025-03-22'
\ No newline at end of file
+    reference_date = Column(DateTime)       # e.g., '2025-03-22 04:12:09'
+
+
+
+class TeamSnapshot(Base):
+    __tablename__ = 'team_snapshots'
+    team_id = Column(Integer, ForeignKey('teams.team_id', ondelete='CASCADE'), primary_key=True)
+    timeframe = Column(String, primary_key=True)  # e.g., '2Weeks', 'Season', 'All'
+    away_home = Column(String, primary_key=True)  # all, away, home
+    league_id = Column(String, ForeignKey('leagues.league_id', ondelete='CASCADE'), nullable=False, index=True)
+    record = Column(PickleType)             # GameStore.get_record
+    opps = Column(PickleType)               # GameStore.get_opps
+    team_stats = Column(PickleType)         # TeamStatStore.get_team_stats
+    reference_date = Column(Date)           # e.g., '2025-03-22'
@@ -1,31 +1,84 @@
 from pandas import read_sql
+from sqlalchemy.orm import Session
+from threading import Lock
+from time import monotonic
 
 from .store import Store
 
 from ..orms.analytic_tables import LeagueMetric
 
 
+# seconds a league's league_metrics stamp is trusted before it is read again
+CHECK_SECONDS = 30
+
+# (leagueId, timeFrame, awayHome, entityType) -> (league stamp when read, {metric: quantiles})
+_metricCache = {}
+# leagueId -> (monotonic time checked, (row count, newest reference_date))
+_leagueStamps = {}
+_cacheLock = Lock()
+
+
 class AnalyticsStore(Store):
+    """
+    League metric quantiles come out of the table a whole (league, timeframe,
+    away_home, entity_type) set at a time and stay in a process wide cache.
+    Analytics runs in the updater processes, so a cached set is checked against
+    the league's row count and newest reference_date, read at most every
+    CHECK_SECONDS, and re-read once either has moved.
+    """
 
     def __init__(self):
         super().__init__()
-        
 
 
-    def get_league_metrics(self,  leagueId, timeFrame, awayHome, entityType, metric, session=None):
+    def _league_stamp(self, leagueId, session: Session):
+        with _cacheLock:
+            checked = _leagueStamps.get(leagueId)
+        if checked is not None and monotonic() - checked[0] < CHECK_SECONDS:
+            return checked[1]
+
+        query = f"""
+                SELECT COUNT(*) AS metrics, MAX(reference_date) AS reference_date FROM league_metrics
+                WHERE league_id = '{leagueId}'
+            """
+        row = read_sql(query, session.bind).iloc[0]
+        stamp = (int(row["metrics"]), str(row["reference_date"]))
+        with _cacheLock:
+            _leagueStamps[leagueId] = (monotonic(), stamp)
+        return stamp
+
+
+    def get_all_league_metrics(self, leagueId, timeFrame, awayHome, entityType, session=None):
         session = self._execute_with_session(session)
-        query = f""" 
+        key = (leagueId, timeFrame, awayHome, entityType)
+        stamp = self._league_stamp(leagueId, session)
+        with _cacheLock:
+            cached = _metricCache.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        query = f"""
                 SELECT * FROM league_metrics AS lm
-                WHERE league_id = '{leagueId}' AND timeframe = '{timeFrame}' AND away_home = '{awayHome}' AND entity_type = '{entityType}' ANd metric_name = '{metric}'
+                WHERE league_id = '{leagueId}' AND timeframe = '{timeFrame}' AND away_home = '{awayHome}' AND entity_type = '{entityType}'
             """
-        result = read_sql(query, session.bind) 
-        return {
-            "best_value": result["best_value"].iloc[0],
-            "worst_value": result["worst_value"].iloc[0],
-            "q1": result["q1"].iloc[0],
-            "q2": result["q2"].iloc[0],
-            "q4": result["q4"].iloc[0],
-            "q6": result["q6"].iloc[0],
-            "q8": result["q8"].iloc[0],
-            "q9": result["q9"].iloc[0]
-        } 
\ No newline at end of file
+        result = read_sql(query, session.bind)
+        metrics = {}
+        for _, row in result.iterrows():
+            metrics[row["metric_name"]] = {
+                "best_value": row["best_value"],
+                "worst_value": row["worst_value"],
+                "q1": row["q1"],
+                "q2": row["q2"],
+                "q4": row["q4"],
+                "q6": row["q6"],
+                "q8": row["q8"],
+                "q9": row["q9"]
+            }
+
+        with _cacheLock:
+            _metricCache[key] = (stamp, metrics)
+        return metrics
+
+
+    def get_league_metrics(self,  leagueId, timeFrame, awayHome, entityType, metric, session=None):
+        return self.get_all_league_metrics(leagueId, timeFrame, awayHome, entityType, session)[metric]
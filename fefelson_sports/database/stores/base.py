@@ -1,5 +1,8 @@
 from datetime import date
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
+from threading import Lock
 from typing import Any 
 
 from .store import Store
@@ -65,10 +68,47 @@ class LeagueStore(Store):
 ###################################################################
 
 
+# (provider, league_id, entity_type) -> {provider_id: entity_id}, only rows seen in the table
+_mappingCache = {}
+_mappingLock = Lock()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_mappings(session):
+    """Mappings written through a session that rolled back never reached the table."""
+    session.info.pop("unmapped", None)
+    with _mappingLock:
+        for key in session.info.pop("pending_mappings", set()):
+            _mappingCache.pop(key, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _keep_pending_mappings(session):
+    # misses only hold for the transaction, the next one looks again
+    session.info.pop("unmapped", None)
+    session.info.pop("pending_mappings", None)
+
+
+###################################################################
+###################################################################
+
+
 class ProviderStore(Store):
 
     def __init__(self):
         super().__init__()
+
+
+    def _cached_mapping(self, provider: str, leagueId: str, entityType: str, session: Session) -> dict:
+        key = (provider, leagueId, entityType)
+        with _mappingLock:
+            cache = _mappingCache.get(key)
+        if cache is None:
+            cache = {str(providerId): entityId for entityId, providerId 
+                        in self.get_mapping(provider, entityType, session, leagueId)}
+            with _mappingLock:
+                cache = _mappingCache.setdefault(key, cache)
+        return cache
     
 
     def get_providers(self, session: Session = None) -> list[str]:
@@ -77,30 +117,46 @@ class ProviderStore(Store):
         return [provider.name for provider in session.query(Provider).all()]
 
 
-    def get_mapping(self, provider, entityType, session: Session = None) -> list[tuple]:
+    def get_mapping(self, provider, entityType, session: Session = None, leagueId: str = None) -> list[tuple]:
         """Fetch all provider names, using a provided session or a new one."""
         session = self._execute_with_session(session)
 
-        return [
-            (mapping.entity_id, mapping.provider_id) for mapping in
-                session.query(ProviderMapping).filter_by(provider=provider, entity_type=entityType).all()
-        ]
-
+        query = session.query(ProviderMapping).filter_by(provider=provider, entity_type=entityType)
+        if leagueId is not None:
+            query = query.filter_by(league_id=leagueId)
+        return [(mapping.entity_id, mapping.provider_id) for mapping in query.all()]
+
+
+
+    def _lookup(self, provider: str, leagueId: str, entityType: str, providerId: Any, session: Session) -> Any:
+        """
+        entity_id for one provider id, None when the table doesn't have it.  Other league
+        processes add mappings too, so a miss is only remembered by this session until
+        it commits or rolls back and the next transaction reads the table again.
+        """
+        cache = self._cached_mapping(provider, leagueId, entityType, session)
+        entityId = cache.get(str(providerId))
+        if entityId is None:
+            unmapped = session.info.setdefault("unmapped", set())
+            key = (provider, leagueId, entityType, str(providerId))
+            if key in unmapped:
+                return None
+            mapping = session.get(ProviderMapping, key)
+            if mapping is None:
+                unmapped.add(key)
+            else:
+                entityId = mapping.entity_id
+                with _mappingLock:
+                    cache[str(providerId)] = entityId
+        return entityId
 
 
     def get_inside_id(self, provider: str, leagueId: str, entityType: str, providerId: Any,
                          session: Session=None) -> Any:
 
         session = self._execute_with_session(session)
-        mapping = (
-            session.query(ProviderMapping)
-                    .filter_by(provider=provider, league_id=leagueId, entity_type=entityType, 
-                                provider_id=providerId)
-                    .first()
-        )
-        if mapping is None:
-            return -1
-        return mapping.entity_id
+        entityId = self._lookup(provider, leagueId, entityType, providerId, session)
+        return -1 if entityId is None else entityId
 
 
     def get_outside_id(self, provider: str, leagueId: str, entityType: str, entityId: Any,
@@ -125,13 +181,19 @@ class ProviderStore(Store):
     def set_provider_id(self, provider: str, leagueId: str, entityType: str, providerId: Any,
                          entityId: int, session: Session=None) -> None:
         session = self._execute_with_session(session)
-        mapping = {"provider": provider, "league_id": leagueId, "entity_type": entityType, 
-                        "provider_id": providerId, "entity_id": entityId}
-        if self.get_inside_id(provider, leagueId, entityType, providerId) == -1:
-            self.insert(session, mapping)
-            session.flush()
+        if self._lookup(provider, leagueId, entityType, providerId, session) is not None:
+            return
 
-   
-
-
-   
\ No newline at end of file
+        mapping = {"provider": provider, "league_id": leagueId, "entity_type": entityType, 
+                        "provider_id": str(providerId), "entity_id": entityId}
+        table = ProviderMapping.__table__
+        stored = session.execute(insert(table).values(**mapping).on_conflict_do_nothing()
+                                    .returning(table.c.entity_id)).scalar()
+        if stored is None:
+            # a parallel league process mapped it first, keep theirs
+            stored = session.get(ProviderMapping, (provider, leagueId, entityType, str(providerId))).entity_id
+
+        session.info["unmapped"].discard((provider, leagueId, entityType, str(providerId)))
+        with _mappingLock:
+            self._cached_mapping(provider, leagueId, entityType, session)[str(providerId)] = stored
+        session.info.setdefault("pending_mappings", set()).add((provider, leagueId, entityType))
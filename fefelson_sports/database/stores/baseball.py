@@ -26,25 +26,36 @@ class TeamStatStore(Store):
             return None 
 
         session = self._execute_with_session(session)
+        snapshot = self._snapshot(teamId, timeFrame, awayHome, session)
+        if snapshot is not None:
+            return snapshot.team_stats
+        return self._summarize_team(self._team_frame(teamId, timeFrame, session), awayHome)
+
+
+    def _team_frame(self, teamIds, timeFrame, session):
         andGD = self._and_gameDate(timeFrame)
         query = f""" 
                 SELECT g.game_id, bts.team_id, bts.opp_id,g.home_id, g.away_id, ab, bb, r, h, hr, rbi, sb, lob, errors 
                     FROM baseball_team_stats AS bts
                     INNER JOIN games AS g ON bts.game_id = g.game_id
                     INNER JOIN leagues AS l ON g.league_id = l.league_id
-                    WHERE team_id = {teamId} {andGD}
+                    WHERE {self._team_in("bts.team_id", teamIds)} {andGD}
             """
         result = read_sql(query, session.bind) 
         query = f""" 
-                SELECT ab.game_id, SUM(num_bases) AS num_bases FROM at_bats AS ab
+                SELECT ab.game_id, ab.team_id, SUM(num_bases) AS num_bases FROM at_bats AS ab
                     INNER JOIN games AS g ON ab.game_id = g.game_id
                     INNER JOIN leagues AS l ON g.league_id = l.league_id
                     INNER JOIN at_bat_types AS abt ON ab.at_bat_type_id = abt.at_bat_type_id
-                    WHERE team_id = {teamId} {andGD}
-                    GROUP BY ab.game_id
+                    WHERE {self._team_in("ab.team_id", teamIds)} {andGD}
+                    GROUP BY ab.game_id, ab.team_id
             """
         abResults = read_sql(query, session.bind) 
-        result = merge(result, abResults, how="left", on="game_id")
+        result = merge(result, abResults, how="left", on=["game_id", "team_id"])
+        return result
+
+
+    def _summarize_team(self, result, awayHome):
         if awayHome != "all":
             result = result[(result['team_id'] == result[f"{awayHome}_id"])]
 
@@ -70,8 +81,7 @@ class TeamStatStore(Store):
 
 
     def insert(self, session: Session, statsData: dict) -> None:
-        if not self.get_by_id(statsData, session):
-            session.add(BaseballTeamStat(**statsData))
+        self._insert_row(session, BaseballTeamStat, statsData)
 
 
 ###################################################################
@@ -98,7 +108,7 @@ class BatterStore(Store):
             """
         bsResults = read_sql(query, session.bind) 
         query = f""" 
-                SELECT ab.game_id, SUM(num_bases) AS num_bases FROM at_bats AS ab
+                SELECT ab.game_id, ab.team_id, SUM(num_bases) AS num_bases FROM at_bats AS ab
                     INNER JOIN games AS g ON ab.game_id = g.game_id
                     INNER JOIN leagues AS l ON g.league_id = l.league_id
                     INNER JOIN at_bat_types AS abt ON ab.at_bat_type_id = abt.at_bat_type_id
@@ -210,8 +220,7 @@ class PlayerStatStore(Store):
 
 
     def insert(self, session: Session, statClass: Any, statsData:dict) -> None:
-        if not self.get_by_id(statsData, statClass, session):
-            session.add(statClass(**statsData))
+        self._insert_row(session, statClass, statsData)
 
 
     def insert_batting(self, session: Session, statsData: dict) -> None:
@@ -249,8 +258,7 @@ class PlayerPlayStore(Store):
 
 
     def insert(self, session: Session, statClass: Any, statsData:dict) -> None:
-        if not self.get_by_id(statsData, statClass, session):
-            session.add(statClass(**statsData))
+        self._insert_row(session, statClass, statsData)
 
 
 
@@ -47,6 +47,13 @@ class TeamStatStore(Store):
             return None 
 
         session = self._execute_with_session(session)
+        snapshot = self._snapshot(teamId, timeFrame, awayHome, session)
+        if snapshot is not None:
+            return snapshot.team_stats
+        return self._summarize_team(self._team_frame(teamId, timeFrame, session), awayHome)
+
+
+    def _team_frame(self, teamIds, timeFrame, session):
         andGD = self._and_gameDate(timeFrame)
         query = f""" 
                 SELECT g.league_id, g.game_id, home_id, away_id, bts.team_id, bts.opp_id, game_date, 
@@ -97,94 +104,94 @@ class TeamStatStore(Store):
                     INNER JOIN basketball_team_stats AS opp_bts ON bts.game_id = opp_bts.game_id AND bts.team_id = opp_bts.opp_id
                     INNER JOIN games AS g ON bts.game_id = g.game_id
                     INNER JOIN leagues AS l ON g.league_id = l.league_id
-                    WHERE bts.team_id = {teamId} {andGD}
+                    WHERE {self._team_in("bts.team_id", teamIds)} {andGD}
             """
         result = read_sql(query, session.bind) 
 
         clutch_two_query = f"""
-                            SELECT g.game_id,
+                            SELECT g.game_id, bs.team_id,
                                     COUNT(g.game_id) AS off_clutch_2pa, 
                                     SUM(CASE WHEN shot_made THEN 1 ELSE 0 END) AS off_clutch_2pm
 
                             FROM basketball_shots AS bs
                             INNER JOIN games AS g ON bs.game_id = g.game_id
                             INNER JOIN leagues AS l ON g.league_id = l.league_id
-                            WHERE team_id = {teamId} {andGD} AND clutch = TRUE AND points = 2
-                            GROUP BY g.game_id
+                            WHERE {self._team_in("bs.team_id", teamIds)} {andGD} AND clutch = TRUE AND points = 2
+                            GROUP BY g.game_id, bs.team_id
                             """
         clutchTwoResult = read_sql(clutch_two_query, session.bind)
         
         clutch_one_query = f"""
-                        SELECT g.game_id, 
+                        SELECT g.game_id, bs.team_id, 
                                 COUNT(g.game_id) AS off_clutch_fta, 
                                 SUM(CASE WHEN shot_made THEN 1 ELSE 0 END) AS off_clutch_ftm
 
                         FROM basketball_shots AS bs
                         INNER JOIN games AS g ON bs.game_id = g.game_id
                         INNER JOIN leagues AS l ON g.league_id = l.league_id
-                        WHERE team_id = {teamId} {andGD} AND clutch = TRUE AND points = 1
-                        GROUP BY g.game_id
+                        WHERE {self._team_in("bs.team_id", teamIds)} {andGD} AND clutch = TRUE AND points = 1
+                        GROUP BY g.game_id, bs.team_id
                         """
         clutchFTResult = read_sql(clutch_one_query, session.bind)
         
         clutch_three_query = f"""
-                        SELECT g.game_id, 
+                        SELECT g.game_id, bs.team_id, 
                                 COUNT(g.game_id) AS off_clutch_3pa, 
                                 SUM(CASE WHEN shot_made THEN 1 ELSE 0 END) AS off_clutch_3pm
 
                         FROM basketball_shots AS bs
                         INNER JOIN games AS g ON bs.game_id = g.game_id
                         INNER JOIN leagues AS l ON g.league_id = l.league_id
-                        WHERE team_id = {teamId} {andGD} AND clutch = TRUE AND points = 3
-                        GROUP BY g.game_id
+                        WHERE {self._team_in("bs.team_id", teamIds)} {andGD} AND clutch = TRUE AND points = 3
+                        GROUP BY g.game_id, bs.team_id
                         """
         clutchThreeResult = read_sql(clutch_three_query, session.bind)
 
         clutch_def_two_query = f"""
-                        SELECT g.game_id,
+                        SELECT g.game_id, bs.opp_id AS team_id,
                                 COUNT(g.game_id) AS def_clutch_2pa, 
                                 SUM(CASE WHEN shot_made THEN 1 ELSE 0 END) AS def_clutch_2pm
 
                         FROM basketball_shots AS bs
                         INNER JOIN games AS g ON bs.game_id = g.game_id
                         INNER JOIN leagues AS l ON g.league_id = l.league_id
-                        WHERE opp_id = {teamId} {andGD}  AND clutch = TRUE AND points = 2
-                        GROUP BY g.game_id
+                        WHERE {self._team_in("bs.opp_id", teamIds)} {andGD}  AND clutch = TRUE AND points = 2
+                        GROUP BY g.game_id, bs.opp_id
                         """
         clutchDefTwoResult = read_sql(clutch_def_two_query, session.bind)
         
         clutch_def_one_query = f"""
-                        SELECT g.game_id, 
+                        SELECT g.game_id, bs.opp_id AS team_id, 
                                 COUNT(g.game_id) AS def_clutch_fta, 
                                 SUM(CASE WHEN shot_made THEN 1 ELSE 0 END) AS def_clutch_ftm
 
                         FROM basketball_shots AS bs
                         INNER JOIN games AS g ON bs.game_id = g.game_id
                         INNER JOIN leagues AS l ON g.league_id = l.league_id
-                        WHERE opp_id = {teamId} {andGD} AND clutch = TRUE AND points = 1
-                        GROUP BY g.game_id
+                        WHERE {self._team_in("bs.opp_id", teamIds)} {andGD} AND clutch = TRUE AND points = 1
+                        GROUP BY g.game_id, bs.opp_id
                         """
         clutchDefFTResult = read_sql(clutch_def_one_query, session.bind)
         
         clutch_def_three_query = f"""
-                        SELECT g.game_id,
+                        SELECT g.game_id, bs.opp_id AS team_id,
                                 COUNT(g.game_id) AS def_clutch_3pa, 
                                 SUM(CASE WHEN shot_made THEN 1 ELSE 0 END) AS def_clutch_3pm
 
                         FROM basketball_shots AS bs
                         INNER JOIN games AS g ON bs.game_id = g.game_id
                         INNER JOIN leagues AS l ON g.league_id = l.league_id
-                        WHERE opp_id = {teamId} {andGD} AND clutch = TRUE AND points = 3
-                        GROUP BY g.game_id
+                        WHERE {self._team_in("bs.opp_id", teamIds)} {andGD} AND clutch = TRUE AND points = 3
+                        GROUP BY g.game_id, bs.opp_id
                         """
         clutchDefThreeResult = read_sql(clutch_def_three_query, session.bind)
 
-        result = merge(result, clutchTwoResult, how="left", on="game_id")
-        result = merge(result, clutchFTResult, how="left", on="game_id")
-        result = merge(result, clutchThreeResult, how="left", on="game_id")
-        result = merge(result, clutchDefTwoResult, how="left", on="game_id")
-        result = merge(result, clutchDefFTResult, how="left", on="game_id")
-        result = merge(result, clutchDefThreeResult, how="left", on="game_id")
+        result = merge(result, clutchTwoResult, how="left", on=["game_id", "team_id"])
+        result = merge(result, clutchFTResult, how="left", on=["game_id", "team_id"])
+        result = merge(result, clutchThreeResult, how="left", on=["game_id", "team_id"])
+        result = merge(result, clutchDefTwoResult, how="left", on=["game_id", "team_id"])
+        result = merge(result, clutchDefFTResult, how="left", on=["game_id", "team_id"])
+        result = merge(result, clutchDefThreeResult, how="left", on=["game_id", "team_id"])
 
         clutch_cols = [
             'off_clutch_2pa', 'off_clutch_2pm', 'off_clutch_3pa', 'off_clutch_3pm', 
@@ -211,6 +218,10 @@ class TeamStatStore(Store):
             result["def_clutch_2pa"] + result["def_clutch_3pa"]
         ).astype(int)
     
+        return result
+
+
+    def _summarize_team(self, result, awayHome):
         if awayHome != "all":
             result = result[(result['team_id'] == result[f"{awayHome}_id"])]
 
@@ -265,8 +276,7 @@ class TeamStatStore(Store):
 
 
     def insert(self, session: Session, statsData: dict) -> None:
-        if not self.get_by_id(statsData, session):
-            session.add(BasketballTeamStat(**statsData))
+        self._insert_row(session, BasketballTeamStat, statsData)
 
 
 ###################################################################
@@ -286,8 +296,7 @@ class PlayerStatStore(Store):
 
 
     def insert(self, session: Session, statsData:dict) -> None:
-        if not self.get_by_id(statsData, session):
-            session.add(BasketballPlayerStat(**statsData))
+        self._insert_row(session, BasketballPlayerStat, statsData)
 
 
 
@@ -308,5 +317,4 @@ class PlayerShotStore(Store):
 
 
     def insert(self, session: Session, statsData:dict) -> None:
-        if not self.get_by_id(statsData, session):
-            session.add(BasketballShot(**statsData))
+        self._insert_row(session, BasketballShot, statsData)
@@ -24,18 +24,29 @@ class GameStore(Store):
             return None 
 
         session = self._execute_with_session(session)
+        snapshot = self._snapshot(teamId, timeFrame, awayHome, session)
+        if snapshot is not None:
+            return snapshot.record
+        return self._summarize_record(self._record_frame(teamId, timeFrame, session), teamId, awayHome)
+
+
+    def _record_frame(self, teamIds, timeFrame, session):
         andGD = self._and_gameDate(timeFrame)
 
         query = f"""
-                SELECT game_id, home_id, away_id,
-                    CASE WHEN {teamId} = winner_id THEN 1 ELSE 0 END AS wins,
-                    CASE WHEN {teamId} = loser_id THEN 1 ELSE 0 END AS loses
+                SELECT g.game_id, t.team_id, g.home_id, g.away_id,
+                    CASE WHEN t.team_id = g.winner_id THEN 1 ELSE 0 END AS wins,
+                    CASE WHEN t.team_id = g.loser_id THEN 1 ELSE 0 END AS loses
 
                 FROM games AS g
                 INNER JOIN leagues AS l ON g.league_id = l.league_id
-                WHERE (g.away_id = {teamId} OR g.home_id = {teamId}) {andGD}
+                CROSS JOIN LATERAL (VALUES (g.home_id), (g.away_id)) AS t(team_id)
+                WHERE {self._team_in("t.team_id", teamIds)} {andGD}
                 """
-        result = read_sql(query, session.bind) 
+        return read_sql(query, session.bind) 
+
+
+    def _summarize_record(self, result, teamId, awayHome):
         if awayHome != "all":
             result = result[teamId == result[f"{awayHome}_id"]]
 
@@ -48,6 +59,13 @@ class GameStore(Store):
             return None 
 
         session = self._execute_with_session(session)
+        snapshot = self._snapshot(teamId, timeFrame, awayHome, session)
+        if snapshot is not None:
+            return snapshot.opps
+        return self._summarize_opps(self._opps_frame(teamId, timeFrame, session), awayHome)
+
+
+    def _opps_frame(self, teamIds, timeFrame, session):
         andGD = self._and_gameDate(timeFrame)
 
         query = f"""
@@ -60,22 +78,26 @@ class GameStore(Store):
                 FROM (
                     SELECT 
                         g.game_date, 
-                        {teamId} AS team_id,
+                        tm.team_id,
                         g.away_id, 
                         g.home_id,
                         CASE 
-                            WHEN {teamId} = g.away_id THEN g.home_id 
+                            WHEN tm.team_id = g.away_id THEN g.home_id 
                             ELSE g.away_id 
                         END AS opp_id,
                         g.league_id
                     FROM games AS g
                     INNER JOIN leagues AS l ON g.league_id = l.league_id
-                    WHERE (g.away_id = {teamId} OR g.home_id = {teamId}) {andGD}
+                    CROSS JOIN LATERAL (VALUES (g.home_id), (g.away_id)) AS tm(team_id)
+                    WHERE {self._team_in("tm.team_id", teamIds)} {andGD}
                 ) AS q
                 INNER JOIN teams AS t ON q.opp_id = t.team_id
                 ORDER BY q.game_date DESC;
                 """
-        result = read_sql(query, session.bind) 
+        return read_sql(query, session.bind) 
+
+
+    def _summarize_opps(self, result, awayHome):
         if awayHome != "all":
             result = result[(result['team_id'] == result[f"{awayHome}_id"])]
         
@@ -99,8 +121,13 @@ class GameStore(Store):
 
 
     def insert(self, session: Session, gameData: dict) -> None:
-        if not self.get_by_id(gameData["game_id"], session):
-            session.add(Game(**gameData))
+        self._insert_row(session, Game, gameData)
+
+
+    def delete(self, gameId: str, session: Session = None) -> None:
+        """Drops the game, periods, lines and stats follow through ON DELETE CASCADE"""
+        session = self._execute_with_session(session)
+        session.query(Game).filter_by(game_id=gameId).delete(synchronize_session=False)
             
 
 
@@ -122,8 +149,7 @@ class PeriodStore(Store):
 
 
     def insert(self, session: Session, period: dict) -> None:
-        if not self.get_by_id(period, session):
-            session.add(Period(**period))
+        self._insert_row(session, Period, period)
             
     
 ###################################################################
@@ -201,8 +227,7 @@ class StadiumStore(Store):
 
 
     def insert(self, session: Session, stadium_data: dict) -> None:
-        if not self.get_by_id(stadium_data["stadium_id"], session):
-            session.add(Stadium(**stadium_data))
+        self._insert_row(session, Stadium, stadium_data)
 
 
 ###################################################################
@@ -26,6 +26,13 @@ class TeamStatStore(Store):
             return None  
 
         session = self._execute_with_session(session)
+        snapshot = self._snapshot(teamId, timeFrame, awayHome, session)
+        if snapshot is not None:
+            return snapshot.team_stats
+        return self._summarize_team(self._team_frame(teamId, timeFrame, session), awayHome)
+
+
+    def _team_frame(self, teamIds, timeFrame, session):
         andGD = self._and_gameDate(timeFrame)
         query = f""" 
                     SELECT g.game_id, g.home_id, g.away_id, fts.team_id, fts.opp_id, game_date,
@@ -59,14 +66,14 @@ class TeamStatStore(Store):
                     INNER JOIN football_team_stats AS opp_fts ON fts.game_id = opp_fts.game_id AND fts.team_id = opp_fts.opp_id
                     INNER JOIN games AS g ON fts.game_id = g.game_id
                     INNER JOIN leagues AS l ON g.league_id = l.league_id
-                    WHERE fts.team_id = {teamId} {andGD}
+                    WHERE {self._team_in("fts.team_id", teamIds)} {andGD}
                 """
         result = read_sql(query, session.bind)
         
         # 2. Passing + Rushing TDs - FIXED: separate queries, no cross-join
         # Offensive TDs
         query_off_td = f"""
-            SELECT g.game_id,
+            SELECT g.game_id, p.team_id,
                 SUM(p.pass_att) AS off_pass_att,
                 SUM(p.pass_comp) AS off_pass_comp,
                 SUM(p.pass_td) AS off_pass_td,
@@ -75,14 +82,14 @@ class TeamStatStore(Store):
             FROM passing p
             INNER JOIN games g ON p.game_id = g.game_id
             INNER JOIN leagues AS l ON g.league_id = l.league_id
-            WHERE p.team_id = {teamId} {andGD}
-            GROUP BY g.game_id
+            WHERE {self._team_in("p.team_id", teamIds)} {andGD}
+            GROUP BY g.game_id, p.team_id
         """
         off_pass = read_sql(query_off_td, session.bind)
 
         # Defensive TDs (allowed = opponent's offensive)
         query_def_td = f"""
-            SELECT g.game_id,
+            SELECT g.game_id, opp_p.opp_id AS team_id,
                 SUM(opp_p.pass_att) AS def_pass_att,
                 SUM(opp_p.pass_comp) AS def_pass_comp,
                 SUM(opp_p.pass_td) AS def_pass_td,
@@ -91,39 +98,39 @@ class TeamStatStore(Store):
             FROM passing opp_p
             INNER JOIN games g ON opp_p.game_id = g.game_id
             INNER JOIN leagues AS l ON g.league_id = l.league_id
-            WHERE opp_p.opp_id = {teamId} {andGD}
-            GROUP BY g.game_id
+            WHERE {self._team_in("opp_p.opp_id", teamIds)} {andGD}
+            GROUP BY g.game_id, opp_p.opp_id
         """
         def_pass = read_sql(query_def_td, session.bind)
 
         # 2. Rushing TDs - FIXED: separate queries, no cross-join
         # Offensive TDs
         query_off_rush_td = f"""
-            SELECT g.game_id,
+            SELECT g.game_id, r.team_id,
                 SUM(r.rush_td) AS off_rush_td
             FROM rushing r
             INNER JOIN games g ON r.game_id = g.game_id
             INNER JOIN leagues AS l ON g.league_id = l.league_id
-            WHERE r.team_id = {teamId} {andGD}
-            GROUP BY g.game_id
+            WHERE {self._team_in("r.team_id", teamIds)} {andGD}
+            GROUP BY g.game_id, r.team_id
         """
         off_rush = read_sql(query_off_rush_td, session.bind)
 
         # Defensive Rush TDs (allowed = opponent's offensive)
         query_def_rush_td = f"""
-            SELECT g.game_id, 
+            SELECT g.game_id, opp_r.opp_id AS team_id, 
                 SUM(opp_r.rush_td) AS def_rush_td
             FROM rushing opp_r
             INNER JOIN games g ON opp_r.game_id = g.game_id
             INNER JOIN leagues AS l ON g.league_id = l.league_id
-            WHERE opp_r.opp_id = {teamId} {andGD}
-            GROUP BY g.game_id
+            WHERE {self._team_in("opp_r.opp_id", teamIds)} {andGD}
+            GROUP BY g.game_id, opp_r.opp_id
         """
         def_rush = read_sql(query_def_rush_td, session.bind)
 
         # 3. Defender - Uses OPPONENTS STATS FOR OFFENSE
         query_off_defender = f"""
-            SELECT g.game_id, 
+            SELECT g.game_id, opp_d.opp_id AS team_id, 
                 SUM(opp_d.pass_def) AS off_pass_def, 
                 SUM(opp_d.qb_hits) AS off_qb_hits,
                 SUM(opp_d.ints) AS off_pass_ints, 
@@ -132,14 +139,14 @@ class TeamStatStore(Store):
             FROM defense opp_d
             INNER JOIN games g ON opp_d.game_id = g.game_id
             INNER JOIN leagues AS l ON g.league_id = l.league_id
-            WHERE opp_d.opp_id = {teamId} {andGD}
-            GROUP BY g.game_id
+            WHERE {self._team_in("opp_d.opp_id", teamIds)} {andGD}
+            GROUP BY g.game_id, opp_d.opp_id
         """
         off_defender = read_sql(query_off_defender, session.bind)
 
         # Defensive Defenderss (allowed = opponent's offensive)
         query_def_defender = f"""
-            SELECT g.game_id, 
+            SELECT g.game_id, d.team_id, 
                 SUM(d.pass_def) AS def_pass_def, 
                 SUM(d.qb_hits) AS def_qb_hits,
                 SUM(d.ints) AS def_pass_ints, 
@@ -148,104 +155,104 @@ class TeamStatStore(Store):
             FROM defense d
             INNER JOIN games g ON d.game_id = g.game_id
             INNER JOIN leagues AS l ON g.league_id = l.league_id
-            WHERE d.team_id = {teamId} {andGD}
-            GROUP BY g.game_id
+            WHERE {self._team_in("d.team_id", teamIds)} {andGD}
+            GROUP BY g.game_id, d.team_id
         """
         def_defender = read_sql(query_def_defender, session.bind)
 
 
         # 3. Punts - FIXED: separate
         query_off_punts = f"""
-            SELECT g.game_id, 
+            SELECT g.game_id, p.team_id, 
                 SUM(punts) AS off_punts,
                 SUM(punt_yds) AS off_punt_yards
 
             FROM punts p
             INNER JOIN games g ON p.game_id = g.game_id
             INNER JOIN leagues AS l ON g.league_id = l.league_id
-            WHERE p.team_id = {teamId} {andGD}
-            GROUP BY g.game_id
+            WHERE {self._team_in("p.team_id", teamIds)} {andGD}
+            GROUP BY g.game_id, p.team_id
         """
         off_punts = read_sql(query_off_punts, session.bind)
 
         query_def_punts = f"""
-            SELECT g.game_id, 
+            SELECT g.game_id, p.opp_id AS team_id, 
                 SUM(punts) AS def_punts,
                 SUM(punt_yds) AS def_punt_yards
 
             FROM punts p
             INNER JOIN games g ON p.game_id = g.game_id
             INNER JOIN leagues AS l ON g.league_id = l.league_id
-            WHERE p.opp_id = {teamId} {andGD}
-            GROUP BY g.game_id
+            WHERE {self._team_in("p.opp_id", teamIds)} {andGD}
+            GROUP BY g.game_id, p.opp_id
         """
         def_punts = read_sql(query_def_punts, session.bind)
 
         # 4. Kick Returns - FIXED: separate
         query_off_kr = f"""
-            SELECT g.game_id, 
+            SELECT g.game_id, kr.team_id, 
                     SUM(kr_yds) AS off_kr_yds,
                     SUM(pr_yds) AS off_pr_yds
 
             FROM kick_returns kr
             INNER JOIN games g ON kr.game_id = g.game_id
             INNER JOIN leagues AS l ON g.league_id = l.league_id
-            WHERE kr.team_id = {teamId} {andGD}
-            GROUP BY g.game_id
+            WHERE {self._team_in("kr.team_id", teamIds)} {andGD}
+            GROUP BY g.game_id, kr.team_id
         """
         off_kr = read_sql(query_off_kr, session.bind)
 
         query_def_kr = f"""
-            SELECT g.game_id,  
+            SELECT g.game_id, kr.opp_id AS team_id,  
                     SUM(kr_yds) AS def_kr_yds,
                     SUM(pr_yds) AS def_pr_yds
 
             FROM kick_returns kr
             INNER JOIN games g ON kr.game_id = g.game_id
             INNER JOIN leagues AS l ON g.league_id = l.league_id
-            WHERE kr.opp_id = {teamId} {andGD}
-            GROUP BY g.game_id
+            WHERE {self._team_in("kr.opp_id", teamIds)} {andGD}
+            GROUP BY g.game_id, kr.opp_id
         """
         def_kr = read_sql(query_def_kr, session.bind)
 
         # 4. Field Goals - FIXED: separate
         query_off_fg = f"""
-            SELECT g.game_id, 
+            SELECT g.game_id, k.team_id, 
                     SUM(fga) AS off_fga
 
             FROM kicks k
             INNER JOIN games g ON k.game_id = g.game_id
             INNER JOIN leagues AS l ON g.league_id = l.league_id
-            WHERE k.team_id = {teamId} {andGD}
-            GROUP BY g.game_id
+            WHERE {self._team_in("k.team_id", teamIds)} {andGD}
+            GROUP BY g.game_id, k.team_id
         """
         off_fg = read_sql(query_off_fg, session.bind)
 
         query_def_fg = f"""
-            SELECT g.game_id, 
+            SELECT g.game_id, k.opp_id AS team_id, 
                     SUM(fga) AS def_fga
 
             FROM kicks k
             INNER JOIN games g ON k.game_id = g.game_id
             INNER JOIN leagues AS l ON g.league_id = l.league_id
-            WHERE k.opp_id = {teamId} {andGD}
-            GROUP BY g.game_id
+            WHERE {self._team_in("k.opp_id", teamIds)} {andGD}
+            GROUP BY g.game_id, k.opp_id
         """
         def_fg = read_sql(query_def_fg, session.bind)
 
         # 5. Merge all safely
-        result = merge(result, off_pass, how="left", on="game_id")
-        result = merge(result, def_pass, how="left", on="game_id")
-        result = merge(result, off_rush, how="left", on="game_id")
-        result = merge(result, def_rush, how="left", on="game_id")
-        result = merge(result, off_punts, how="left", on="game_id")
-        result = merge(result, def_punts, how="left", on="game_id")
-        result = merge(result, off_fg, how="left", on="game_id")
-        result = merge(result, def_fg, how="left", on="game_id")
-        result = merge(result, off_defender, how="left", on="game_id")
-        result = merge(result, def_defender, how="left", on="game_id")
-        result = merge(result, off_kr, how="left", on="game_id")
-        result = merge(result, def_kr, how="left", on="game_id")
+        result = merge(result, off_pass, how="left", on=["game_id", "team_id"])
+        result = merge(result, def_pass, how="left", on=["game_id", "team_id"])
+        result = merge(result, off_rush, how="left", on=["game_id", "team_id"])
+        result = merge(result, def_rush, how="left", on=["game_id", "team_id"])
+        result = merge(result, off_punts, how="left", on=["game_id", "team_id"])
+        result = merge(result, def_punts, how="left", on=["game_id", "team_id"])
+        result = merge(result, off_fg, how="left", on=["game_id", "team_id"])
+        result = merge(result, def_fg, how="left", on=["game_id", "team_id"])
+        result = merge(result, off_defender, how="left", on=["game_id", "team_id"])
+        result = merge(result, def_defender, how="left", on=["game_id", "team_id"])
+        result = merge(result, off_kr, how="left", on=["game_id", "team_id"])
+        result = merge(result, def_kr, how="left", on=["game_id", "team_id"])
 
 
         # Keep your other merges (defense, returns) if needed - they look okay
@@ -271,6 +278,10 @@ class TeamStatStore(Store):
             (result["def_fourth_att"] - result["def_fourth_conv"])
         ).astype(int)
 
+        return result
+
+
+    def _summarize_team(self, result, awayHome):
         if awayHome != "all":
             result = result[(result['team_id'] == result[f"{awayHome}_id"])]
         if len(result) == 0:
@@ -326,8 +337,7 @@ class TeamStatStore(Store):
 
 
     def insert(self, session: Session, statsData: dict) -> None:
-        if not self.get_by_id(statsData, session):
-            session.add(FootballTeamStat(**statsData))
+        self._insert_row(session, FootballTeamStat, statsData)
 
 
 ###################################################################
@@ -347,8 +357,7 @@ class PlayerStatStore(Store):
 
 
     def insert(self, session: Session, statClass: Any, statsData:dict) -> None:
-        if not self.get_by_id(statsData, statClass, session):
-            session.add(statClass(**statsData))
+        self._insert_row(session, statClass, statsData)
 
 
     def insert_passing(self, session: Session, statsData: dict) -> None:
@@ -400,8 +409,7 @@ class PlayerPlayStore(Store):
 
 
     def insert(self, session: Session, statClass: Any, statsData:dict) -> None:
-        if not self.get_by_id(statsData, statClass, session):
-            session.add(statClass(**statsData))
+        self._insert_row(session, statClass, statsData)
 
 
 
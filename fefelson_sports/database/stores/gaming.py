@@ -125,8 +125,7 @@ class GameLineStore(Store):
 
 
     def insert(self, session: Session, glData: dict) -> None:
-        if not self.get_by_id(glData, session):
-            session.add(GameLine(**glData))
+        self._insert_row(session, GameLine, glData)
 
 
 ###################################################################
@@ -145,7 +144,6 @@ class OverUnderStore(Store):
 
 
     def insert(self, session: Session, ouData: dict) -> None:
-        if not self.get_by_id(ouData, session):
-            session.add(OverUnder(**ouData))
+        self._insert_row(session, OverUnder, ouData)
             
     
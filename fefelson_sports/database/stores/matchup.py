@@ -1,33 +1,169 @@
 from collections import defaultdict
+from contextlib import closing
 from datetime import datetime, date
-from os import environ, listdir
+from os import environ, listdir, makedirs, remove, replace
+from os.path import dirname, exists
 from pytz import timezone
+import json
+import sqlite3
+import tempfile
 
 from .store import Store
 
 from ...utils.file_agent import JSONAgent
 
 BASE_PATH = f"{environ['HOME']}/FEFelson/FEFelson_Sports"
+MATCHUP_PATH = f"{BASE_PATH}/matchups"
+INDEX_PATH = f"{BASE_PATH}/matchup_index.db"
 est = timezone('America/New_York')
 
+
+###################################################################
+###################################################################
+
+
+class MatchupIndex:
+    """
+    SQLite sidecar of the matchups folder, one row per file with its title,
+    league, gameTime, lastUpdate and path, so listing and cleaning never open
+    the payloads.  Every league process writes through it; a missing index is
+    rebuilt from the folder once.
+
+        index = MatchupIndex()
+        index.write(matchup)
+        for row in index.rows(leagueId="MLB"):
+            game = index.read(row["title"])
+    """
+
+    def __init__(self, matchupPath: str = MATCHUP_PATH, indexPath: str = INDEX_PATH):
+        self.matchupPath = matchupPath
+        self.indexPath = indexPath
+
+        makedirs(self.matchupPath, exist_ok=True)
+        isNew = not exists(self.indexPath)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                        CREATE TABLE IF NOT EXISTS matchups (
+                            title TEXT PRIMARY KEY,
+                            league_id TEXT NOT NULL,
+                            game_time TEXT NOT NULL,
+                            last_update TEXT,
+                            file_path TEXT NOT NULL
+                        )
+                    """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_matchups_league_id ON matchups (league_id)")
+        if isNew:
+            self.rebuild()
+
+
+    def _connect(self):
+        # league processes write at the same time, wait for the lock instead of failing
+        conn = sqlite3.connect(self.indexPath, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+    def _row(self, filePath: str, matchup: dict) -> tuple:
+        return (matchup["title"], matchup["leagueId"], matchup["gameTime"], matchup.get("lastUpdate"), filePath)
+
+
+    def file_path(self, title: str) -> str:
+        return f"{self.matchupPath}/{title}.json"
+
+
+    def rebuild(self):
+        """Re-reads every file in the folder, only needed when the index is lost"""
+        rows = []
+        for fileName in listdir(self.matchupPath):
+            if fileName.endswith(".json"):
+                filePath = f"{self.matchupPath}/{fileName}"
+                rows.append(self._row(filePath, JSONAgent.read(filePath)))
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM matchups")
+            conn.executemany("INSERT OR REPLACE INTO matchups VALUES (?, ?, ?, ?, ?)", rows)
+
+
+    def write(self, matchup: dict, filePath: str = None):
+        filePath = filePath or self.file_path(matchup["title"])
+        # readers never see a half written file
+        with tempfile.NamedTemporaryFile("w", dir=dirname(filePath), suffix=".tmp", delete=False) as fileOut:
+            json.dump(matchup, fileOut)
+        replace(fileOut.name, filePath)
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO matchups VALUES (?, ?, ?, ?, ?)", self._row(filePath, matchup))
+
+
+    def read(self, title: str) -> dict:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT file_path FROM matchups WHERE title = ?", (title,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return JSONAgent.read(row["file_path"])
+        except FileNotFoundError:
+            self.drop([title])
+            return None
+
+
+    def rows(self, leagueId: str = None) -> list:
+        """Index rows with gameTime parsed, soonest first"""
+        query = "SELECT * FROM matchups"
+        params = ()
+        if leagueId:
+            query += " WHERE league_id = ?"
+            params = (leagueId,)
+
+        with closing(self._connect()) as conn:
+            rows = [dict(row) for row in conn.execute(query, params)]
+        for row in rows:
+            row["game_time"] = datetime.fromisoformat(row["game_time"])
+        return sorted(rows, key=lambda row: row["game_time"])
+
+
+    def drop(self, titles: list):
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("DELETE FROM matchups WHERE title = ?", [(title,) for title in titles])
+
+
+    def remove_before(self, leagueId: str, day: date) -> int:
+        """Deletes the files and rows of a league's games played before day"""
+        old = [row for row in self.rows(leagueId) if row["game_time"].date() < day]
+        for row in old:
+            if exists(row["file_path"]):
+                remove(row["file_path"])
+        self.drop([row["title"] for row in old])
+        return len(old)
+
+
+###################################################################
+###################################################################
+
+
 class MatchupStore(Store):
 
     def __init__(self):
         super().__init__()
-        
+        self.index = MatchupIndex()
+
 
     def get_game_data(self):
-        gameList = []
-        for filePath in [f"{BASE_PATH}/matchups/{fileName}" for fileName in listdir(f"{BASE_PATH}/matchups")]:
-            data = JSONAgent.read(filePath)
-            data["gameTime"] = datetime.fromisoformat(data["gameTime"])
-            gameList.append(data)
+        nowEst = datetime.now().astimezone(est)
 
         gameData = defaultdict(dict)
-        for game in sorted(gameList, key=lambda x: x["gameTime"]):
-            if game["gameTime"] > datetime.now().astimezone(est):
-                gameData[game['leagueId']][game['title']] = game
+        # only upcoming games are opened, the index already has them in time order
+        for row in self.index.rows():
+            if row["game_time"] <= nowEst:
+                continue
+
+            game = self.index.read(row["title"])
+            if game is None:
+                continue
+            game["gameTime"] = row["game_time"]
 
-            if game["gameTime"].date() == date.today() and game["gameTime"] > datetime.now().astimezone(est):
-                gameData["Today"][game['title']] = game 
+            gameData[game['leagueId']][game['title']] = game
+            if game["gameTime"].date() == date.today():
+                gameData["Today"][game['title']] = game
         return gameData
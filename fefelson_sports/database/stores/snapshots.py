@@ -0,0 +1,119 @@
+from datetime import date
+from pandas import read_sql
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+from time import perf_counter
+
+from .baseball import TeamStatStore as BaseballTeamStatStore
+from .basketball import TeamStatStore as BasketballTeamStatStore
+from .core import GameStore
+from .football import TeamStatStore as FootballTeamStatStore
+from .store import Store
+
+from ..orms import TeamSnapshot
+from ...utils.logging_manager import get_logger
+
+# for debugging
+# from pprint import pprint
+
+
+###################################################################
+###################################################################
+
+
+# every toolbar choice in the dashboard
+TIME_FRAMES = ("2Weeks", "1Month", "2Months", "Season", "All")
+AWAY_HOME_SPLITS = ("all", "away", "home")
+
+TEAM_STAT_STORES = {
+    "MLB": BaseballTeamStatStore,
+    "NBA": BasketballTeamStatStore,
+    "NCAAB": BasketballTeamStatStore,
+    "NCAAF": FootballTeamStatStore,
+    "NFL": FootballTeamStatStore
+}
+
+
+###################################################################
+###################################################################
+
+
+class SnapshotStore(Store):
+    """
+    Materializes what the dashboard panels show for every team playing this
+    season, one team_snapshots row per (team, timeframe, away_home), so
+    switching timeframes reads a row instead of re-running the panel queries.
+
+    Each panel query runs once per timeframe for all of the league's teams and
+    the frame is split by team, so a refresh costs the same few dozen queries
+    for NCAAB as for the NBA.  Rows are stamped with today's date; the panel
+    stores fall back to the live queries when a row is missing or older.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+
+    def get_team_ids(self, leagueId, session: Session = None):
+        """Teams with a game in the league's current season"""
+        session = self._execute_with_session(session)
+        query = f"""
+                SELECT DISTINCT t.team_id
+                FROM games AS g
+                INNER JOIN leagues AS l ON g.league_id = l.league_id
+                CROSS JOIN LATERAL (VALUES (g.home_id), (g.away_id)) AS t(team_id)
+                WHERE g.league_id = '{leagueId}' AND g.season = l.curr_season
+            """
+        return [int(teamId) for teamId in read_sql(query, session.bind)["team_id"]]
+
+
+    def is_current(self, leagueId, session: Session = None) -> bool:
+        session = self._execute_with_session(session)
+        query = f"SELECT MIN(reference_date) AS reference_date FROM team_snapshots WHERE league_id = '{leagueId}'"
+        return read_sql(query, session.bind)["reference_date"].iloc[0] == date.today()
+
+
+    def league_rows(self, leagueId, teamIds, session: Session):
+        gameStore = GameStore()
+        teamStatStore = TEAM_STAT_STORES[leagueId]()
+
+        rows = []
+        for timeFrame in TIME_FRAMES:
+            recordFrame = gameStore._record_frame(teamIds, timeFrame, session)
+            oppsFrame = gameStore._opps_frame(teamIds, timeFrame, session)
+            teamFrame = teamStatStore._team_frame(teamIds, timeFrame, session)
+            records, opps, teamStats = (dict(tuple(frame.groupby("team_id"))) for frame in (recordFrame, oppsFrame, teamFrame))
+
+            for teamId in teamIds:
+                # a team without games in the timeframe summarizes an empty frame, like the live query
+                record = records.get(teamId, recordFrame.iloc[:0])
+                teamOpps = opps.get(teamId, oppsFrame.iloc[:0])
+                stats = teamStats.get(teamId, teamFrame.iloc[:0])
+
+                for a_h in AWAY_HOME_SPLITS:
+                    rows.append({
+                        "team_id": teamId,
+                        "timeframe": timeFrame,
+                        "away_home": a_h,
+                        "league_id": leagueId,
+                        "record": gameStore._summarize_record(record, teamId, a_h),
+                        "opps": gameStore._summarize_opps(teamOpps, a_h),
+                        "team_stats": teamStatStore._summarize_team(stats, a_h),
+                        "reference_date": date.today()
+                    })
+        return rows
+
+
+    def refresh(self, leagueId, session: Session) -> int:
+        """Rebuilds every snapshot of the league in the session's transaction, returns the row count"""
+        start = perf_counter()
+
+        teamIds = self.get_team_ids(leagueId, session)
+        rows = self.league_rows(leagueId, teamIds, session) if teamIds else []
+
+        # readers keep the old rows until the swap commits
+        session.execute(delete(TeamSnapshot).where(TeamSnapshot.league_id == leagueId))
+        if rows:
+            session.execute(insert(TeamSnapshot), rows)
+        get_logger().info(f"{leagueId} team snapshots: {len(rows)} rows in {perf_counter() - start:.0f}s")
+        return len(rows)
@@ -1,10 +1,24 @@
+from collections import defaultdict
 from datetime import date
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
+from typing import Any
 
-from ..orms.database import get_db_session
+from ..orms import TeamSnapshot
+from ..orms.database import Base, get_db_session
 
 from ...utils.date_utils import calculate_start_date
 
+
+def _primary_key(table) -> list:
+    """Conflict target for the inserts, any other unique constraint still raises"""
+    return [column.name for column in table.primary_key.columns]
+
+
+###################################################################
+###################################################################
+
+
 class Store:
 
     def __init__(self):
@@ -23,9 +37,83 @@ class Store:
 
 
 
+    def _team_in(self, column, teamIds):
+        """column = teamId, or column IN (...) when given a list of teams"""
+        if isinstance(teamIds, (list, tuple, set)):
+            return f"{column} IN ({', '.join(str(int(teamId)) for teamId in teamIds)})"
+        return f"{column} = {teamIds}"
+
+
+    def _snapshot(self, teamId, timeFrame, awayHome, session: Session) -> TeamSnapshot:
+        """Today's precomputed panel stats for the team, None when missing or stale"""
+        snapshot = session.get(TeamSnapshot, (int(teamId), timeFrame, awayHome))
+        if snapshot is None or snapshot.reference_date != date.today():
+            return None
+        return snapshot
+
+
     def _execute_with_session(self, session_func: Session=None):
         """Execute a function with an appropriate session, either provided or new."""
         if session_func is None:
             with get_db_session() as session:
                 return session
         return session_func  # Use the provided session
+
+
+    def _insert_row(self, session: Session, ormClass: Any, data: dict) -> None:
+        """Queue the row on the session's BulkWriter, or insert it now; existing keys are skipped."""
+        writer = session.info.get("bulk_writer")
+        if writer is not None:
+            writer.add(ormClass, data)
+        else:
+            table = ormClass.__table__
+            session.execute(insert(table).values(**data).on_conflict_do_nothing(index_elements=_primary_key(table)))
+
+
+###################################################################
+###################################################################
+
+
+class BulkWriter:
+    """
+    Collects every row Store._insert_row sees on a session and writes each table
+    with one multi-row INSERT ... ON CONFLICT (primary key) DO NOTHING, parents
+    before children.
+
+        with BulkWriter(session):
+            dbAgent.insert_boxscore(...)
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.rows = defaultdict(list)
+
+
+    def __enter__(self):
+        self.session.info["bulk_writer"] = self
+        return self
+
+
+    def __exit__(self, excType, excValue, traceback):
+        self.session.info.pop("bulk_writer", None)
+        if excType is None:
+            self.write()
+        return False
+
+
+    def add(self, ormClass: Any, data: dict) -> None:
+        self.rows[ormClass.__table__].append(data)
+
+
+    def write(self) -> None:
+        for table in Base.metadata.sorted_tables:
+            rows = self.rows.pop(table, None)
+            if not rows:
+                continue
+
+            # executemany needs matching keys, normalizers can drop optional columns
+            byKeys = defaultdict(list)
+            for row in rows:
+                byKeys[tuple(sorted(row))].append(row)
+            for keyRows in byKeys.values():
+                self.session.execute(insert(table).on_conflict_do_nothing(index_elements=_primary_key(table)), keyRows)
@@ -1,3 +1,4 @@
+from functools import partial
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (QWidget, QComboBox, QScrollArea, QVBoxLayout, QHBoxLayout, 
                                 QStackedLayout, QMainWindow, QApplication)
@@ -7,6 +8,7 @@ from ..panels.nfl_panel import NFLPanel
 from ..panels.ncaaf_panel import NCAAFPanel
 from ..panels.nba_panel import NBAPanel
 from ..panels.ncaab_panel import NCAABPanel
+from .stat_loader import StatLoader
 
 
 class MatchDash(QWidget):
@@ -17,6 +19,10 @@ class MatchDash(QWidget):
 
         self.currentSeason = None 
         self.currentPanel = None
+        self.currentGame = None
+        self.loader = StatLoader(self)
+        # hidden copies the warm up fills in, never the panels on screen
+        self.warmPanels = {}
         
         self.choiceBox = QComboBox(self)  
 
@@ -30,6 +36,14 @@ class MatchDash(QWidget):
         self.ncaabPanel = NCAABPanel(self.mainArea)
         self.ncaafPanel = NCAAFPanel(self.mainArea)
         
+        self.panels = {
+            "MLB": self.mlbPanel,
+            "NBA": self.nbaPanel,
+            "NFL": self.nflPanel,
+            "NCAAB": self.ncaabPanel,
+            "NCAAF": self.ncaafPanel
+        }
+        
         self.stackedLayout = QStackedLayout()       
         self.stackedLayout.addWidget(self.mlbPanel)
         self.stackedLayout.addWidget(self.nbaPanel)
@@ -49,35 +63,52 @@ class MatchDash(QWidget):
         self.setLayout(mainLayout)
 
 
-    def set_stats(self, session, timeFrame, awayHome):
-        self.currentPanel.set_stats(session, timeFrame, awayHome)
+    def set_stats(self, timeFrame, awayHome):
+        # queries run on the loader's pool, the panel only applies finished data
+        self.loader.request(self.currentPanel.fetch_stats, self.currentPanel.apply_stats, timeFrame, awayHome,
+                                key=(self.currentGame["title"], timeFrame, awayHome))
+
+
+    def warm_up(self, games, timeFrame, awayHome):
+        """Prefetches the panel data of every game in the background"""
+        jobs = []
+        for game in games:
+            leagueId = game["leagueId"]
+            if leagueId not in self.warmPanels:
+                self.warmPanels[leagueId] = type(self.panels[leagueId])(None)
+            panel = self.warmPanels[leagueId]
+            jobs.append(((game["title"], timeFrame, awayHome), partial(panel.set_game, game),
+                            panel.fetch_stats, timeFrame, awayHome))
+        self.loader.warm_up(jobs)
 
 
-    def _league_match(self, panel, session, timeFrame, awayHome, game):
+    def _league_match(self, panel, timeFrame, awayHome, game):
+        self.loader.cancel()
+        self.currentGame = game
         self.currentPanel = panel
         self.currentPanel.set_game(game)
         self.stackedLayout.setCurrentWidget(self.currentPanel)
-        self.set_stats(session, timeFrame, awayHome)
+        self.set_stats(timeFrame, awayHome)
 
 
-    def mlb_match(self, session, timeFrame, awayHome, game):
-        self._league_match(self.mlbPanel, session, timeFrame, awayHome, game)
+    def mlb_match(self, timeFrame, awayHome, game):
+        self._league_match(self.mlbPanel, timeFrame, awayHome, game)
 
 
-    def nba_match(self, session, timeFrame, awayHome, game):
-        self._league_match(self.nbaPanel, session, timeFrame, awayHome, game)
+    def nba_match(self, timeFrame, awayHome, game):
+        self._league_match(self.nbaPanel, timeFrame, awayHome, game)
 
 
-    def nfl_match(self, session, timeFrame, awayHome, game):
-        self._league_match(self.nflPanel, session, timeFrame, awayHome, game)
+    def nfl_match(self, timeFrame, awayHome, game):
+        self._league_match(self.nflPanel, timeFrame, awayHome, game)
         
 
-    def ncaab_match(self, session, timeFrame, awayHome, game):
-        self._league_match(self.ncaabPanel, session, timeFrame, awayHome, game)
+    def ncaab_match(self, timeFrame, awayHome, game):
+        self._league_match(self.ncaabPanel, timeFrame, awayHome, game)
 
 
-    def ncaaf_match(self, session, timeFrame, awayHome, game):
-        self._league_match(self.ncaafPanel, session, timeFrame, awayHome, game)
+    def ncaaf_match(self, timeFrame, awayHome, game):
+        self._league_match(self.ncaafPanel, timeFrame, awayHome, game)
 
 
 if __name__ == "__main__":
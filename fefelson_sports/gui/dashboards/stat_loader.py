@@ -0,0 +1,181 @@
+from collections import OrderedDict, deque
+from time import monotonic
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from ...database.orms.database import get_db_session
+from ...utils.logging_manager import get_logger
+
+# for debugging
+# from pprint import pprint
+
+
+######################################################################
+######################################################################
+
+
+MAX_THREADS = 2
+MAX_CACHED = 64
+# seconds a cached panel is shown before it is read again, the league updates land under it
+MAX_AGE = 600
+
+# requestId of warm-up jobs, never superseded by a click
+WARM_UP = -1
+
+
+######################################################################
+######################################################################
+
+
+class StatSignals(QObject):
+    loaded = Signal(int, object, object)
+    failed = Signal(int, object, str)
+
+
+
+class StatJob(QRunnable):
+    """Runs one panel fetch_stats on a pool thread with its own session"""
+
+    def __init__(self, requestId, key, loader, fetch, timeFrame, awayHome):
+        super().__init__()
+        self.requestId = requestId
+        self.key = key
+        self.loader = loader
+        self.fetch = fetch
+        self.timeFrame = timeFrame
+        self.awayHome = awayHome
+
+
+    def run(self):
+        # superseded while it sat in the queue
+        if self.requestId not in (WARM_UP, self.loader.requestId):
+            return
+
+        try:
+            with get_db_session() as session:
+                data = self.fetch(session, self.timeFrame, self.awayHome)
+        except Exception as e:
+            get_logger().exception(f"stat request {self.key} failed")
+            self.loader.signals.failed.emit(self.requestId, self.key, repr(e))
+            return
+        self.loader.signals.loaded.emit(self.requestId, self.key, data)
+
+
+
+class StatLoader(QObject):
+    """
+    Moves panel stat queries off the GUI thread.
+
+    request() hands a panel's fetch_stats to a QThreadPool worker and the finished
+    data comes back through a queued signal, where only the newest request's
+    apply_stats runs on the GUI thread.  A newer request makes queued jobs skip
+    and any older result that is still running is thrown away when it lands.
+
+    Finished data is kept in an LRU of maxCached keyed by (game, timeframe, split),
+    a cached request younger than maxAge seconds is applied straight away.  warm_up() fills that LRU one game
+    at a time behind whatever the user clicks, never with more than it holds.
+    """
+
+    counted = Signal(int, int)  # hits, misses
+
+    def __init__(self, parent=None, maxThreads=MAX_THREADS, maxCached=MAX_CACHED, maxAge=MAX_AGE):
+        super().__init__(parent)
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(maxThreads)
+        self.signals = StatSignals(self)
+        self.signals.loaded.connect(self._loaded)
+        self.signals.failed.connect(self._failed)
+
+        self.requestId = 0
+        self.apply = None
+
+        self.maxCached = maxCached
+        self.maxAge = maxAge
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.warmQueue = deque()
+        self.warming = False
+
+
+    def _cache(self, key, data):
+        self.cache[key] = (monotonic(), data)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.maxCached:
+            self.cache.popitem(last=False)
+
+
+    def _is_cached(self, key):
+        """key is in the LRU and young enough to show, stale entries are dropped"""
+        if key is None or key not in self.cache:
+            return False
+        if monotonic() - self.cache[key][0] > self.maxAge:
+            del self.cache[key]
+            return False
+        return True
+
+
+    def _loaded(self, requestId, key, data):
+        if requestId == WARM_UP:
+            self._cache(key, data)
+            self._next_warm_up()
+        elif requestId == self.requestId:
+            # an older request may have read a panel that has moved to another game since
+            if key is not None:
+                self._cache(key, data)
+            self.apply(data)
+
+
+    def _failed(self, requestId, key, error):
+        if requestId == WARM_UP:
+            self._next_warm_up()
+        elif requestId == self.requestId:
+            get_logger().warning(f"stats not loaded: {error}")
+
+
+    def _next_warm_up(self):
+        while self.warmQueue:
+            key, prepare, fetch, timeFrame, awayHome = self.warmQueue.popleft()
+            if self._is_cached(key):
+                continue
+            # the panel is only read by this job until it lands
+            prepare()
+            self.pool.start(StatJob(WARM_UP, key, self, fetch, timeFrame, awayHome), -1)
+            self.warming = True
+            return
+        self.warming = False
+        get_logger().debug(f"stat warm up done, {len(self.cache)} cached")
+
+
+    def cancel(self):
+        self.requestId += 1
+
+
+    def request(self, fetch, apply, timeFrame, awayHome, key=None):
+        self.cancel()
+        self.apply = apply
+
+        if self._is_cached(key):
+            self.cache.move_to_end(key)
+            self.hits += 1
+            self.counted.emit(self.hits, self.misses)
+            apply(self.cache[key][1])
+            return self.requestId
+
+        self.misses += 1
+        self.counted.emit(self.hits, self.misses)
+        self.pool.start(StatJob(self.requestId, key, self, fetch, timeFrame, awayHome))
+        return self.requestId
+
+
+    def warm_up(self, jobs):
+        """
+        jobs are (key, prepare, fetch, timeFrame, awayHome), most wanted first; prepare
+        runs on the GUI thread right before its fetch goes to the pool, one job in
+        flight at a time.  Only the first maxCached are kept and they run in reverse,
+        so the most wanted finish last and are the last the LRU gives up.
+        """
+        jobs = list(jobs)[:self.maxCached]
+        self.warmQueue.extend(reversed(jobs))
+        if not self.warming:
+            self._next_warm_up()
@@ -62,13 +62,15 @@ class BullpenPanel(QWidget):
 
 
 
-    def set_stats(self, session, timeFrame, awayHome):
+    def fetch_stats(self, session, timeFrame, awayHome):
         metrics = AnalyticsStore()
-        analytics = {}
-        for metric in ("ip", "w", "l", "sv", "era", "whip", "k9"):
-            analytics[metric] = metrics.get_league_metrics("MLB", timeFrame, awayHome, "bullpen", metric, session)
-
+        analytics = metrics.get_all_league_metrics("MLB", timeFrame, awayHome, "bullpen", session)
         stats = PitcherStore().get_bullpen_stats(self.teamId, timeFrame, awayHome, session)
+        return stats, analytics
+
+
+    def apply_stats(self, data):
+        stats, analytics = data
         if stats:
             self.ip.set_panel(stats["ip"], analytics["ip"])
             self.w.set_panel(stats['w'], analytics["w"])
@@ -152,15 +154,16 @@ class StarterPanel(QWidget):
 
 
 
-    def set_stats(self, session, timeFrame, awayHome):
+    def fetch_stats(self, session, timeFrame, awayHome):
         store = PitcherStore()
         metrics = AnalyticsStore()
-        analytics = {}
-        for metric in ("w", "l", "era", "whip", "k9"):
-            analytics[metric] = metrics.get_league_metrics("MLB", timeFrame, awayHome, "starter", metric, session)
-
+        analytics = metrics.get_all_league_metrics("MLB", timeFrame, awayHome, "starter", session)
         stats = store.get_pitcher_stats(self.pitcherId, timeFrame, awayHome, session)
-        
+        return stats, analytics
+
+
+    def apply_stats(self, data):
+        stats, analytics = data
         if stats:
             self.gs.set_panel(stats["gs"])
             self.ip.set_panel(stats["ip"])
@@ -213,10 +216,17 @@ class PitcherStats(QWidget):
         self.bullpenPanel.set_team(team)
 
 
-    def set_stats(self, session, timeFrame, awayHome):
+    def fetch_stats(self, session, timeFrame, awayHome):
         awayHome = self.awayHome if awayHome == "away_home" else awayHome
-        self.starterPanel.set_stats(session, timeFrame, awayHome)
-        self.bullpenPanel.set_stats(session, timeFrame, awayHome)
+        return {
+            "starter": self.starterPanel.fetch_stats(session, timeFrame, awayHome),
+            "bullpen": self.bullpenPanel.fetch_stats(session, timeFrame, awayHome)
+        }
+
+
+    def apply_stats(self, data):
+        self.starterPanel.apply_stats(data["starter"])
+        self.bullpenPanel.apply_stats(data["bullpen"])
         
         
 
@@ -77,15 +77,20 @@ class BaseballTeamStats(QScrollArea):
         self.lineup.set_lineup(team["lineup"])
 
 
-    def set_stats(self, session, timeFrame, awayHome):
+    def fetch_stats(self, session, timeFrame, awayHome):
         awayHome = self.awayHome if awayHome == "away_home" else awayHome
-        self.lineup.set_stats(session, timeFrame, awayHome)
+        lineup = self.lineup.fetch_stats(session, timeFrame, awayHome)
 
         metrics = AnalyticsStore()
-        analytics = {}
-        for metric in ("r", "h", "hr", "sb", "lob", "avg", "obp", "slg", "errors"):
-            analytics[metric] = metrics.get_league_metrics("MLB", timeFrame, awayHome, "team", metric, session)
+        analytics = metrics.get_all_league_metrics("MLB", timeFrame, awayHome, "team", session)
         stats = TeamStatStore().get_team_stats(self.teamId, timeFrame, awayHome, session)
+        return {"lineup": lineup, "stats": stats, "analytics": analytics}
+
+
+    def apply_stats(self, data):
+        self.lineup.apply_stats(data["lineup"])
+
+        stats, analytics = data["stats"], data["analytics"]
         if stats:
             self.r.set_panel(stats['r'], analytics['r'])
             self.h.set_panel(stats['h'], analytics['h'])
@@ -152,13 +157,16 @@ class BatterArea(QWidget):
         self.name.setText(f"{batter[1]} {batter[3]}   {batter[2]}")
 
 
-    def set_stats(self, session, timeFrame, awayHome):
+    def fetch_stats(self, session, timeFrame, awayHome):
         store = BatterStore()
         metrics = AnalyticsStore()
-        analytics = {}
-        for metric in ("r", "hr", "rbi", "sb", "avg", "obp", "slg"):
-            analytics[metric] = metrics.get_league_metrics("MLB", timeFrame, awayHome, "player", metric, session)
+        analytics = metrics.get_all_league_metrics("MLB", timeFrame, awayHome, "player", session)
         stats = store.get_batter_stats(self.batterId, timeFrame, awayHome, session)
+        return stats, analytics
+
+
+    def apply_stats(self, data):
+        stats, analytics = data
         if stats:
             self.ab.set_panel(stats["ab"])
             self.r.set_panel(stats['r'], analytics['r'])
@@ -207,9 +215,13 @@ class BattingOrderArea(QWidget):
                 batter.set_batter(player)
 
 
-    def set_stats(self, session, timeFrame, awayHome):
-        for batter in self.batters:
-            batter.set_stats(session, timeFrame, awayHome)
+    def fetch_stats(self, session, timeFrame, awayHome):
+        return [batter.fetch_stats(session, timeFrame, awayHome) for batter in self.batters]
+
+
+    def apply_stats(self, data):
+        for batter, batterData in zip(self.batters, data):
+            batter.apply_stats(batterData)
 
 
     def clear_lineup(self):
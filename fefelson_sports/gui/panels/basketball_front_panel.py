@@ -137,25 +137,26 @@ class BasketballFrontPanel(QScrollArea):
 
 
 
-    def set_stats(self, session, timeFrame, awayHome):
-        self.clear()
+    def fetch_stats(self, session, timeFrame, awayHome):
         store = TeamStatStore()
         metrics = AnalyticsStore()
-        analytics = {}
         awayHome = awayHome if awayHome == "all" else self.awayHome
-        
+        return {
+            "b2b": store.get_b2b(self.teamId, session),
+            "analytics": metrics.get_all_league_metrics(self.leagueId, timeFrame, awayHome, "team", session),
+            "stats": store.get_team_stats(self.teamId, timeFrame, awayHome, session),
+            "opps": GameStore().get_opps(timeFrame, awayHome, self.teamId, session)
+        }
+
+
+    def apply_stats(self, data):
+        self.clear()
+        stats, analytics = data["stats"], data["analytics"]
+
         self.tags["b2b"].hide()
-        if store.get_b2b(self.teamId, session):
+        if data["b2b"]:
             self.tags["b2b"].show()
         
-        for key in ("eff", "2p_pct", "ft_poss", "3p_pct","3pm_pct", "pts_in_pt_pct",
-                    "ast_pct", "turn_pct", "reb_pct", '2_or_3', "fb_pct", "clutch_ts"):
-            for def_off in ("def", "off"):
-                metric = f"{def_off}_{key}"
-                analytics[metric] = metrics.get_league_metrics(self.leagueId, timeFrame, awayHome, "team", metric, session)
-        analytics["pace"] = metrics.get_league_metrics(self.leagueId, timeFrame, awayHome, "team", "pace", session)
-        
-        stats = store.get_team_stats(self.teamId, timeFrame, awayHome, session)
         if stats:
             self.tags["off"]["pace"].set_panel(stats["pace"], analytics["pace"])
             self.tags["off"]["2_or_3"].set_panel(stats["off_2_or_3"], analytics["off_2_or_3"])
@@ -180,7 +181,7 @@ class BasketballFrontPanel(QScrollArea):
             self.fbChart.set_panel_value("fb_pct", stats, analytics)
             self.clutchChart.set_panel_value("clutch_ts", stats, analytics)
 
-        opps = GameStore().get_opps(timeFrame, awayHome, self.teamId, session)
+        opps = data["opps"]
         # Create a new widget for the scroll area
         scrollPanel = QWidget()
         scrollLayout = QVBoxLayout()
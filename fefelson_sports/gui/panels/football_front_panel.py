@@ -169,24 +169,21 @@ class FootballFrontPanel(QScrollArea):
         self.returnChart.clear()
 
 
-    def set_stats(self, session, timeFrame, awayHome):
-        self.clear()
+    def fetch_stats(self, session, timeFrame, awayHome):
         store = TeamStatStore()
         metrics = AnalyticsStore()
-        analytics = {}
         awayHome = awayHome if awayHome == "all" else self.awayHome
-        for key in ("pts", "comp_pct", "yards_per_comp", "yards_per_car", "third_pct", "fourth_pct",
-                    "rush_yards", "pass_yards", "turns", "penalty_yards", "sack_yds_lost", "pass_pct", "return_yds", "go_pct"):
-            for def_off in ("def", "off"):
-                metric = f"{def_off}_{key}"
-                analytics[metric] = metrics.get_league_metrics(self.leagueId, timeFrame, awayHome, "team", metric, session)
-
-        analytics["def_pass_rush"] = metrics.get_league_metrics(self.leagueId, timeFrame, awayHome, "team", "def_pass_rush", session)
-        analytics["def_pass_cover"] = metrics.get_league_metrics(self.leagueId, timeFrame, awayHome, "team", "def_pass_cover", session)
-        analytics["off_pass_protect"] = metrics.get_league_metrics(self.leagueId, timeFrame, awayHome, "team", "off_pass_protect", session)
-        
-        
-        stats = store.get_team_stats(self.teamId, timeFrame, awayHome, session)
+        return {
+            "analytics": metrics.get_all_league_metrics(self.leagueId, timeFrame, awayHome, "team", session),
+            "stats": store.get_team_stats(self.teamId, timeFrame, awayHome, session),
+            "opps": GameStore().get_opps(timeFrame, awayHome, self.teamId, session)
+        }
+
+
+    def apply_stats(self, data):
+        self.clear()
+        stats, analytics = data["stats"], data["analytics"]
+
         if stats:
             self.tags["off"]["play_calling"].set_panel(stats["off_pass_pct"], analytics["off_pass_pct"])
             self.tags["off"]["pass_protect"].set_panel(stats["off_pass_protect"], analytics["off_pass_protect"])
@@ -214,7 +211,7 @@ class FootballFrontPanel(QScrollArea):
             self.sackChart.set_panel_value("sack_yds_lost", stats, analytics)
             self.returnChart.set_panel_value("return_yds", stats, analytics)
 
-        opps = GameStore().get_opps(timeFrame, awayHome, self.teamId, session)
+        opps = data["opps"]
         # Create a new widget for the scroll area
         scrollPanel = QWidget()
         scrollLayout = QVBoxLayout()
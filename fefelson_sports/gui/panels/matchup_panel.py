@@ -50,11 +50,17 @@ class TopPanel(QWidget):
             self.teamNames[a_h].set_team(game["teams"][a_h])
 
 
-    def set_stats(self, session, timeFrame, awayHome):
+    def fetch_stats(self, session, timeFrame, awayHome):
+        records = {}
         for a_h in ("away", "home"):
             awayHome = a_h if awayHome != "all" else awayHome
-            stats =  GameStore().get_record(self.game[f"{a_h}Id"], timeFrame, awayHome, session)
-            
+            records[a_h] = GameStore().get_record(self.game[f"{a_h}Id"], timeFrame, awayHome, session)
+        return records
+
+
+    def apply_stats(self, records):
+        for a_h in ("away", "home"):
+            stats = records[a_h]
             self.records[a_h].setText(f"{stats['wins']} - {stats['loses']}")
 
 
@@ -89,8 +95,13 @@ class MatchupPanel(QWidget):
         self.topPanel.set_game(game)
         
 
-    def set_stats(self, session, timeFrame, awayHome):
-        self.topPanel.set_stats(session, timeFrame, awayHome)
+    def fetch_stats(self, session, timeFrame, awayHome):
+        """Runs on a loader thread, queries only, no widgets"""
+        return {"top": self.topPanel.fetch_stats(session, timeFrame, awayHome)}
+
+
+    def apply_stats(self, data):
+        self.topPanel.apply_stats(data["top"])
 
         
 
@@ -26,9 +26,16 @@ class FrontPanel(QWidget):
         self.teamStats.set_team(awayHome, team)
 
 
-    def set_stats(self, session, timeFrame, awayHome):
-        self.pitcherStats.set_stats(session, timeFrame, awayHome)
-        self.teamStats.set_stats(session, timeFrame, awayHome)
+    def fetch_stats(self, session, timeFrame, awayHome):
+        return {
+            "pitcher": self.pitcherStats.fetch_stats(session, timeFrame, awayHome),
+            "team": self.teamStats.fetch_stats(session, timeFrame, awayHome)
+        }
+
+
+    def apply_stats(self, data):
+        self.pitcherStats.apply_stats(data["pitcher"])
+        self.teamStats.apply_stats(data["team"])
         
 
 
@@ -63,9 +70,16 @@ class MLBPanel(MatchupPanel):
 
 
 
-    def set_stats(self, session, timeFrame, awayHome):
-        super().set_stats(session, timeFrame, awayHome)
+    def fetch_stats(self, session, timeFrame, awayHome):
+        data = super().fetch_stats(session, timeFrame, awayHome)
+        for a_h in ("away", "home"):
+            data[a_h] = self.frontPanel[a_h].fetch_stats(session, timeFrame, awayHome)
+        return data
+
+
+    def apply_stats(self, data):
+        super().apply_stats(data)
         for a_h in ("away", "home"):
-            self.frontPanel[a_h].set_stats(session, timeFrame, awayHome)
+            self.frontPanel[a_h].apply_stats(data[a_h])
         
 
@@ -31,9 +31,16 @@ class NBAPanel(MatchupPanel):
 
 
 
-    def set_stats(self, session, timeFrame, awayHome):
-        super().set_stats(session, timeFrame, awayHome)
+    def fetch_stats(self, session, timeFrame, awayHome):
+        data = super().fetch_stats(session, timeFrame, awayHome)
         for a_h in ("away", "home"):
-            self.frontPanel[a_h].set_stats(session, timeFrame, awayHome)
+            data[a_h] = self.frontPanel[a_h].fetch_stats(session, timeFrame, awayHome)
+        return data
+
+
+    def apply_stats(self, data):
+        super().apply_stats(data)
+        for a_h in ("away", "home"):
+            self.frontPanel[a_h].apply_stats(data[a_h])
         
 
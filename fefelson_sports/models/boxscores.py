@@ -36,35 +36,41 @@ class Boxscore():
         return normalAgent.normalize_boxscore(webData)
 
 
-    def process(self, game: dict, session = None) -> dict:
-        # pprint(game)
-
+    def prepare(self, game: dict, session = None, replay: bool = False) -> dict:
+        """
+        Database checks for a final game, returns the boxscore skeleton or None.
+        With replay a game already in the database is prepared again
+        """
         gameId = self.gameStore.create_gameId(self.leagueId, game["homeId"], game["gameTime"])
         if (game["gameType"] in ("preseason", "spring training", "all-star") 
             or game["status"] in ("postponed",)
             or int(game["homeId"]) == -1 or int(game["awayId"]) == -1
-            or self.gameStore.get_by_id(gameId, session)):
+            or (not replay and self.gameStore.get_by_id(gameId, session))):
             return None 
 
-        get_logger().debug(f"processing Boxscore {game['title']}")
-        
         boxScores = {}        
         boxScores["game_id"] = gameId
         boxScores["home_id"] = game["homeId"]
         boxScores["away_id"] = game["awayId"]
-        
-        for provider, url in game["urls"].items():
-            webData = self.download(provider, url)
-            boxScores[provider] = self.normalize(webData)
         return boxScores
- 
-
 
 
+    def fetch(self, game: dict, boxScores: dict) -> dict:
+        """
+        Download and normalize every provider page, safe to run off the writer thread
+        """
+        get_logger().debug(f"processing Boxscore {game['title']}")
 
-       
-          
+        for provider, url in game["urls"].items():
+            webData = self.download(provider, url)
+            boxScores[provider] = self.normalize(webData)
+        return boxScores
 
 
+    def process(self, game: dict, session = None) -> dict:
+        # pprint(game)
 
-    
+        boxScores = self.prepare(game, session)
+        if boxScores is None:
+            return None
+        return self.fetch(game, boxScores)
@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from .boxscores import Boxscore
 from .matchups import Matchup
 from .schedules import DailySchedule, WeeklySchedule
@@ -6,6 +8,7 @@ from .scoreboards import Scoreboard
 from ..analytics import MLBAnalytics, NBAAnalytics, NCAABAnalytics, NCAAFAnalytics, NFLAnalytics
 from ..database.agents import MLBAlchemy, NBAAlchemy, NCAABAlchemy, NCAAFAlchemy, NFLAlchemy
 from ..database.orms.database import get_db_session
+from ..database.stores.snapshots import SnapshotStore
 from ..utils.logging_manager import get_logger
 
 # for debugging
@@ -14,6 +17,13 @@ from pprint import pprint
 ################################################################################
 ################################################################################
 
+
+BOXSCORE_WORKERS = 8
+
+
+################################################################################
+################################################################################
+
  
 class League:
 
@@ -28,32 +38,43 @@ class League:
         self.matchup = Matchup(leagueId) 
         self.schedule = schedule(leagueId)
         self.scoreboard = Scoreboard(leagueId)
+        self.snapshots = SnapshotStore()
 
 
 
-    def process_game_date(self, gameDate: str):
+    def process_game_date(self, gameDate: str, replay: bool = False):
         get_logger().info(f"{self.leagueId} processing {gameDate}")
     
         with get_db_session() as session:
-            for game in self.scoreboard.process(gameDate).values():
-                if game["status"] == "pregame":
-                    self.matchup.process(game, session)
-                elif game["status"] == "final":
-                    bScore = self.boxscore.process(game, session)
-                    if bScore:
-                        self.dbAgent.insert_boxscore(bScore, session)
+            with ThreadPoolExecutor(max_workers=BOXSCORE_WORKERS, thread_name_prefix=self.leagueId) as pool:
+                pending = []
+                gameIds = set()
+                for game in self.scoreboard.process(gameDate).values():
+                    if game["status"] == "pregame":
+                        self.matchup.process(game, session)
+                    elif game["status"] == "final":
+                        bScore = self.boxscore.prepare(game, session, replay)
+                        if bScore and bScore["game_id"] not in gameIds:
+                            gameIds.add(bScore["game_id"])
+                            pending.append(pool.submit(self.boxscore.fetch, game, bScore))
+
+                # single writer, scoreboard order, one transaction for the date
+                for future in pending:
+                    self.dbAgent.insert_boxscore(future.result(), session, replace=replay)
         
                             
     def update(self):
         if self.schedule.is_active():
+            newGames = False
             if not self.schedule.is_up_to_date():
+                newGames = True
                 get_logger().info(f"Updating {self.leagueId}") 
                 for gameDate in self.schedule.get_back_dates():
                     self.process_game_date(gameDate)
                     self.schedule.current_until(gameDate)
                     get_logger().info(f"{self.leagueId} current up until {gameDate}")
 
-                self.analytics.scheduled_analytics()    
+                self.analytics.scheduled_analytics(incremental=True)    
 
             for gameDate in self.schedule.get_future_dates(2):
                 self.process_game_date(gameDate)
@@ -61,9 +82,29 @@ class League:
             
             self.matchup.clean_files()
 
+            # the dashboard panels read these instead of querying per click
+            with get_db_session() as session:
+                if newGames or not self.snapshots.is_current(self.leagueId, session):
+                    self.snapshots.refresh(self.leagueId, session)
+
             get_logger().debug(f"{self.leagueId} is up to date")
 
 
+    def replay(self, startDate, endDate):
+        """
+        Re-normalizes every game date from startDate to endDate, meant to run in
+        replay mode so the pages come from the raw archive.  Games already in the
+        database are written over, then analytics are rebuilt
+        """
+        for gameDate in self.schedule.get_dates_between(startDate, endDate):
+            self.process_game_date(gameDate, replay=True)
+            get_logger().info(f"{self.leagueId} replayed {gameDate}")
+
+        self.analytics.scheduled_analytics()
+        with get_db_session() as session:
+            self.snapshots.refresh(self.leagueId, session)
+
+
 
 ####################################################################
 ####################################################################
@@ -1,12 +1,13 @@
 from collections import defaultdict
 from copy import deepcopy
 from datetime import date, datetime, timedelta
-from os import environ, remove, listdir
+from os import environ
 from os.path import exists
 from pytz import timezone
 
 from ..database.stores.base import ProviderStore
 from ..database.stores.core import TeamStore, PlayerStore
+from ..database.stores.matchup import MatchupIndex
 from ..providers import get_download_agent, get_normal_agent
 from ..utils.file_agent import JSONAgent
 from ..utils.logging_manager import get_logger
@@ -63,18 +64,16 @@ class Matchup:
         self.providerStore = ProviderStore()
         self.teamStore = TeamStore()
         self.playerStore = PlayerStore()
+        self.index = MatchupIndex(BASE_PATH)
 
 
     def _write(self, filePath, matchup):
-        JSONAgent.write(filePath, matchup)
+        self.index.write(matchup, filePath)
 
 
     def clean_files(self):
-        for filePath in [f"{BASE_PATH}/{fileName}" for fileName in listdir(f"{BASE_PATH}")]:
-            data = JSONAgent.read(filePath)
-            data["gameTime"] = datetime.fromisoformat(data["gameTime"])
-            if data["leagueId"] == self.leagueId and data["gameTime"].date() < date.today():
-                remove(filePath)
+        removed = self.index.remove_before(self.leagueId, date.today())
+        get_logger().debug(f"{self.leagueId} removed {removed} old matchups")
 
 
     def download(self, provider: str, url: str) -> dict:
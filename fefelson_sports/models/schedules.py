@@ -31,6 +31,10 @@ class Schedule:
         raise NotImplementedError
 
 
+    def get_dates_between(self, startDate, endDate):
+        raise NotImplementedError
+
+
 
     def get_future_dates(self, nGD):
         raise NotImplementedError
@@ -69,6 +73,15 @@ class DailySchedule(Schedule):
         return backDates
 
 
+    def get_dates_between(self, startDate, endDate):
+        gameDates = []
+        gameDate = startDate
+        while gameDate <= endDate:
+            gameDates.append(str(gameDate))
+            gameDate += timedelta(1)
+        return gameDates
+
+
     def get_future_dates(self, nGD):
         futureDates = []
         gameDate = today 
@@ -140,6 +153,14 @@ class WeeklySchedule(Schedule):
         return backDates
 
 
+    def get_dates_between(self, startDate, endDate):
+        # every week of the current season that overlaps the range
+        season = self.leagueStore.get_current_season(self.leagueId)
+        weeks = sorted(self.leagueStore.get_weeks(self.leagueId), key=lambda x: x["week_num"])
+        return [f"{season}_{week['week_num']}" for week in weeks 
+                    if week["start_date"] <= endDate and week["end_date"] >= startDate]
+
+
     def get_future_dates(self, nGD):
         season = self.leagueStore.get_current_season(self.leagueId)
         gameWeek = self._get_week(today)
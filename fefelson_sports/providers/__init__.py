@@ -1,5 +1,6 @@
 from typing import Optional
 
+from .page_archive import ReplayFetcher
 from .espn.espn_downloader import ESPNDownloadAgent, ESPNNCAAFDownloadAgent, ESPNNCAABDownloadAgent, ESPNNFLDownloadAgent
 from .espn.normalizers.espn_mlb_normalizer import ESPNMLBNormalizer
 from .espn.normalizers.espn_basketball_normalizer import ESPNBasketballNormalizer
@@ -14,6 +15,13 @@ from .yahoo.normalizers.yahoo_ncaaf_normalizer import YahooNCAAFNormalizer
 
 
 default_provider = "yahoo"
+replay_mode = False
+
+
+def set_replay_mode(replay: bool = True) -> None:
+    """Make get_download_agent serve pages from the raw archive instead of the network."""
+    global replay_mode
+    replay_mode = replay
 
 
 def get_normal_agent(leagueId: str, provider: Optional[str]=None) -> "NormalAgent":
@@ -35,11 +43,13 @@ def get_normal_agent(leagueId: str, provider: Optional[str]=None) -> "NormalAgen
 
 
 
-def get_download_agent(leagueId: str, provider: Optional[str]=None) -> "DownloadAgent":
+def get_download_agent(leagueId: str, provider: Optional[str]=None, replay: Optional[bool]=None) -> "DownloadAgent":
     if not provider:
         provider = default_provider
+    if replay is None:
+        replay = replay_mode
     
-    return {"yahoo": {"NBA": YahooNBADownloadAgent,
+    agent = {"yahoo": {"NBA": YahooNBADownloadAgent,
                       "NCAAB": YahooNCAABDownloadAgent,
                       "NFL": YahooNFLDownloadAgent,
                       "NCAAF": YahooNCAAFDownloadAgent,
@@ -51,4 +61,8 @@ def get_download_agent(leagueId: str, provider: Optional[str]=None) -> "Download
                       "NCAAF": ESPNNCAAFDownloadAgent,
                       "MLB": ESPNDownloadAgent}
 
-            }[provider][leagueId](leagueId)
\ No newline at end of file
+            }[provider][leagueId](leagueId)
+
+    if replay:
+        agent.fetcher = ReplayFetcher(provider, leagueId)
+    return agent
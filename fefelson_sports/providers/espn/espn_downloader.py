@@ -1,11 +1,10 @@
-from typing import Any, Dict
-from urllib.error import HTTPError, URLError
-from urllib.request import urlopen
+from typing import Any, Dict, Iterable, Optional
 
 import json
 import re 
 from time import sleep
 
+from ..page_archive import ArchivedFetcher
 from ...utils.logging_manager import get_logger
 
 # for debugging
@@ -32,27 +31,51 @@ class ESPNDownloadAgent:
 
     def __init__(self, leagueId):
         self.leagueId = leagueId
+        self.fetcher = ArchivedFetcher("espn", leagueId)
 
    
-    def _fetch_url(self, url: str, sleepTime: int = 10, attempts: int = 3) -> Dict[str, Any]:
+    def _parse_page(self, url: str, page: Optional[str]) -> Dict[str, Any]:
         """
-        Recursive function to download yahoo url and isolate json
-        Or write to errorFile
+        Isolate the espnfitt json from a downloaded page
         """
         item = {}
+        if page is None:
+            return item
         try:
-            html = urlopen(url)
-            for line in [x.decode("utf-8") for x in html.readlines()]:
+            for line in page.split("\n"):
                 if "window['__CONFIG__']=" in line:
                     item = json.loads("".join(line.split("window['__espnfitt__']=")[1].split(";</script>")[:-1]))
-        
-        except (URLError, HTTPError, ValueError) as e:
-            #logger.error(e)
-            # time.sleep(sleepTime)
+        except (IndexError, ValueError) as e:
             if 'odds' not in url:
                 get_logger().error(f"{url} {e}")
         return item
-    
+
+
+    def _fetch_url(self, url: str, sleepTime: int = 10, attempts: int = 3) -> Dict[str, Any]:
+        """
+        Download espn url and isolate json
+        Or write to errorFile
+        """
+        return self._parse_page(url, self.fetcher.fetch(url))
+
+
+    def _fetch_urls(self, urls: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Download every url concurrently and isolate the json from each
+        """
+        pages = self.fetcher.fetch_many(urls)
+        return {url: self._parse_page(url, page) for url, page in pages.items()}
+
+
+    def _boxscore_urls(self, url: str) -> Dict[str, str]:
+        if BASE_URL not in url:
+            url = f"{BASE_URL}{url}"
+
+        return {"gameData": url,
+                "pbpData": re.sub("game", "playbyplay", url, 1),
+                "boxData": re.sub("game", "boxscore", url, 1),
+                "matchData": re.sub("game", "matchup", url, 1)}
+
 
     def fetch_scoreboard(self, gameDate: str) -> dict:
         url = f"{BASE_URL}/{espnSlugs[self.leagueId]}/scoreboard"
@@ -67,30 +90,42 @@ class ESPNDownloadAgent:
     
 
     def fetch_boxscore(self, url: str) -> dict:
-        if BASE_URL not in url:
-            url = f"{BASE_URL}{url}"
-        
-        pbpUrl = re.sub("game", "playbyplay", url, 1)
-        boxUrl = re.sub("game", "boxscore", url, 1)
-        matchUrl = re.sub("game", "matchup", url, 1)
-        game = self._fetch_url(url)["page"]["content"]["gamepackage"]
-        pbp = self._fetch_url(pbpUrl)["page"]["content"]["gamepackage"]
-        box = self._fetch_url(boxUrl)["page"]["content"]["gamepackage"]
-        match = self._fetch_url(matchUrl)["page"]["content"]["gamepackage"]
-        data = {"boxData":box, "pbpData":pbp, "gameData":game, "matchData":match, "provider":"espn"}
+        pageUrls = self._boxscore_urls(url)
+        pages = self._fetch_urls(pageUrls.values())
 
+        data = {key: pages[pageUrl]["page"]["content"]["gamepackage"] for key, pageUrl in pageUrls.items()}
+        data["provider"] = "espn"
         return data
 
 
+    def fetch_boxscores(self, urls: Iterable[str]) -> Dict[str, Optional[dict]]:
+        """
+        Fetch every page for many games at once, {url: boxscore or None}
+        """
+        gameUrls = {url: self._boxscore_urls(url) for url in urls}
+        pages = self._fetch_urls(pageUrl for pageUrls in gameUrls.values() for pageUrl in pageUrls.values())
+
+        boxscores = {}
+        for url, pageUrls in gameUrls.items():
+            try:
+                data = {key: pages[pageUrl]["page"]["content"]["gamepackage"] for key, pageUrl in pageUrls.items()}
+                data["provider"] = "espn"
+            except KeyError:
+                data = None
+            boxscores[url] = data
+        return boxscores
+
+
     def fetch_matchup(self, url: str) -> dict:
         if BASE_URL not in url:
             url = f"{BASE_URL}{url}"
         
         oddsUrl = re.sub("game", "odds", url, 1)
+        pages = self._fetch_urls((url, oddsUrl))
 
-        game = self._fetch_url(url)["page"]["content"]["gamepackage"]
+        game = pages[url]["page"]["content"]["gamepackage"]
         try:
-            odds = self._fetch_url(oddsUrl)["page"]["content"]["gamepackage"]
+            odds = pages[oddsUrl]["page"]["content"]["gamepackage"]
         except:
             odds = None
     
@@ -0,0 +1,131 @@
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.client import HTTPException
+from threading import BoundedSemaphore, Lock
+from time import sleep
+from typing import Callable, Dict, Iterable, Optional
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlparse
+from urllib.request import urlopen
+
+from ..utils.logging_manager import get_logger
+
+# for debugging
+# from pprint import pprint
+
+
+######################################################################
+######################################################################
+
+
+MAX_WORKERS = 16
+PER_HOST = 4
+TIMEOUT = 30
+
+# tries per url and the first pause between them, doubled after every retry
+ATTEMPTS = 3
+BACKOFF = 1
+
+
+######################################################################
+######################################################################
+
+
+class FetchEngine:
+    """
+    Bounded thread-pool for pulling raw pages off the provider sites.
+
+    Every request holds a per-host semaphore while it is on the wire so a
+    backfill can queue hundreds of pages without opening more than
+    `perHost` sockets to any one site.  Timeouts, dropped connections, cut off
+    bodies and 5xx/429 answers are retried with backoff, outside the semaphore.
+    """
+
+    def __init__(self, maxWorkers: int = MAX_WORKERS, perHost: int = PER_HOST, timeout: int = TIMEOUT, 
+                    attempts: int = ATTEMPTS, backoff: float = BACKOFF):
+        self.perHost = perHost
+        self.timeout = timeout
+        self.attempts = attempts
+        self.backoff = backoff
+        self._executor = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix="fetch")
+        self._hostLock = Lock()
+        self._hostLimits = defaultdict(lambda: BoundedSemaphore(self.perHost))
+
+
+    def _host_limit(self, url: str) -> BoundedSemaphore:
+        with self._hostLock:
+            return self._hostLimits[urlparse(url).netloc]
+
+
+    def set_host_limit(self, host: str, limit: "Semaphore"):
+        """
+        Replace the limit for one host, e.g. with a semaphore shared between processes
+        """
+        with self._hostLock:
+            self._hostLimits[host] = limit
+
+
+    def read(self, url: str) -> str:
+        """
+        Blocking fetch of a single url, raises on network errors once the attempts run out
+        """
+        for attempt in range(1, self.attempts + 1):
+            try:
+                with self._host_limit(url):
+                    with urlopen(url, timeout=self.timeout) as html:
+                        return html.read().decode("utf-8")
+            except HTTPError as e:
+                # a 404 won't change on a second try
+                if (e.code < 500 and e.code != 429) or attempt == self.attempts:
+                    raise
+                error = e
+            except (URLError, TimeoutError, ConnectionError, HTTPException) as e:
+                if attempt == self.attempts:
+                    raise
+                error = e
+            get_logger().debug(f"{url} {error}, retry {attempt}")
+            sleep(self.backoff * 2 ** (attempt - 1))
+
+
+    def fetch(self, url: str) -> Optional[str]:
+        """
+        Blocking fetch of a single url, returns the decoded page or None
+        """
+        try:
+            return self.read(url)
+        except (OSError, HTTPException, ValueError) as e:
+            if 'odds' not in url:
+                get_logger().error(f"{url} {e}")
+        return None
+
+
+    def submit(self, url: str, fetch: Optional[Callable[[str], Optional[str]]] = None) -> Future:
+        return self._executor.submit(fetch or self.fetch, url)
+
+
+    def fetch_many(self, urls: Iterable[str], fetch: Optional[Callable[[str], Optional[str]]] = None) -> Dict[str, Optional[str]]:
+        """
+        Fetches every url at once and returns {url: page} once all are in
+        """
+        futures = {url: self.submit(url, fetch) for url in dict.fromkeys(urls)}
+        return {url: future.result() for url, future in futures.items()}
+
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+######################################################################
+######################################################################
+
+
+_engine = None
+_engineLock = Lock()
+
+
+def get_fetch_engine() -> FetchEngine:
+    global _engine
+    with _engineLock:
+        if _engine is None:
+            _engine = FetchEngine()
+    return _engine
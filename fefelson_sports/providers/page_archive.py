@@ -0,0 +1,166 @@
+from hashlib import sha1, sha256
+from http.client import HTTPException
+from os import environ, makedirs, path, remove, replace, utime, walk
+from time import time
+from typing import Dict, Iterable, Optional
+from urllib.error import URLError
+import gzip
+import tempfile
+
+from .fetch_engine import get_fetch_engine
+from ..utils.logging_manager import get_logger
+
+# for debugging
+# from pprint import pprint
+
+
+######################################################################
+######################################################################
+
+
+BASE_PATH = f"{environ['HOME']}/FEFelson/FEFelson_Sports/archive"
+
+# days an object no ref points to is kept, polled pages get a new body every tick
+MAX_AGE = 7
+
+
+######################################################################
+######################################################################
+
+
+class PageArchive:
+    """
+    Content-addressed store of raw provider pages.
+
+    Pages are gzipped once under objects/ by the sha256 of their body, and
+    refs/<provider>/<league>/ maps each url to the newest body seen for it.
+    Every write is a rename so parallel leagues and workers never see a
+    partial file.
+    """
+
+    def __init__(self, provider: str, leagueId: str, basePath: str = BASE_PATH):
+        self.provider = provider
+        self.leagueId = leagueId
+        self.basePath = basePath
+
+
+    def _object_path(self, digest: str) -> str:
+        return path.join(self.basePath, "objects", digest[:2], f"{digest}.gz")
+
+
+    def _ref_path(self, url: str) -> str:
+        return path.join(self.basePath, "refs", self.provider, self.leagueId, f"{sha1(url.encode()).hexdigest()}.txt")
+
+
+    def _atomic_write(self, filePath: str, data: bytes):
+        makedirs(path.dirname(filePath), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path.dirname(filePath), delete=False) as fileOut:
+            fileOut.write(data)
+        replace(fileOut.name, filePath)
+
+
+    def get(self, url: str) -> Optional[str]:
+        try:
+            with open(self._ref_path(url)) as fileIn:
+                digest = fileIn.readline().strip()
+            with gzip.open(self._object_path(digest), "rb") as fileIn:
+                return fileIn.read().decode("utf-8")
+        except FileNotFoundError:
+            return None
+
+
+    def put(self, url: str, page: str) -> str:
+        body = page.encode("utf-8")
+        digest = sha256(body).hexdigest()
+        objectPath = self._object_path(digest)
+        if path.exists(objectPath):
+            # refreshed so a prune running right now sees it as new
+            utime(objectPath)
+        else:
+            self._atomic_write(objectPath, gzip.compress(body))
+        self._atomic_write(self._ref_path(url), f"{digest}\n{url}\n".encode("utf-8"))
+        return digest
+
+
+def prune_archive(maxAge: int = MAX_AGE, basePath: str = BASE_PATH) -> int:
+    """
+    Deletes the objects that no ref points to once they are maxAge days old,
+    returns how many were deleted
+    """
+    kept = set()
+    for dirPath, _, fileNames in walk(path.join(basePath, "refs")):
+        for fileName in fileNames:
+            try:
+                with open(path.join(dirPath, fileName)) as fileIn:
+                    kept.add(fileIn.readline().strip())
+            except FileNotFoundError:
+                continue
+
+    cutoff = time() - maxAge * 86400
+    pruned = 0
+    for dirPath, _, fileNames in walk(path.join(basePath, "objects")):
+        for fileName in fileNames:
+            if fileName[:-len(".gz")] in kept:
+                continue
+            filePath = path.join(dirPath, fileName)
+            try:
+                if path.getmtime(filePath) < cutoff:
+                    remove(filePath)
+                    pruned += 1
+            except FileNotFoundError:
+                continue
+    get_logger().info(f"archive pruned {pruned} objects")
+    return pruned
+
+
+######################################################################
+######################################################################
+
+
+class ArchivedFetcher:
+    """
+    Reads pages through the shared FetchEngine and keeps a copy of each in the archive
+    """
+
+    def __init__(self, provider: str, leagueId: str):
+        self.archive = PageArchive(provider, leagueId)
+        self.engine = get_fetch_engine()
+
+
+    def read(self, url: str) -> str:
+        page = self.engine.read(url)
+        try:
+            self.archive.put(url, page)
+        except OSError as e:
+            # a full disk costs the copy, not the update
+            get_logger().warning(f"not archived {url} {e}")
+        return page
+
+
+    def fetch(self, url: str) -> Optional[str]:
+        try:
+            return self.read(url)
+        except (OSError, HTTPException, ValueError) as e:
+            if 'odds' not in url:
+                get_logger().error(f"{url} {e}")
+        return None
+
+
+    def fetch_many(self, urls: Iterable[str]) -> Dict[str, Optional[str]]:
+        return self.engine.fetch_many(urls, self.fetch)
+
+
+######################################################################
+######################################################################
+
+
+class ReplayFetcher(ArchivedFetcher):
+    """
+    Serves pages from the archive only, a missing page reads like a failed request
+    """
+
+    def read(self, url: str) -> str:
+        page = self.archive.get(url)
+        if page is None:
+            raise URLError(f"not archived for {self.archive.provider} {self.archive.leagueId}")
+        return page
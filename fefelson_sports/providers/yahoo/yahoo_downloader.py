@@ -1,11 +1,12 @@
 from copy import deepcopy
 from re import sub 
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Union
 from urllib.error import HTTPError, URLError
-from urllib.request import urlopen
 
+from time import sleep
 import json
 
+from ..page_archive import ArchivedFetcher
 #from ...utils.logging_manager import get_logger
 
 # for debugging
@@ -23,29 +24,46 @@ yahooSlugs = {"NBA": "nba", "NCAAB": "college-basketball", "MLB": "mlb",
                 "NCAAF": "college-football", "NFL": "nfl"}
 
 
-def find_closing_bracket(s, start=0):
-        if s[start] != '{':
-            return -1
-        count = 1
-        for i in range(start + 1, len(s)):
-            if s[i] == '{':
-                count += 1
-            elif s[i] == '}':
-                count -= 1
-                if count == 0:
-                    return i
-        return -1
+NEXT_F = "self.__next_f.push("
+APP_MAIN = "root.App.main = "
+BOXSCORE_MARKERS = ('{"game":{"gameId"', '{"bettingRestriction":')
+
+_decoder = json.JSONDecoder()
+
+
+def iter_next_f(page: str, markers: Union[str, Iterable[str]] = None):
+    """
+    Yield the decoded string of each self.__next_f.push([1,"..."]) payload in page.
+    Payloads whose raw (still escaped) text holds none of markers are skipped without parsing.
+    """
+    if isinstance(markers, str):
+        markers = (markers,)
+    rawMarkers = [json.dumps(marker)[1:-1] for marker in markers] if markers else None
+    start = page.find(NEXT_F)
+    while start != -1:
+        begin = start + len(NEXT_F)
+        start = page.find(NEXT_F, begin)
+        end = start if start != -1 else len(page)
+        if rawMarkers and all(page.find(rawMarker, begin, end) == -1 for rawMarker in rawMarkers):
+            continue
+        try:
+            payload, _ = _decoder.raw_decode(page, begin)
+        except ValueError:
+            continue
+        if len(payload) > 1 and isinstance(payload[1], str):
+            yield payload[1]
+
+
+def find_object(text: str, key: str, start: int = 0) -> Any:
+    """Parse the json value that begins where key is found, None if key is missing"""
+    index = text.find(key, start)
+    if index == -1:
+        return None
+    return _decoder.raw_decode(text, index)[0]
 
 
 def find_x(key, x):
-    index = x.find(key) 
-    # print(index, x[index])
-    i = find_closing_bracket(x[index:])
-    # print(i, x[index+i])
-    data = json.loads(x[index:index+1+i])  
-    # pprint(data) 
-    # print("\n\n\n\n\n\n\n")
-    return data["game"]
+    return find_object(x, key)["game"]
 
 
 ######################################################################
@@ -57,6 +75,7 @@ class YahooDownloadAgent:
 
     def __init__(self, leagueId):
         self.leagueId = leagueId
+        self.fetcher = ArchivedFetcher("yahoo", leagueId)
 
 
     def _fetch_url(self, url: str, sleepTime: int = 10, attempts: int = 3) -> Dict[str, Any]:
@@ -67,20 +86,16 @@ class YahooDownloadAgent:
         item = None
         if attempts:
             try:
-                html = urlopen(url)
-                lines = [x.decode("utf-8") for x in html.readlines()]
-                # pprint(lines)
-                # print("\n\n\n")
-                for line in lines:
-                    if "root.App.main" in line:
-                        # print("here")
-                        item = json.loads(";".join(line.split("root.App.main = ")[1].split(";")[:-1]))
-                        item = item["context"]["dispatcher"]["stores"]
+                page = self.fetcher.read(url)
+                index = page.find(APP_MAIN)
+                if index != -1:
+                    item = _decoder.raw_decode(page, index + len(APP_MAIN))[0]
+                    item = item["context"]["dispatcher"]["stores"]
             
             except (URLError, HTTPError, ValueError) as e:
                 pprint(e)
-                time.sleep(sleepTime)
-                self._fetch_url(url, sleepTime, attempts-1)
+                sleep(sleepTime)
+                item = self._fetch_url(url, sleepTime, attempts-1)
         return item
 
  
@@ -101,19 +116,12 @@ class YahooDownloadAgent:
     def fetch_player(self, leagueId:str, playerId: str):
         slugId = yahooSlugs[leagueId]
         url = f"{BASE_URL}/{slugId}/players/{playerId.split('.')[-1]}/"
-        html = urlopen(url)
         data = None
-        for line in [x.decode("utf-8").encode().decode("unicode_escape") for x in html.readlines()]:
-            if "playerData" in line:
-                for script in line.split("<script>")[1:]:
-                    # pprint(script)
-                    # print()
-                    if 'self.__next_f.push([1,"51:' in script:
-                        i = self._find_closing_bracket(script[27:])
-                        data = json.loads(script[27:28+i])
-                        # pprint(data)
-                        data = data[-1]["children"][-1]["children"][-1]["children"][-1]["playerData"]        
-                        data["provider"] = "yahoo"
+        for payload in iter_next_f(self.fetcher.read(url), "playerData"):
+            if payload.startswith("51:"):
+                data = _decoder.raw_decode(payload, 3)[0]
+                data = data[-1]["children"][-1]["children"][-1]["children"][-1]["playerData"]        
+                data["provider"] = "yahoo"
         return data
     
 
@@ -121,22 +129,14 @@ class YahooDownloadAgent:
         if BASE_URL not in url:
             url = f"{BASE_URL}{url}"
         
-        html = urlopen(url)
         data = {}
-        for line in [x.decode("utf-8").encode().decode("unicode_escape") for x in html.readlines()]:
-            if "<script>self.__next_f.push(" in line:
-                for x in line.split("<script>self.__next_f.push("):
-                    # pprint(x)
-                    # print("\n\n\n\n\n\n\n")
-                    if '{"game":{"gameId"' in x:
-                        data['gameDetails'] = find_x('{"game":{"gameId"', x) 
-                    elif '{"bettingRestriction":' in x:
-                        data['gameStats'] = find_x('{"bettingRestriction":', x) 
-                        break
-                        
-                    # else:
-                        # pprint(x)
-                        # print("\n\n\n\n\n\n\n")
+        for x in iter_next_f(self.fetcher.read(url), BOXSCORE_MARKERS):
+            if '{"game":{"gameId"' in x:
+                data['gameDetails'] = find_x('{"game":{"gameId"', x) 
+            elif '{"bettingRestriction":' in x:
+                data['gameStats'] = find_x('{"bettingRestriction":', x) 
+            if 'gameDetails' in data and 'gameStats' in data:
+                break
                                
         data["provider"] = "yahoo"
         # pprint(data)
@@ -151,20 +151,10 @@ class YahooDownloadAgent:
         if BASE_URL not in url:
             url = f"{BASE_URL}{url}"
         
-        html = urlopen(url)
         data = {}
         try:
-            for line in [x.decode("utf-8").encode().decode("unicode_escape") for x in html.readlines()]:
-                if "<script>self.__next_f.push(" in line:
-                    for x in line.split("<script>self.__next_f.push("):
-                        # pprint(x)
-                        # print("\n\n\n")
-                        if '{"game":{"gameId":' in x:
-                            index = x.find('{"game":{"gameId":')
-                            # print(index, x[index])
-                            i = find_closing_bracket(x[index:])
-                            # print(i, x[index+i])
-                            data = json.loads(x[index:index+1+i])
+            for x in iter_next_f(self.fetcher.read(url), '{"game":{"gameId":'):
+                data = find_object(x, '{"game":{"gameId":')
         except Exception as e:
             print(e)
                         
@@ -238,22 +228,14 @@ class YahooNCAAFDownloadAgent(YahooDownloadAgent):
         if BASE_URL not in url:
             url = f"{BASE_URL}{url}"
         
-        html = urlopen(url)
         data = {}
-        for line in [x.decode("utf-8").encode().decode("unicode_escape") for x in html.readlines()]:
-            if "<script>self.__next_f.push(" in line:
-                for x in line.split("<script>self.__next_f.push("):
-                    # pprint(x)
-                    # print("\n\n\n\n\n\n\n")
-                    if '{"game":{"gameId"' in x:
-                        data['gameDetails'] = find_x('{"game":{"gameId"', x) 
-                    elif '{"bettingRestriction":' in x:
-                        data['gameStats'] = find_x('{"bettingRestriction":', x) 
-                        break
-                        
-                    # else:
-                        # pprint(x)
-                        # print("\n\n\n\n\n\n\n")
+        for x in iter_next_f(self.fetcher.read(url), BOXSCORE_MARKERS):
+            if '{"game":{"gameId"' in x:
+                data['gameDetails'] = find_x('{"game":{"gameId"', x) 
+            elif '{"bettingRestriction":' in x:
+                data['gameStats'] = find_x('{"bettingRestriction":', x) 
+            if 'gameDetails' in data and 'gameStats' in data:
+                break
                                
         data["provider"] = "yahoo"
         # pprint(data)
@@ -325,6 +325,11 @@ class ContactResult(BaseModel):
         self._load()
 
 
+    @classmethod
+    def for_entity(cls, entityId):
+        return cls(stadiumId=entityId)
+
+
     def forward(self, features):
         # Example: Get embeddings (2D tensors, e.g., [batch_size, embedding_dim])
         hitDistance = self.hitDistance(features["hit_distance"].unsqueeze(1))
@@ -53,6 +53,7 @@ CONTACT_JOINS = [{"name": "games", "inner": True, "join_tables": [{"name": "at_b
 
 class SwingResultDataset(CustomDataset):
 
+    _leagueId = "mlb"
     _main_table = "pitches"
     _main_id = "pitch_id"
     _joins = SWING_JOINS
@@ -73,6 +74,7 @@ class SwingResultDataset(CustomDataset):
 
 class IsSwingDataset(CustomDataset):
 
+    _leagueId = "mlb"
     _main_table = "pitches"
     _main_id = "pitch_id"
     _joins = PITCH_JOINS
@@ -91,6 +93,7 @@ class IsSwingDataset(CustomDataset):
 
 class HitStyleDataset(CustomDataset):
 
+    _leagueId = "mlb"
     _main_table = "pitches"
     _main_id = "pitch_id"
     _joins = [{"name": "at_bats", "inner": False, "join_tables": [{"name": "pitches", "keys": ["play_num",]}, {"name": "pitches", "keys": ["game_id",]}] },] + PITCH_JOINS
@@ -110,6 +113,7 @@ class HitStyleDataset(CustomDataset):
 
 class HitDistanceDataset(CustomDataset):
 
+    _leagueId = "mlb"
     _main_table = "pitches"
     _main_id = "pitch_id"
     _joins = [{"name": "at_bats", "inner": False, "join_tables": [{"name": "pitches", "keys": ["play_num",]}, {"name": "pitches", "keys": ["game_id",]}] },] + PITCH_JOINS
@@ -128,6 +132,7 @@ class HitDistanceDataset(CustomDataset):
 
 class HitAngleDataset(CustomDataset):
 
+    _leagueId = "mlb"
     _main_table = "pitches"
     _main_id = "pitch_id"
     _joins = [{"name": "at_bats", "inner": False, "join_tables": [{"name": "pitches", "keys": ["play_num",]}, {"name": "pitches", "keys": ["game_id",]}] },] + PITCH_JOINS
@@ -153,6 +158,7 @@ class HitAngleDataset(CustomDataset):
 
 class PitchTypeDataset(CustomDataset):
 
+    _leagueId = "mlb"
     _main_table = "pitches"
     _main_id = "pitch_id"
     _joins = PITCH_JOINS
@@ -195,6 +201,7 @@ class PitcherSwingDataset(SwingResultDataset):
 
 class IsHitDataset(CustomDataset):
 
+    _leagueId = "mlb"
     _main_table = "at_bats"
     _main_id = "at_bat_id"
     _joins = CONTACT_JOINS
@@ -213,6 +220,7 @@ class IsHitDataset(CustomDataset):
 
 class IsHRDataset(CustomDataset):
     
+    _leagueId = "mlb"
     _main_table = "at_bats"
     _main_id = "at_bat_id"
     _joins = CONTACT_JOINS
@@ -232,6 +240,7 @@ class IsHRDataset(CustomDataset):
 
 class NumBasesIfHitDataset(CustomDataset):
     
+    _leagueId = "mlb"
     _main_table = "at_bats"
     _main_id = "at_bat_id"
     _joins = CONTACT_JOINS
@@ -0,0 +1,334 @@
+from typing import Dict, Optional
+import pandas as pd
+import torch
+
+from .baseball_atomics import (HitAngleSelect, HitDistanceSelect, IsHit, IsSwing, NumBasesIfHit, PitchTypeSelect,
+                                PitchVelocitySelect, PitchXSelect, PitchYSelect, SwingResult)
+from .datasets import (HitAngleDataset, HitDistanceDataset, IsHitDataset, IsSwingDataset, NumBasesIfHitDataset,
+                        PitchTypeDataset, PitchVelocityDataset, PitchXDataset, PitchYDataset, SwingResultDataset)
+from ..inference import InferenceService
+
+# for debugging
+# from pprint import pprint
+
+
+######################################################################
+######################################################################
+
+
+# every model is fed with the normalization stats of the dataset it was trained on
+MODEL_DATASETS = {
+    PitchTypeSelect: PitchTypeDataset,
+    PitchXSelect: PitchXDataset,
+    PitchYSelect: PitchYDataset,
+    PitchVelocitySelect: PitchVelocityDataset,
+    IsSwing: IsSwingDataset,
+    SwingResult: SwingResultDataset,
+    HitDistanceSelect: HitDistanceDataset,
+    HitAngleSelect: HitAngleDataset,
+    IsHit: IsHitDataset,
+    NumBasesIfHit: NumBasesIfHitDataset,
+}
+
+# swing_result labels: swinging strike, foul ball, in play
+SWING_MISS, SWING_FOUL, SWING_IN_PLAY = 0, 1, 2
+# pitch outcomes the count cares about
+BALL, STRIKE, FOUL, IN_PLAY = 0, 1, 2, 3
+
+# share of taken pitches called strikes, there is no model for the umpire
+TAKEN_STRIKE_RATE = 0.33
+# noise added to regression outputs, as a fraction of the label's std
+REGRESSION_NOISE = 0.5
+
+PITCH_LIMIT = 95
+MAX_INNINGS = 15
+MAX_PITCHES = 1000
+
+HANDS = {"R": 0, "L": 1, "S": 2}
+
+
+######################################################################
+######################################################################
+
+
+def _base_tables():
+    """
+    Next base state and runs scored for every base state (bit 0 = first) and move,
+    where move 0 is nothing, 1-4 a hit of that many bases and 5 a walk
+    """
+    bases = torch.zeros((8, 6), dtype=torch.long)
+    runs = torch.zeros((8, 6), dtype=torch.long)
+    for state in range(8):
+        bases[state, 0] = state
+        for n in range(1, 5):
+            moved = (state << n) | (1 << (n - 1))
+            bases[state, n] = moved & 7
+            runs[state, n] = bin(moved >> 3).count("1")
+
+        # walks only push forced runners
+        if not state & 1:
+            bases[state, 5] = state | 1
+        elif not state & 2:
+            bases[state, 5] = state | 3
+        else:
+            bases[state, 5] = 7
+            runs[state, 5] = int(state == 7)
+    return bases, runs
+
+
+NEXT_BASES, RUNS_SCORED = _base_tables()
+WALK = 5
+
+
+######################################################################
+######################################################################
+
+
+class GameSimulator:
+    """
+    Monte Carlo games for one matchup, every game advanced together as a batch.
+
+    The state of each game (inning, half, outs, count, bases, lineup slots, pitch
+    counts and score) is a tensor row.  Each step throws one pitch in every game
+    still going and calls each atomic model once for the whole batch:
+
+        pitch type -> x, y -> velocity -> swing -> swing result
+            -> hit distance, angle -> is hit -> bases
+
+    Taken pitches are called strikes at TAKEN_STRIKE_RATE, balls in play that are
+    not hits are one out, and runners move as many bases as the batter.  The
+    starter pitches until PITCH_LIMIT, then the bullpen entry takes over.
+
+        sim = GameSimulator(stadiumId=stadiumId)
+        result = sim.simulate(away, home, nGames=10000)
+
+    away and home are {"lineup": [9 batters], "starter": pitcher, "bullpen": pitcher}
+    with batters {"id", "age", "exp", "bats"} and pitchers {"id", "age", "exp", "throws"}.
+    """
+
+    def __init__(self, *, stadiumId: str = "DEFAULT", pitcherDefault: Optional[str] = "R", batterDefault: Optional[str] = None,
+                    pitchLimit: int = PITCH_LIMIT, takenStrikeRate: float = TAKEN_STRIKE_RATE, noise: float = REGRESSION_NOISE):
+        self.stadiumId = str(stadiumId)
+        self.pitchLimit = pitchLimit
+        self.takenStrikeRate = takenStrikeRate
+        self.noise = noise
+
+        defaults = {PitchTypeSelect: pitcherDefault, PitchXSelect: pitcherDefault, PitchYSelect: pitcherDefault,
+                    PitchVelocitySelect: pitcherDefault, IsHit: "DEFAULT", NumBasesIfHit: "DEFAULT"}
+        self.services = {modelClass: InferenceService(modelClass, defaultId=defaults.get(modelClass, batterDefault))
+                            for modelClass in MODEL_DATASETS}
+        self._stats = {}
+
+
+    def _norm(self, modelClass: type, col: str, raw: torch.Tensor) -> torch.Tensor:
+        stats = self._stats[MODEL_DATASETS[modelClass]]
+        return ((raw - float(stats["means"][col])) / float(stats["stds"][col])).float()
+
+
+    def _regress(self, modelClass: type, col: str, slotIds: list, slots: torch.Tensor, features: dict) -> torch.Tensor:
+        """One regression pass, sampled around the prediction and returned in raw units"""
+        stats = self._stats[MODEL_DATASETS[modelClass]]
+        outputs = self.services[modelClass].score_slots(slotIds, slots, features).squeeze(-1)
+        outputs = outputs + self.noise * torch.randn(outputs.shape, generator=self.generator)
+        return outputs * float(stats["stds"][col]) + float(stats["means"][col])
+
+
+    def _sample(self, modelClass: type, slotIds: list, slots: torch.Tensor, features: dict) -> torch.Tensor:
+        """Class draws from one classifier pass, 0/1 for single-output models"""
+        outputs = self.services[modelClass].score_slots(slotIds, slots, features)
+        if outputs.shape[-1] == 1:
+            probs = torch.sigmoid(outputs.squeeze(-1))
+            return torch.bernoulli(probs, generator=self.generator).long()
+        # inverse cdf, much cheaper than multinomial for a few classes and many rows
+        cdf = torch.softmax(outputs, dim=-1).cumsum(dim=-1)
+        draws = torch.rand((len(cdf), 1), generator=self.generator)
+        return (draws > cdf).sum(dim=-1).clamp(max=cdf.shape[-1] - 1)
+
+
+    def _roster(self, away: dict, home: dict) -> dict:
+        """Per-slot ids and attributes: batters 0-8 away, 9-17 home; pitchers away starter, bullpen, home starter, bullpen"""
+        batters = away["lineup"] + home["lineup"]
+        pitchers = [away["starter"], away.get("bullpen", away["starter"]), home["starter"], home.get("bullpen", home["starter"])]
+        return {
+            "batterIds": [str(b["id"]) for b in batters],
+            "batterAge": torch.tensor([b["age"] for b in batters], dtype=torch.float64),
+            "batterExp": torch.tensor([b["exp"] for b in batters], dtype=torch.float64),
+            "bats": torch.tensor([HANDS[b["bats"]] for b in batters]),
+            "pitcherIds": [str(p["id"]) for p in pitchers],
+            "pitcherAge": torch.tensor([p["age"] for p in pitchers], dtype=torch.float64),
+            "pitcherExp": torch.tensor([p["exp"] for p in pitchers], dtype=torch.float64),
+            "throws": torch.tensor([HANDS[p["throws"]] for p in pitchers]),
+        }
+
+
+    def _pitch(self, roster: dict, s: dict) -> tuple:
+        """Throws one pitch in every row of s, returns the BALL/STRIKE/FOUL/IN_PLAY outcome and bases of any hit"""
+        n = len(s["half"])
+        rows = torch.arange(n)
+        batting = s["half"]
+        fielding = 1 - batting
+        teamPitches = s["pitches"][rows, fielding]
+        relief = (teamPitches >= self.pitchLimit).long()
+        pitcherSlot = fielding * 2 + relief
+        batterSlot = batting * 9 + s["lineup"][rows, batting]
+
+        throws = roster["throws"][pitcherSlot]
+        balls, strikes = s["balls"], s["strikes"]
+        sequence = s["sequence"].double()
+        pitchCount = (teamPitches - relief * self.pitchLimit + 1).double()
+        pitcherIds = roster["pitcherIds"]
+
+        def pitcher_features(modelClass):
+            return {"pitcher_exp": self._norm(modelClass, "pitcher_exp", roster["pitcherExp"][pitcherSlot]),
+                    "pitcher_age": self._norm(modelClass, "pitcher_age", roster["pitcherAge"][pitcherSlot]),
+                    "batter_faces_break": (roster["bats"][batterSlot] == throws).long(),
+                    "balls": balls, "strikes": strikes,
+                    "sequence": self._norm(modelClass, "sequence", sequence),
+                    "pitch_count": self._norm(modelClass, "pitch_count", pitchCount)}
+
+        pitchType = self._sample(PitchTypeSelect, pitcherIds, pitcherSlot, pitcher_features(PitchTypeSelect))
+        features = dict(pitcher_features(PitchXSelect), pitch_type_id=pitchType)
+        pitchX = self._regress(PitchXSelect, "pitch_x", pitcherIds, pitcherSlot, features)
+        features = dict(pitcher_features(PitchYSelect), pitch_type_id=pitchType)
+        pitchY = self._regress(PitchYSelect, "pitch_y", pitcherIds, pitcherSlot, features)
+        features = dict(pitcher_features(PitchVelocitySelect), pitch_type_id=pitchType,
+                        pitch_x=self._norm(PitchVelocitySelect, "pitch_x", pitchX),
+                        pitch_y=self._norm(PitchVelocitySelect, "pitch_y", pitchY))
+        velocity = self._regress(PitchVelocitySelect, "velocity", pitcherIds, pitcherSlot, features)
+
+        def batter_features(modelClass, index):
+            return {"pitcher_throws_lefty": (throws[index] == HANDS["L"]).long(),
+                    "balls": balls[index], "strikes": strikes[index],
+                    "sequence": self._norm(modelClass, "sequence", sequence[index]),
+                    "pitch_count": self._norm(modelClass, "pitch_count", pitchCount[index]),
+                    "pitch_type_id": pitchType[index],
+                    "pitch_x": self._norm(modelClass, "pitch_x", pitchX[index]),
+                    "pitch_y": self._norm(modelClass, "pitch_y", pitchY[index]),
+                    "velocity": self._norm(modelClass, "velocity", velocity[index])}
+
+        batterIds = roster["batterIds"]
+        isSwing = self._sample(IsSwing, batterIds, batterSlot, batter_features(IsSwing, rows)).bool()
+        taken = torch.bernoulli(torch.full((n,), self.takenStrikeRate, dtype=torch.float64), generator=self.generator).long()
+        outcome = torch.where(taken.bool(), STRIKE, BALL)
+
+        swings = isSwing.nonzero().squeeze(1)
+        if swings.numel():
+            swingResult = self._sample(SwingResult, batterIds, batterSlot[swings], batter_features(SwingResult, swings))
+            outcome[swings] = torch.where(swingResult == SWING_MISS, STRIKE, torch.where(swingResult == SWING_FOUL, FOUL, IN_PLAY))
+
+        hitBases = torch.zeros(n, dtype=torch.long)
+        inPlay = (outcome == IN_PLAY).nonzero().squeeze(1)
+        if inPlay.numel():
+            distance = self._regress(HitDistanceSelect, "hit_distance", batterIds, batterSlot[inPlay],
+                                        batter_features(HitDistanceSelect, inPlay))
+            angle = self._regress(HitAngleSelect, "hit_angle", batterIds, batterSlot[inPlay],
+                                    batter_features(HitAngleSelect, inPlay))
+            stadium = torch.zeros(len(inPlay), dtype=torch.long)
+
+            def contact_features(modelClass, index):
+                return {"hit_distance": self._norm(modelClass, "hit_distance", distance[index]),
+                        "hit_angle": self._norm(modelClass, "hit_angle", angle[index])}
+
+            isHit = self._sample(IsHit, [self.stadiumId], stadium, contact_features(IsHit, slice(None))).bool()
+            hits = isHit.nonzero().squeeze(1)
+            if hits.numel():
+                bases = self._sample(NumBasesIfHit, [self.stadiumId], stadium[hits], contact_features(NumBasesIfHit, hits)) + 1
+                hitBases[inPlay[hits]] = bases
+
+        return outcome, hitBases
+
+
+    def _advance(self, s: dict, outcome: torch.Tensor, hitBases: torch.Tensor, maxInnings: int):
+        """Applies one pitch outcome to the count, bases, score, outs and innings of every row in s"""
+        rows = torch.arange(len(outcome))
+        batting = s["half"]
+        fielding = 1 - batting
+
+        balls = s["balls"] + (outcome == BALL).long()
+        strikes = s["strikes"] + (outcome == STRIKE).long() + ((outcome == FOUL) & (s["strikes"] < 2)).long()
+        walk = balls == 4
+        strikeout = strikes == 3
+        inPlay = outcome == IN_PLAY
+        paOver = walk | strikeout | inPlay
+
+        move = torch.where(walk, WALK, hitBases)
+        s["score"][rows, batting] += RUNS_SCORED[s["bases"], move]
+        s["bases"] = NEXT_BASES[s["bases"], move]
+        s["outs"] = s["outs"] + (strikeout | (inPlay & (hitBases == 0))).long()
+        s["pitches"][rows, fielding] += 1
+
+        s["lineup"][rows, batting] = torch.where(paOver, (s["lineup"][rows, batting] + 1) % 9, s["lineup"][rows, batting])
+        s["balls"] = torch.where(paOver, 0, balls)
+        s["strikes"] = torch.where(paOver, 0, strikes)
+        s["sequence"] = torch.where(paOver, 1, s["sequence"] + 1)
+
+        away, home = s["score"][:, 0], s["score"][:, 1]
+        late = s["inning"] >= 8
+        walkOff = late & (batting == 1) & (home > away)
+
+        sideOut = s["outs"] >= 3
+        homeAhead = late & (batting == 0) & (home > away)
+        final = late & (batting == 1) & ((away != home) | (s["inning"] >= maxInnings - 1))
+        s["done"] = s["done"] | walkOff | (sideOut & (homeAhead | final))
+
+        nextHalf = sideOut & ~s["done"]
+        s["inning"] = s["inning"] + (nextHalf & (batting == 1)).long()
+        s["half"] = torch.where(nextHalf, 1 - batting, batting)
+        s["outs"] = torch.where(nextHalf, 0, s["outs"])
+        # extra innings start with a runner on second
+        s["bases"] = torch.where(nextHalf, torch.where(s["inning"] >= 9, 2, 0), s["bases"])
+
+
+    def simulate(self, away: dict, home: dict, *, nGames: int = 10000, seed: int = 42, maxInnings: int = MAX_INNINGS) -> dict:
+        """
+        Plays nGames of the matchup and returns the win probabilities, the total runs
+        and run line (home - away) distributions and the final score of every game
+        """
+        self.generator = torch.Generator().manual_seed(seed)
+        roster = self._roster(away, home)
+        for datasetClass in set(MODEL_DATASETS.values()):
+            if datasetClass not in self._stats:
+                self._stats[datasetClass] = datasetClass.feature_stats()
+
+        state = {
+            "inning": torch.zeros(nGames, dtype=torch.long),
+            "half": torch.zeros(nGames, dtype=torch.long),
+            "outs": torch.zeros(nGames, dtype=torch.long),
+            "balls": torch.zeros(nGames, dtype=torch.long),
+            "strikes": torch.zeros(nGames, dtype=torch.long),
+            "sequence": torch.ones(nGames, dtype=torch.long),
+            "bases": torch.zeros(nGames, dtype=torch.long),
+            "lineup": torch.zeros((nGames, 2), dtype=torch.long),
+            "pitches": torch.zeros((nGames, 2), dtype=torch.long),
+            "score": torch.zeros((nGames, 2), dtype=torch.long),
+            "done": torch.zeros(nGames, dtype=torch.bool),
+        }
+
+        for _ in range(MAX_PITCHES):
+            active = (~state["done"]).nonzero().squeeze(1)
+            if not active.numel():
+                break
+            s = {key: values[active] for key, values in state.items()}
+            outcome, hitBases = self._pitch(roster, s)
+            self._advance(s, outcome, hitBases, maxInnings)
+            for key, values in s.items():
+                state[key][active] = values
+
+        return self._results(state["score"])
+
+
+    def _results(self, score: torch.Tensor) -> Dict[str, object]:
+        away, home = score[:, 0].numpy(), score[:, 1].numpy()
+        margin = pd.Series(home - away)
+        total = pd.Series(home + away)
+        return {
+            "games": len(score),
+            "away_win": float((away > home).mean()),
+            "home_win": float((home > away).mean()),
+            "tie": float((home == away).mean()),
+            "away_runs": float(away.mean()),
+            "home_runs": float(home.mean()),
+            "total": total.value_counts(normalize=True).sort_index(),
+            "run_line": margin.value_counts(normalize=True).sort_index(),
+            "scores": score.numpy(),
+        }
@@ -1,6 +1,11 @@
-from copy import deepcopy
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from hashlib import sha1
+import json
 import numpy as np
 import os 
+import shutil
 import pandas as pd
 import torch
 import torch.nn as nn
@@ -34,9 +39,20 @@ class BaseModel(nn.Module):
         self.metrics = {}
 
 
+    @classmethod
+    def for_entity(cls, entityId: str) -> "BaseModel":
+        """Build the model for one entity, for callers that only hold the class"""
+        return cls(entityId=entityId)
+
+
+    @classmethod
+    def _model_path(cls, entityId: str) -> str:
+        return os.path.join(BASE_PATH, cls._leagueId, "simulations", cls._entityType, str(entityId), f"{cls._modelName}.pt")
+
+
     def _load(self):
 
-        entityPath = os.path.join(BASE_PATH, self._leagueId, "simulations", self._entityType, self.entityId, f"{self._modelName}.pt")
+        entityPath = self._model_path(self.entityId)
         try:
             self.load_state_dict(torch.load(entityPath))
         except FileNotFoundError:
@@ -48,14 +64,14 @@ class BaseModel(nn.Module):
         if metrics["loss"] < self.metrics.get("loss", float("inf")):
             self.metrics = metrics
 
-            modelPath = os.path.join(BASE_PATH, self._leagueId, "simulations", self._entityType, self.entityId, f"{self._modelName}.pt")
+            modelPath = self._model_path(self.entityId)
             os.makedirs(os.path.dirname(modelPath), exist_ok=True)        
             torch.save(self.state_dict(), modelPath)
             logger.debug("saved model")
 
 
     def _exists(self):
-        modelPath = os.path.join(BASE_PATH, self._leagueId, "simulations", self._entityType, self.entityId, f"{self._modelName}.pt")
+        modelPath = self._model_path(self.entityId)
         return os.path.exists(modelPath)
 
 
@@ -93,14 +109,22 @@ class CustomDataset(Dataset):
     _conditionStmt = None
     _features = {"batter": [], "pitcher": [], "pitch":[], "hit":[], "count":[]}
     _label = [None, ]
+    _leagueId = None
 
-    def __init__(self, *, entityId: str=None, condition: str=None):
+    def __init__(self, *, entityId: str=None, condition: str=None, useStore: bool=False):
         """
         Initialize the dataset with entity ID and batch size for database queries.
+        With useStore the rows come from the memory-mapped FeatureStore, which is
+        exported from the database the first time it is asked for.
         """
         self.entityId = entityId
         self.condition = condition
         self.cache = None
+        self.columnTypes = self._column_types()
+
+        if useStore:
+            self._load_store(FeatureStore(self))
+            return
         
         self.means = self._set_computation("AVG")
         self.stds = self._set_computation("STDDEV")
@@ -121,30 +145,78 @@ class CustomDataset(Dataset):
         Returns:
             tuple: (features, label), where features is a nested dict of tensors and label is a tensor.
         """
+        row = self._cache_rows([idx])[0]
+        columns = self.cache["columns"]
 
-        row = self.cache[self.cache[self._main_id] == idx].iloc[0] 
         features = {}
         for ft_key, ft_values in self._features.items():
-            feature_types = {}
             if not ft_values:
                 continue
-            for ftr in self._select_stmt(ft_values):
-                # print("_get_item_:136",ftr, row[ftr["ftr"]])
-                dtype = torch.float32 if ftr["ftr"] in [ftr["ftr"] for ftr in self._select_stmt(self._numeric_features)] else torch.long
-                feature_types[ftr["ftr"]] = torch.tensor(row[ftr["ftr"]], dtype=dtype)
-            features[ft_key] = deepcopy(feature_types)
-        # print(row)
-        
-        dtype = torch.float32 if self._label in [ftr["ftr"] for ftr in self._select_stmt(self._numeric_features)] else torch.long
-        labels = torch.tensor(row[self._label], dtype=dtype)
-        return features, labels
+            features[ft_key] = {ftr["ftr"]: columns[ftr["ftr"]][row] for ftr in self._select_stmt(ft_values)}
+        return features, columns[self._label][row]
+
+
+    def __getitems__(self, indices: list):
+        """
+        Fetch a whole batch of cached items with one gather per column.
+
+        Returns:
+            tuple: (features, labels), features maps each feature name to a batched tensor.
+        """
+        rows = torch.from_numpy(self._cache_rows(indices))
+        columns = self.cache["columns"]
+
+        features = {ftr: columns[ftr].index_select(0, rows) for ftr in self._feature_names()}
+        return features, columns[self._label].index_select(0, rows)
+
+
+    def _is_cached(self, indices: list) -> bool:
+        return self.cache is not None and bool((self.cache["index"].get_indexer(indices) >= 0).all())
+
+
+    def _cache_rows(self, indices: list) -> np.ndarray:
+        rows = self.cache["index"].get_indexer(indices)
+        if (rows < 0).any():
+            raise KeyError(f"{self._main_id} not in the cached batch")
+        return rows
+
+
+    def _cache_tensors(self, df: pd.DataFrame) -> dict:
+        """
+        Turns a preprocessed batch into one contiguous, typed tensor per column plus a
+        {main id: row} index, so items are slices instead of DataFrame scans.
+        """
+        columns = {}
+        for col, dtype in self.columnTypes.items():
+            npType = np.float32 if dtype == torch.float32 else np.int64
+            columns[col] = torch.from_numpy(df[col].to_numpy(dtype=npType, copy=True))
+        return {"index": pd.Index(df[self._main_id]), "columns": columns}
+
+
+    def _column_types(self) -> dict:
+        """torch dtype for every feature the models read and for the label"""
+        numeric = {ftr["ftr"] for ftr in self._select_stmt(self._numeric_features)}
+        return {col: torch.float32 if col in numeric else torch.long for col in self._feature_names() + [self._label]}
+
+
+    def _feature_names(self) -> list:
+        return [ftr["ftr"] for ft_values in self._features.values() for ftr in self._select_stmt(ft_values)]
 
 
     def _fetch_db_batch(self, rowids: list):
-        selectClause = ", ".join(ftr for ftr in self._select_features)
+        self.cache = self._load_db_batch(rowids)
+
+
+    def _load_db_batch(self, rowids: list) -> dict:
+        """Query and tensorize a batch without touching self.cache, safe to run on a prefetch thread"""
+        return self._cache_tensors(self._query_db_batch(rowids))
+
+
+    def _query_db_batch(self, rowids: list, extraSelect: str = "", withEntity: bool = True) -> pd.DataFrame:
+        selectClause = ", ".join(ftr for ftr in self._select_features) + extraSelect
         fromStmt = self._from_stmt()
         joinStmt = self._join_stmt()
-        filterClause = f"AND {self._filter_clause()}" if self._filter_clause() else "" 
+        filterClause = f"AND {self._filter_clause(withEntity)}" if self._filter_clause(withEntity) else "" 
         whrStmt = f"WHERE {self._main_id} IN {tuple(rowids)} {filterClause}" if len(rowids) > 1 else f"WHERE {self._main_id} = {rowids[0]} {filterClause}"
         
         query = f"""SELECT {self._main_id},
@@ -158,11 +230,11 @@ class CustomDataset(Dataset):
         # raise
         with get_db_session() as session:
             df = pd.read_sql(query, session.bind)
-        self.cache = self._preprocess_batch(df)
+        return self._preprocess_batch(df)
 
 
-    def _filter_clause(self):
-        eCommand = f"{self._featured_id} = '{self.entityId}'" if self.entityId else None
+    def _filter_clause(self, withEntity: bool = True):
+        eCommand = f"{self._featured_id} = '{self.entityId}'" if self.entityId and withEntity else None
         cCommand = self._conditionStmt if self._conditionStmt else None
         stmt = " AND ".join(cmd for cmd in (eCommand, cCommand, self.condition) if cmd) if eCommand or cCommand or self.condition else ""
         return stmt
@@ -248,10 +320,37 @@ class CustomDataset(Dataset):
         return {ftr['ftr']: data[ftr['ftr']][0] for ftr in self._select_stmt(self._numeric_features)}
 
 
-    def _set_valid_indices(self):
+    @classmethod
+    def feature_stats(cls) -> dict:
+        """
+        {"means", "stds"} of the numeric features without loading any rows,
+        read from the exported store when there is one
+        """
+        dataset = cls.__new__(cls)
+        dataset.entityId = None
+        dataset.condition = None
+        store = FeatureStore(dataset)
+        if store.exists():
+            return store.stats()
+        return {"means": dataset._set_computation("AVG"), "stds": dataset._set_computation("STDDEV")}
+
+
+    def _load_store(self, store: "FeatureStore"):
+        if not store.exists():
+            store.materialize(self)
+
+        stats, ids, entities, columns = store.load()
+        self.means = stats["means"]
+        self.stds = stats["stds"]
+        self.valid_indicies = (ids[entities == str(self.entityId)] if self.entityId else ids).tolist()
+        # the whole store is the cache, batches gather straight from the mapped pages
+        self.cache = {"index": pd.Index(ids), "columns": {col: torch.from_numpy(arr) for col, arr in columns.items()}}
+
+
+    def _set_valid_indices(self, withEntity: bool = True):
         fromStmt = self._from_stmt()
         joinStmt = self._join_stmt()
-        whereStmt = f"WHERE {self._filter_clause()}" if self._filter_clause() else ""
+        whereStmt = f"WHERE {self._filter_clause(withEntity)}" if self._filter_clause(withEntity) else ""
 
         query = f"""
                 SELECT {self._main_id}
@@ -279,58 +378,232 @@ class CustomDataset(Dataset):
 ######################################################################
 
 
-def get_data_loader(dataset, *, batch_size = 64, db_batch_size= 6400, shuffle=False):
-    """Create a DataLoader for the given dataset split."""
+class FeatureStore:
+    """
+    Memory-mapped columnar copy of one dataset definition, for every entity at once.
 
-    class CacheAwareBatchSampler(Sampler):
-        def __init__(self, subset: Subset, batch_size: int, cache_size: int, shuffle: bool):
-            self.subset = subset
-            self.batch_size = batch_size
-            self.cache_size = cache_size
-            self.shuffle = shuffle
-
-        def __iter__(self):
-            # if self.shuffle:
-            #     # Shuffle indices within each db_batch_size chunk
-            #     for i in range(0, len(self.dataset), self.db_batch_size):
-            #         chunk = self.indices[i:i + self.db_batch_size]
-            #         np.random.shuffle(chunk)
-            #         self.indices[i:i + self.db_batch_size] = chunk
-
-            for i in range(0, len(self.subset), self.cache_size):
-                cache_size = self.cache_size if i+self.cache_size < len(self.subset) else len(self.subset) - i
-                chunk = self.subset.indices[i:i +cache_size]
-                self.subset.dataset._fetch_db_batch(chunk)
-                
-                for j in range(i, i+cache_size, self.batch_size):
-                    batch_size = self.batch_size if (j-i)+self.batch_size <= cache_size else cache_size - (j-i)
-                    yield list(range(j,j+batch_size))
-                    
+    materialize() runs the dataset's query in DB-sized chunks and writes each
+    preprocessed column to its own .npy file, the main ids in order, the featured
+    entity id per row and the normalization stats in stats.json.  load() maps the
+    files copy-on-write, so training reads pages on demand and never needs the
+    whole table in memory.
+    """
 
-        def __len__(self):
-            return len(self.subset) // self.batch_size
+    def __init__(self, dataset: CustomDataset, basePath: str = BASE_PATH):
+        name = type(dataset).__name__
+        if dataset.condition:
+            name += f"-{sha1(dataset.condition.encode()).hexdigest()[:10]}"
+        self.dirPath = os.path.join(basePath, dataset._leagueId or "", "features", name)
 
 
-    def collate_fn(batch):
-        features_batch, labels = zip(*batch)
+    def _file_path(self, name: str) -> str:
+        return os.path.join(self.dirPath, f"{name}.npy")
 
-        features = {}
-        for key, value in features_batch[0].items():
-            for ftr in value.keys():
-                features[ftr] = torch.stack([fb[key][ftr] for fb in features_batch])
-        labels = torch.stack([l for l in labels])
-        # from pprint import pprint 
-        # pprint(features)
-        # print()
-        # pprint(labels)
-        # raise
-        return features, labels
 
-    sampler = CacheAwareBatchSampler(dataset, batch_size, db_batch_size, shuffle)
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.dirPath, "stats.json"))
+
+
+    def modified(self) -> float:
+        """When the store was last exported, 0 if never"""
+        statsPath = os.path.join(self.dirPath, "stats.json")
+        return os.path.getmtime(statsPath) if os.path.exists(statsPath) else 0
+
+
+    def stats(self) -> dict:
+        with open(os.path.join(self.dirPath, "stats.json")) as fileIn:
+            return json.load(fileIn)
+
+
+    def load(self) -> tuple:
+        """(stats, ids, entity ids, {column: array}) with every array memory-mapped"""
+        stats = self.stats()
+        ids = np.load(self._file_path("_ids"), mmap_mode="c")
+        entities = np.load(self._file_path("_entities"), mmap_mode="c")
+        columns = {col: np.load(self._file_path(col), mmap_mode="c") for col in stats["columns"]}
+        return stats, ids, entities, columns
+
+
+    def materialize(self, dataset: CustomDataset, chunkSize: int = 6400):
+        logger.info(f"materializing {self.dirPath}")
+        means = dataset._set_computation("AVG")
+        stds = dataset._set_computation("STDDEV")
+        dataset.means, dataset.stds = means, stds
+        ids = np.asarray(dataset._set_valid_indices(withEntity=False), dtype=np.int64)
+
+        # written next to the final directory and swapped in once complete
+        tmpPath = f"{self.dirPath}.tmp"
+        shutil.rmtree(tmpPath, ignore_errors=True)
+        os.makedirs(tmpPath)
+        outPath = lambda name: os.path.join(tmpPath, f"{name}.npy")
+
+        columns = {col: np.lib.format.open_memmap(outPath(col), mode="w+", 
+                                                    dtype=np.float32 if dtype == torch.float32 else np.int64, shape=(len(ids),))
+                    for col, dtype in dataset.columnTypes.items()}
+        entities = []
+        for i in range(0, len(ids), chunkSize):
+            df = dataset._query_db_batch(ids[i:i+chunkSize].tolist(), f", {dataset._featured_id} AS _entity_id", withEntity=False)
+            rows = np.searchsorted(ids, df[dataset._main_id].to_numpy())
+            for col, values in columns.items():
+                values[rows] = df[col].to_numpy(dtype=values.dtype)
+            chunkEntities = np.full(min(chunkSize, len(ids)-i), "", dtype=object)
+            chunkEntities[rows-i] = df["_entity_id"].astype(str).to_numpy()
+            entities.append(chunkEntities)
+
+        for values in columns.values():
+            values.flush()
+        np.save(outPath("_ids"), ids)
+        np.save(outPath("_entities"), np.concatenate(entities).astype(str) if entities else np.array([], dtype=str))
+        with open(os.path.join(tmpPath, "stats.json"), "w") as fileOut:
+            json.dump({"means": {k: float(v) for k, v in means.items()}, 
+                        "stds": {k: float(v) for k, v in stds.items()},
+                        "columns": list(columns), 
+                        "rows": len(ids),
+                        "created": datetime.now().isoformat()}, fileOut, indent=4)
+
+        shutil.rmtree(self.dirPath, ignore_errors=True)
+        os.replace(tmpPath, self.dirPath)
+
+
+######################################################################
+######################################################################
+
+
+class CacheAwareBatchSampler(Sampler):
+    """
+    Yields (chunk, batch, nextChunk) keys into a Subset: chunk is the range of positions
+    fetched from the DB together, batch the positions of one batch inside it and nextChunk
+    the chunk the same worker reads after this one, so it can be prefetched.  With workers
+    every num_workers-th chunk goes to the same lane and the lanes are interleaved by worker
+    index, so under the DataLoader's round robin each worker keeps to its own chunks instead
+    of every worker fetching every chunk.
+
+    With shuffle it is a block shuffle: each epoch visits the chunks in a new order and
+    permutes the positions inside every chunk, seeded by (seed, epoch), so batches are
+    random while each chunk is still fetched once.
+    """
+
+    def __init__(self, subset: Subset, batch_size: int, cache_size: int, shuffle: bool, num_workers: int = 0, seed: int = 42):
+        self.subset = subset
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.shuffle = shuffle
+        self.num_workers = num_workers
+        self.seed = seed
+        self.epoch = 0
+
+
+    def _chunks(self) -> list:
+        return [range(i, min(i+self.cache_size, len(self.subset))) for i in range(0, len(self.subset), self.cache_size)]
+
+
+    def _batches(self, chunk: range, rng: np.random.Generator = None, nextChunk: range = None) -> list:
+        positions = np.arange(chunk.start, chunk.stop)
+        if rng is not None:
+            rng.shuffle(positions)
+        return [(chunk, positions[j:j+self.batch_size], nextChunk) for j in range(0, len(positions), self.batch_size)]
+
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+
+    def __iter__(self):
+        chunks = self._chunks()
+        rng = None
+        if self.shuffle:
+            rng = np.random.default_rng([self.seed, self.epoch])
+            chunks = [chunks[i] for i in rng.permutation(len(chunks))]
+        self.epoch += 1
+
+        step = max(1, self.num_workers)
+        nextChunks = chunks[step:] + [None] * step
+        lanes = [deque() for _ in range(step)]
+        for i, (chunk, nextChunk) in enumerate(zip(chunks, nextChunks)):
+            lanes[i % step].extend(self._batches(chunk, rng, nextChunk))
+
+        for position in range(sum(len(lane) for lane in lanes)):
+            lane = lanes[position % step]
+            if lane:
+                yield lane.popleft()
+            else:
+                # this worker has run out, it takes the busiest worker's last batch so
+                # every later position still lands on its own worker
+                yield max(lanes, key=len).pop()
+
+
+    def __len__(self):
+        return sum(len(self._batches(chunk)) for chunk in self._chunks())
+
+
+######################################################################
+######################################################################
+
+
+class SubsetBatches(Dataset):
+    """
+    The Subset as the DataLoader sees it: indexed by CacheAwareBatchSampler's
+    (chunk, batch, nextChunk) keys, returning already batched tensors.
+
+    Double buffered: when a batch misses the cache the chunk is swapped in, from the
+    prefetch thread if it was already requested, and the next chunk is submitted to
+    that thread right away, so the DB query runs while this chunk trains.
+    """
+
+    def __init__(self, subset: Subset, prefetch: bool = True):
+        self.subset = subset
+        self.indices = np.asarray(subset.indices)
+        self.prefetch = prefetch
+        self._pending = {}
+        self._pool = None
+        self._poolPid = None
+
+
+    def __len__(self):
+        return len(self.subset)
+
+
+    def __getitem__(self, key: tuple):
+        chunk, batch, nextChunk = key
+        dataset = self.subset.dataset
+        ids = self.indices[batch].tolist()
+        if not dataset._is_cached(ids):
+            future = self._pending.pop((chunk.start, chunk.stop), None) if self.prefetch else None
+            dataset.cache = future.result() if future else dataset._load_db_batch(self._chunk_ids(chunk))
+            if self.prefetch and nextChunk is not None:
+                self._pending[(nextChunk.start, nextChunk.stop)] = self._prefetcher().submit(dataset._load_db_batch, self._chunk_ids(nextChunk))
+        return dataset.__getitems__(ids)
+
+
+    def _chunk_ids(self, chunk: range) -> list:
+        return self.indices[chunk.start:chunk.stop].tolist()
+
+
+    def _prefetcher(self) -> ThreadPoolExecutor:
+        # threads don't survive the fork into DataLoader workers, each process starts its own
+        if self._poolPid != os.getpid():
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+            self._pending = {}
+            self._poolPid = os.getpid()
+        return self._pool
+
+
+######################################################################
+######################################################################
+
+
+def get_data_loader(dataset, *, batch_size = 64, db_batch_size= 6400, shuffle=False, num_workers=0, pin_memory=None, prefetch=True):
+    """Create a DataLoader for the given dataset split."""
+
+    sampler = CacheAwareBatchSampler(dataset, batch_size, db_batch_size, shuffle, num_workers)
     loader = DataLoader(
-        dataset,
-        batch_sampler=sampler,
-        collate_fn=collate_fn
+        SubsetBatches(dataset, prefetch),
+        sampler=sampler,
+        # items are whole batches already
+        batch_size=None,
+        num_workers=num_workers,
+        pin_memory=torch.cuda.is_available() if pin_memory is None else pin_memory,
+        persistent_workers=num_workers > 0
     )
     return loader
 
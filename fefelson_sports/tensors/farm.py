@@ -0,0 +1,124 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from multiprocessing import get_context
+from time import perf_counter
+from typing import List, Optional, Tuple
+import json
+import os
+import tempfile
+import torch
+
+from .core import BASE_PATH, FeatureStore
+from ..utils.logging_manager import get_logger
+
+# for debugging
+# from pprint import pprint
+
+
+######################################################################
+######################################################################
+
+
+# (entityId, model class, dataset class, trainer class, trainer kwargs, dojo kwargs)
+FarmJob = Tuple[str, type, type, type, dict, dict]
+
+
+######################################################################
+######################################################################
+
+
+def _init_worker(threads: int, seed: int):
+    # every worker gets its own slice of the cores instead of all of them fighting over each
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    torch.manual_seed(seed)
+
+
+def _train_entity(job: FarmJob) -> dict:
+    entityId, modelClass, datasetClass, trainerClass, trainerKwargs, dojoKwargs = job
+    result = {"entity_id": str(entityId), "status": "ok", "metrics": None, "pid": os.getpid()}
+
+    start = perf_counter()
+    try:
+        model = modelClass.for_entity(entityId)
+        # the store is already exported, workers only map it
+        dataset = datasetClass(entityId=entityId, useStore=True)
+        trainerClass(**trainerKwargs).dojo(model, dataset, **dojoKwargs)
+        result["metrics"] = {key: float(value) for key, value in model.metrics.items()}
+    except ValueError as e:
+        # too few rows for an entity, same as the serial loops
+        result["status"] = f"skipped: {e}"
+    except Exception as e:
+        get_logger().exception(f"{modelClass._modelName} {entityId} failed")
+        result["status"] = f"failed: {e!r}"
+
+    result["seconds"] = perf_counter() - start
+    result["finished"] = datetime.now().isoformat()
+    return result
+
+
+######################################################################
+######################################################################
+
+
+class TrainingFarm:
+    """
+    Trains one per-entity model for many entities over a process pool.
+
+    Every dataset class is exported to its FeatureStore once up front, so the
+    workers share the read-only mapped files.  Each worker runs with
+    threadsPerWorker torch threads.  Results go to a JSON manifest next to the
+    models after every job, and an entity is skipped when the manifest has it
+    finished and its .pt is newer than the feature store it was trained from.
+    """
+
+    def __init__(self, modelClass: type, *, maxWorkers: Optional[int] = None, threadsPerWorker: int = 1, seed: int = 42):
+        self.modelClass = modelClass
+        self.threadsPerWorker = threadsPerWorker
+        self.maxWorkers = maxWorkers or max(1, (os.cpu_count() or 1) // threadsPerWorker)
+        self.seed = seed
+        self.manifestPath = os.path.join(BASE_PATH, modelClass._leagueId, "simulations", modelClass._entityType,
+                                            f"{modelClass._modelName}_manifest.json")
+        self.manifest = self._read_manifest()
+
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.manifestPath) as fileIn:
+                return json.load(fileIn)
+        except FileNotFoundError:
+            return {}
+
+
+    def _write_manifest(self):
+        os.makedirs(os.path.dirname(self.manifestPath), exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(self.manifestPath), delete=False) as fileOut:
+            json.dump(self.manifest, fileOut, indent=4)
+        os.replace(fileOut.name, self.manifestPath)
+
+
+    def _is_current(self, entityId: str, storeTime: float) -> bool:
+        modelPath = self.modelClass._model_path(entityId)
+        return (self.manifest.get(str(entityId), {}).get("status") == "ok"
+                    and os.path.exists(modelPath) and os.path.getmtime(modelPath) >= storeTime)
+
+
+    def run(self, jobs: List[FarmJob]) -> dict:
+        storeTimes = {}
+        for datasetClass in {job[2] for job in jobs}:
+            # builds the store if missing before any worker needs it
+            storeTimes[datasetClass] = FeatureStore(datasetClass(useStore=True)).modified()
+
+        pending = [job for job in jobs if not self._is_current(job[0], storeTimes[job[2]])]
+        get_logger().info(f"{self.modelClass._modelName} farm: {len(pending)} of {len(jobs)} entities to train on {self.maxWorkers} workers")
+
+        with ProcessPoolExecutor(max_workers=self.maxWorkers, mp_context=get_context("spawn"),
+                                    initializer=_init_worker, initargs=(self.threadsPerWorker, self.seed)) as pool:
+            futures = [pool.submit(_train_entity, job) for job in pending]
+            for future in as_completed(futures):
+                result = future.result()
+                self.manifest[result["entity_id"]] = result
+                self._write_manifest()
+                get_logger().info(f"{self.modelClass._modelName} {result['entity_id']} {result['status']} {result['seconds']:.0f}s")
+
+        return self.manifest
@@ -0,0 +1,117 @@
+from collections import OrderedDict, defaultdict
+from threading import Lock
+from typing import Dict, Optional, Sequence
+import numpy as np
+import os
+import torch
+
+from .core import BaseModel
+from ..utils.logging_manager import get_logger
+
+# for debugging
+# from pprint import pprint
+
+
+######################################################################
+######################################################################
+
+
+MAX_MODELS = 256
+
+
+######################################################################
+######################################################################
+
+
+class InferenceService:
+    """
+    Scores batches of (entity, features) requests against one per-entity model type.
+
+    Loaded models stay in an LRU of maxModels.  An entity without a trained .pt is
+    scored by the defaultId model.  A batch is grouped by the model that serves each
+    row, so every model runs one forward pass however many rows it owns, and the
+    outputs come back in request order.
+
+        service = InferenceService(PitchTypeSelect, defaultId="R")
+        probs = service.probabilities(pitcherIds, features)
+    """
+
+    def __init__(self, modelClass: type, *, defaultId: Optional[str] = None, maxModels: int = MAX_MODELS):
+        self.modelClass = modelClass
+        self.defaultId = defaultId
+        self.maxModels = maxModels
+        self._models = OrderedDict()
+        self._servedBy = {}
+        self._lock = Lock()
+
+
+    def _model_id(self, entityId: str) -> str:
+        """Which trained model scores this entity, checked once per entity"""
+        entityId = str(entityId)
+        if entityId not in self._servedBy:
+            if os.path.exists(self.modelClass._model_path(entityId)):
+                self._servedBy[entityId] = entityId
+            elif self.defaultId is not None and os.path.exists(self.modelClass._model_path(self.defaultId)):
+                self._servedBy[entityId] = str(self.defaultId)
+            else:
+                raise KeyError(f"no {self.modelClass._modelName} model for {entityId} and no default")
+        return self._servedBy[entityId]
+
+
+    def _model(self, modelId: str) -> BaseModel:
+        with self._lock:
+            model = self._models.get(modelId)
+            if model is not None:
+                self._models.move_to_end(modelId)
+                return model
+
+        model = self.modelClass.for_entity(modelId)
+        model.eval()
+        with self._lock:
+            model = self._models.setdefault(modelId, model)
+            self._models.move_to_end(modelId)
+            while len(self._models) > self.maxModels:
+                evicted, _ = self._models.popitem(last=False)
+                get_logger().debug(f"{self.modelClass._modelName} evicted {evicted}")
+        return model
+
+
+    def score(self, entityIds: Sequence[str], features: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """
+        Raw model outputs for a batch; row i of every feature tensor belongs to entityIds[i]
+        """
+        slotIds, slots = np.unique(np.asarray(entityIds).astype(str), return_inverse=True)
+        return self.score_slots(slotIds.tolist(), torch.from_numpy(slots.reshape(-1)), features)
+
+
+    def score_slots(self, slotIds: Sequence[str], slots: torch.Tensor, features: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """
+        Same as score() when the batch already holds small integer slots: row i belongs
+        to slotIds[slots[i]].  Rows are grouped with tensor ops, never a Python loop per row.
+        """
+        groups = defaultdict(list)
+        for slot, entityId in enumerate(slotIds):
+            groups[self._model_id(entityId)].append(slot)
+
+        outputs = None
+        with torch.inference_mode():
+            for modelId, modelSlots in groups.items():
+                rows = torch.isin(slots, torch.tensor(modelSlots)).nonzero().squeeze(1)
+                if rows.numel() == 0:
+                    continue
+                batch = {key: values.index_select(0, rows) for key, values in features.items()}
+                groupOutputs = self._model(modelId)(batch)
+                if outputs is None:
+                    outputs = groupOutputs.new_empty((len(slots),) + tuple(groupOutputs.shape[1:]))
+                outputs[rows] = groupOutputs
+        return outputs
+
+
+    def probabilities(self, entityIds: Sequence[str], features: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """
+        softmax over the classes, or sigmoid for single-output binary models
+        """
+        outputs = self.score(entityIds, features)
+        if outputs.ndim == 1 or outputs.shape[-1] == 1:
+            return torch.sigmoid(outputs.squeeze(-1))
+        return torch.softmax(outputs, dim=-1)
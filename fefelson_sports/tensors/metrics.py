@@ -438,3 +438,164 @@ def print_confusion_matrix(class_labels: list, all_labels: np.ndarray, all_preds
             except IndexError:
                 pass
 
+
+
+######################################################################
+######################################################################
+
+
+def _trapezoid(y: np.ndarray, x: np.ndarray) -> float:
+    return float(np.sum(np.diff(x) * (y[1:] + y[:-1]) / 2))
+
+
+class StreamingMetrics:
+    """
+    Epoch classification metrics from fixed-size counts filled batch by batch.
+
+    Every batch is binned once on score_bins equal-width probability bins per
+    class: positives, negatives and probability sums.  ECE, PR-AUC and ROC-AUC
+    are read off those bins, accuracy, F1 and the confusion matrix off a
+    label x prediction count, so memory does not grow with the epoch and no
+    sort is ever needed.  ECE bins are groups of score bins and match
+    compute_ece exactly; the AUCs are exact up to ties inside one score bin.
+
+    binary=True takes the positive class probability as a single column,
+    otherwise probs are [n_samples, n_classes].
+    """
+
+    def __init__(self, n_classes: int, *, binary: bool = False, n_bins: int = 20, score_bins: int = 1000):
+        if score_bins % n_bins:
+            raise ValueError("score_bins must be a multiple of n_bins.")
+        self.n_classes = n_classes
+        self.binary = binary
+        self.n_bins = n_bins
+        self.score_bins = score_bins
+        self.n_columns = 1 if binary else n_classes
+
+        self.n_samples = 0
+        self.confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+        self.positives = np.zeros((self.n_columns, score_bins), dtype=np.int64)
+        self.negatives = np.zeros((self.n_columns, score_bins), dtype=np.int64)
+        self.prob_sums = np.zeros((self.n_columns, score_bins))
+        self.brier_sum = 0.0
+        self.sharp_sum = 0.0
+        self.sharp_count = 0
+
+
+    def update(self, labels: np.ndarray, probs: np.ndarray, preds: np.ndarray):
+        labels = np.asarray(labels).reshape(-1).astype(np.int64)
+        preds = np.asarray(preds).reshape(-1).astype(np.int64)
+        probs = np.asarray(probs, dtype=np.float64).reshape(len(labels), self.n_columns)
+        truth = labels[:, None] == (np.ones(1) if self.binary else np.arange(self.n_columns))
+
+        # same edges as np.digitize(right=True) in compute_ece
+        bins = np.clip(np.ceil(probs * self.score_bins).astype(np.int64) - 1, 0, self.score_bins - 1)
+        bins += np.arange(self.n_columns) * self.score_bins
+        size = self.n_columns * self.score_bins
+        shape = (self.n_columns, self.score_bins)
+        self.positives += np.bincount(bins[truth], minlength=size).reshape(shape)
+        self.negatives += np.bincount(bins[~truth], minlength=size).reshape(shape)
+        self.prob_sums += np.bincount(bins.ravel(), weights=probs.ravel(), minlength=size).reshape(shape)
+
+        self.confusion += np.bincount(labels * self.n_classes + preds, minlength=self.n_classes ** 2).reshape(self.n_classes, self.n_classes)
+        self.brier_sum += float(((probs - truth) ** 2).sum())
+
+        correct = preds == labels
+        self.sharp_sum += float(probs[correct].sum())
+        self.sharp_count += int(correct.sum()) * self.n_columns
+        self.n_samples += len(labels)
+
+
+    def accuracy(self) -> float:
+        return float(np.trace(self.confusion) / self.n_samples) if self.n_samples else 0.0
+
+
+    def f1(self) -> float:
+        """Macro F1 over the classes seen as a label or a prediction, like f1_score(average='macro')"""
+        tp = np.diag(self.confusion).astype(float)
+        actual, predicted = self.confusion.sum(axis=1), self.confusion.sum(axis=0)
+        seen = (actual + predicted) > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            f1 = np.nan_to_num(2 * tp / (actual + predicted))
+        return float(f1[seen].mean()) if seen.any() else 0.0
+
+
+    def brier(self) -> float:
+        return self.brier_sum / (self.n_samples * self.n_columns) if self.n_samples else np.nan
+
+
+    def ece(self) -> float:
+        shape = (self.n_columns, self.n_bins, self.score_bins // self.n_bins)
+        counts = (self.positives + self.negatives).reshape(shape).sum(axis=-1)
+        hits = self.positives.reshape(shape).sum(axis=-1)
+        probs = self.prob_sums.reshape(shape).sum(axis=-1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gaps = np.where(counts > 0, np.abs(probs / counts - hits / counts), 0)
+        return float(((counts / self.n_samples) * gaps).sum(axis=1).mean()) if self.n_samples else np.nan
+
+
+    def _curve(self, column: int) -> tuple:
+        """true and false positives at every threshold, highest score first"""
+        return self.positives[column][::-1].cumsum(), self.negatives[column][::-1].cumsum()
+
+
+    def _roc_auc(self, column: int) -> float:
+        tp, fp = self._curve(column)
+        if tp[-1] == 0 or fp[-1] == 0:
+            return np.nan
+        return _trapezoid(np.r_[0, tp / tp[-1]], np.r_[0, fp / fp[-1]])
+
+
+    def _pr_auc(self, column: int) -> float:
+        tp, fp = self._curve(column)
+        if tp[-1] == 0:
+            return np.nan
+        used = (tp + fp) > 0
+        tp, fp = tp[used], fp[used]
+        return _trapezoid(np.r_[1, tp / (tp + fp)], np.r_[0, tp / tp[-1]])
+
+
+    def roc_auc(self) -> float:
+        """Binary, or one-vs-rest macro over the classes with both outcomes"""
+        scores = [self._roc_auc(c) for c in range(self.n_columns)]
+        scores = [s for s in scores if not np.isnan(s)]
+        return float(np.mean(scores)) if scores else np.nan
+
+
+    def pr_auc(self) -> float:
+        """Binary, or one-vs-rest macro over the classes with true instances"""
+        scores = [self._pr_auc(c) for c in range(self.n_columns)]
+        scores = [s for s in scores if not np.isnan(s)]
+        return float(np.mean(scores)) if scores else np.nan
+
+
+    def sharpness(self) -> float:
+        return self.sharp_sum / self.sharp_count if self.sharp_count else np.nan
+
+
+    def compute(self, total_loss: float, dataset_length: int) -> dict:
+        return {
+            "loss": total_loss / dataset_length if dataset_length > 0 else float('inf'),
+            "a*": self.accuracy(),
+            "f1": self.f1(),
+            "brier": self.brier(),
+            "ece": self.ece(),
+            "pr_auc": self.pr_auc(),
+            "roc_auc": self.roc_auc(),
+            "sharp": self.sharpness()
+        }
+
+
+    def print_confusion_matrix(self, class_labels: list, epoch: int = None):
+        cm_df = pd.DataFrame(self.confusion, index=list(range(self.n_classes)), columns=list(range(self.n_classes)))
+        prefix = f"Epoch {epoch+1}" if epoch is not None else "Test"
+        print(f"Confusion Matrix ({prefix}):\n{cm_df}")
+        print()
+
+        tp = np.diag(self.confusion).astype(float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            precision = np.nan_to_num(tp / self.confusion.sum(axis=0))
+            recall = np.nan_to_num(tp / self.confusion.sum(axis=1))
+            f1 = np.nan_to_num(2 * precision * recall / (precision + recall))
+        for i, name in enumerate(class_labels[:self.n_classes]):
+            print(f"{name}: Precision={precision[i]:.3f}, Recall={recall[i]:.3f}, F1={f1[i]:.3f}\n")
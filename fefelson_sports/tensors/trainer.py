@@ -1,12 +1,12 @@
 import numpy as np
 import pandas as pd
 import torch
+from time import perf_counter
 from tqdm import tqdm
 from typing import List, Tuple
 
 from .core import get_data_loader, split_dataset
-from .metrics import ( f1_score, compute_brier_score, compute_ece, compute_pr_auc, compute_roc_auc, 
-                        compute_multiclass_pr_auc, compute_multiclass_roc_auc, print_confusion_matrix)
+from .metrics import StreamingMetrics
 
 
 ######################################################################
@@ -17,8 +17,16 @@ class AtomicTrainer:
 
     _optimizer = torch.optim.Adam
 
+    def __init__(self):
+        # seconds the last run of each stage waited on data
+        self.loaderWait = {}
 
-    def _compute_metrics(self, *args, **kwargs):
+
+    def _compute_metrics(self, total_loss: float, metrics: StreamingMetrics, dataset_length: int) -> dict:
+        return metrics.compute(total_loss, dataset_length)
+
+
+    def _new_metrics(self) -> StreamingMetrics:
         raise NotImplementedError
    
 
@@ -48,9 +56,14 @@ class AtomicTrainer:
 
     def _run_machine(self, model, data_loader, dsc="Running", optimizer=None):
         total_loss = 0
-        all_preds, all_labels, all_probs = [], [], []
+        # filled batch by batch, the epoch's outputs are never kept
+        metrics = self._new_metrics()
+        # time spent blocked on the loader between steps
+        loaderWait = 0
+        start = ready = perf_counter()
         for features, labels in tqdm(data_loader, desc=f"{dsc} Model"):
         # for features, labels in data_loader:
+            loaderWait += perf_counter() - ready
             # Only during Training
             if optimizer is not None:
                 optimizer.zero_grad() 
@@ -72,11 +85,14 @@ class AtomicTrainer:
             preds = self._pred_fn(outputs)
             probs = self._prob_fn(outputs)
 
-            all_preds.append(preds.detach().numpy())
-            all_labels.append(labels.detach().numpy())
-            all_probs.append(probs.detach().numpy())
+            if metrics is not None:
+                metrics.update(labels.detach().numpy(), probs.detach().numpy(), preds.detach().numpy())
+            ready = perf_counter()
 
-        return total_loss, np.concatenate(all_labels, axis=0), np.concatenate(all_probs, axis=0), np.concatenate(all_preds, axis=0)
+        total = perf_counter() - start
+        self.loaderWait[dsc] = loaderWait
+        print(f"{dsc} loader wait: {loaderWait:.1f}s of {total:.1f}s ({loaderWait / total * 100 if total else 0:.0f}%)")
+        return total_loss, metrics
 
 
     def _test_model(self, model, test_data):
@@ -106,7 +122,7 @@ class AtomicTrainer:
         raise NotImplementedError
 
 
-    def dojo(self, model, dataset, *, epochs: int = 50, patience: int = 2):
+    def dojo(self, model, dataset, *, epochs: int = 50, patience: int = 2, num_workers: int = 0):
         """
         Train, validate, and test with early stopping.
 
@@ -115,6 +131,7 @@ class AtomicTrainer:
             dataset: Dataset, data to be split
             epochs: int, number of training epochs.
             patience: int, number of epochs to wait before early stopping.
+            num_workers: int, DataLoader worker processes, each fetching its own DB chunks.
         """
         
         optimizer = self._optimizer(model.parameters(), lr=0.001)
@@ -122,15 +139,17 @@ class AtomicTrainer:
         best_val_loss = float("inf")
         patience_counter = 0
 
-        train_data, val_data, test_data = [get_data_loader(ds) for ds in split_dataset(dataset)]
+        train_split, val_split, test_split = split_dataset(dataset)
+        train_data = get_data_loader(train_split, shuffle=True, num_workers=num_workers)
+        val_data, test_data = [get_data_loader(ds, num_workers=num_workers) for ds in (val_split, test_split)]
 
         for epoch in range(epochs):
-            train_loss, train_labels, train_probs, train_preds = self._train_model(model, train_data, optimizer)
-            val_loss, val_labels, val_probs, val_preds = self._validate_model(model, val_data)
+            train_loss, train_stream = self._train_model(model, train_data, optimizer)
+            val_loss, val_stream = self._validate_model(model, val_data)
 
             # Compute metrics
-            train_metrics = self._compute_metrics(train_loss, train_labels, train_probs, train_preds, len(dataset))
-            val_metrics = self._compute_metrics(val_loss, val_labels, val_probs, val_preds, len(dataset))
+            train_metrics = self._compute_metrics(train_loss, train_stream, len(dataset))
+            val_metrics = self._compute_metrics(val_loss, val_stream, len(dataset))
             
             # # # Print metrics
             self._print_metrics(train_metrics, "Training")
@@ -141,7 +160,7 @@ class AtomicTrainer:
                 best_val_loss = val_loss
                 patience_counter = 0
 
-                #print_confusion_matrix(self.class_labels, val_labels, val_preds, epoch)
+                #val_stream.print_confusion_matrix(self.class_labels, epoch)
                 model._save(val_metrics)
             else:
                 patience_counter += 1
@@ -151,11 +170,12 @@ class AtomicTrainer:
                 break
 
         model._load()
-        test_loss, test_labels, test_probs, test_preds = self._test_model(model, test_data)
-        test_metrics = self._compute_metrics(test_loss, test_labels, test_probs, test_preds, len(dataset))
+        test_loss, test_stream = self._test_model(model, test_data)
+        test_metrics = self._compute_metrics(test_loss, test_stream, len(dataset))
 
         self._print_metrics(test_metrics, "Testing")
-        print_confusion_matrix(self.class_labels, test_labels, test_preds)
+        if test_stream is not None:
+            test_stream.print_confusion_matrix(self.class_labels)
     
 
         
@@ -183,24 +203,8 @@ class BinaryTrainer(AtomicTrainer):
         self.criterion = self._loss_function(pos_weight=class_weights)
 
 
-    def _compute_metrics(self, total_loss: float, all_labels: np.ndarray, all_probs: np.ndarray, 
-                            all_preds: np.ndarray, dataset_length: int) -> dict:
-        """
-        Compute and validate metrics for predictions.
-        """
-        all_probs = all_probs.flatten()
-        all_preds = all_preds.flatten()
-        # Compute existing metrics
-        return {
-            "loss": total_loss / dataset_length if dataset_length > 0 else float('inf'),
-            "a*": np.sum(all_preds == all_labels) / len(all_labels) if len(all_labels) > 0 else 0.0,
-            "f1": f1_score(all_labels, all_preds, average='macro'),
-            "brier": compute_brier_score(all_probs, all_labels),
-            "ece": compute_ece(all_probs, all_labels),
-            "pr_auc": compute_pr_auc(all_probs, all_labels),
-            "roc_auc": compute_roc_auc(all_probs, all_labels),
-            "sharp": float(np.mean(all_probs[(all_preds == all_labels)]))
-        }
+    def _new_metrics(self) -> StreamingMetrics:
+        return StreamingMetrics(2, binary=True)
 
 
     def _handle_loss_computation(self, outputs, labels):
@@ -254,22 +258,8 @@ class ClassifyTrainer(AtomicTrainer):
 
 
 
-    def _compute_metrics(self, total_loss: float, all_labels: np.ndarray, all_probs: np.ndarray, 
-                            all_preds: np.ndarray, dataset_length: int) -> dict:
-        """
-        Compute and validate metrics for predictions.
-        """
-        # Compute existing metrics
-        return {
-            "loss": total_loss / dataset_length if dataset_length > 0 else float('inf'),
-            "a*": np.sum(all_preds == all_labels) / len(all_labels) if len(all_labels) > 0 else 0.0,
-            "f1": f1_score(all_labels, all_preds, average='macro'),
-            "brier": compute_brier_score(all_probs, all_labels),
-            "ece": compute_ece(all_probs, all_labels),
-            "pr_auc": compute_multiclass_pr_auc(all_probs, all_labels),
-            "roc_auc": compute_multiclass_roc_auc(all_probs, all_labels),
-            "sharp": float(np.mean(all_probs[(all_preds == all_labels)]))
-        }
+    def _new_metrics(self) -> StreamingMetrics:
+        return StreamingMetrics(len(self.class_labels))
         
 
     def _handle_loss_computation(self, outputs, labels):
@@ -317,8 +307,12 @@ class RegressionTrainer(AtomicTrainer):
         self.criterion = self._loss_function()
 
 
-    def _compute_metrics(self, total_loss: float, all_labels: np.ndarray, all_probs: np.ndarray, 
-                            all_preds: np.ndarray, dataset_length: int) -> dict:
+    def _new_metrics(self):
+        # MSE is the only regression metric, nothing to accumulate
+        return None
+
+
+    def _compute_metrics(self, total_loss: float, metrics: StreamingMetrics, dataset_length: int) -> dict:
         """
         Compute and validate metrics for predictions.
         """
@@ -45,3 +45,18 @@ logger.addHandler(file_handler)
 
 def get_logger():
     return logger
+
+
+def set_log_stream(name):
+    """Route this process's log output to its own file and tag console lines with name."""
+    for handler in [h for h in logger.handlers if isinstance(h, logging.FileHandler)]:
+        logger.removeHandler(handler)
+        handler.close()
+
+    stream_handler = logging.FileHandler(os.path.join(log_dir, f"{name}.log"))
+    stream_handler.setLevel(logging.INFO)
+    stream_handler.setFormatter(file_formatter)
+    logger.addHandler(stream_handler)
+
+    console_handler.setFormatter(ColoredFormatter(f"%(levelname)s - {name} - %(message)s"))
+    return logger
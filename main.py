@@ -1,11 +1,10 @@
 from os import environ
 
-from PySide6.QtCore import QSize, Qt
+from PySide6.QtCore import QSize, Qt, QTimer
 from PySide6.QtGui import QAction, QIcon
 from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QToolBar
 
 from fefelson_sports.database.stores.matchup import MatchupStore
-from fefelson_sports.database.orms.database import get_db_session
 from fefelson_sports.gui.dashboards.matchup_dashboard import MatchDash
 from fefelson_sports.gui.panels.ticker_panel import ThumbPanel
 
@@ -38,17 +37,31 @@ class MainWindow(QMainWindow):
 
         self.setCentralWidget(self.mainPanel)
 
+        self.mainPanel.loader.counted.connect(self._show_cache)
+        # once the window is up
+        QTimer.singleShot(0, self._warm_up)
+
+
+    def _show_cache(self, hits, misses):
+        self.statusBar().showMessage(f"stats cache  {hits} hits / {misses} misses")
+
+
+    def _warm_up(self):
+        # soonest first, the loader keeps as many of them as its cache holds
+        games = sorted(self.gameData.get("Today", {}).values(), key=lambda game: game["gameTime"])
+        self.mainPanel.warm_up(games, self._defaultTF, self._defaultAH)
+
 
     def _set_a_h(self, label):
         if self.away_home != label:
             self.away_home = label
-            self.mainPanel.set_stats(self._use_session(), self.timeFrame, self.away_home)
+            self.mainPanel.set_stats(self.timeFrame, self.away_home)
 
 
     def _set_timeFrame(self, label):
         if self.timeFrame != label:
             self.timeFrame = label
-            self.mainPanel.set_stats(self._use_session(), self.timeFrame, self.away_home)
+            self.mainPanel.set_stats(self.timeFrame, self.away_home)
 
 
     def _set_toolbar(self):
@@ -122,12 +135,6 @@ class MainWindow(QMainWindow):
         
 
 
-    def _use_session(self):
-        """Execute a function with an appropriate session, either provided or new."""
-        with get_db_session() as session:
-            return session
-
-
     def choice(self, signal):
         # Create a new widget for the scroll area
         scrollPanel = QWidget()
@@ -156,19 +163,19 @@ class MainWindow(QMainWindow):
         self.away_home = self._defaultAH
         
         if leagueId == "MLB":
-            self.mainPanel.mlb_match(self._use_session(), self.timeFrame, self.away_home, game)
+            self.mainPanel.mlb_match(self.timeFrame, self.away_home, game)
 
         elif leagueId == "NBA":
-            self.mainPanel.nba_match(self._use_session(), self.timeFrame, self.away_home, game)
+            self.mainPanel.nba_match(self.timeFrame, self.away_home, game)
 
         elif leagueId == "NFL":
-            self.mainPanel.nfl_match(self._use_session(), self.timeFrame, self.away_home, game)
+            self.mainPanel.nfl_match(self.timeFrame, self.away_home, game)
 
         elif leagueId == "NCAAB":
-            self.mainPanel.ncaab_match(self._use_session(), self.timeFrame, self.away_home, game)
+            self.mainPanel.ncaab_match(self.timeFrame, self.away_home, game)
 
         elif leagueId == "NCAAF":
-            self.mainPanel.ncaaf_match(self._use_session(), self.timeFrame, self.away_home, game)
+            self.mainPanel.ncaaf_match(self.timeFrame, self.away_home, game)
 
 
     def set_a_h_all(self, s):
@@ -0,0 +1,161 @@
+from collections import Counter
+from http.client import IncompleteRead
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import sleep
+from urllib.error import HTTPError
+import unittest
+
+from fefelson_sports.providers.fetch_engine import FetchEngine
+from fefelson_sports.utils.logging_manager import get_logger
+
+
+######################################################################
+######################################################################
+
+
+# saved pages the stand-in serves, path -> body
+PAGES = {f"/mlb/game/_/gameId/{gameId}": f"<html>game {gameId}</html>" for gameId in range(12)}
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """
+    Serves PAGES slowly enough for requests to overlap, /flaky answers 503 twice
+    before the page, /gone is a 404, /down is always a 503 and /drop closes the
+    socket halfway through the body
+    """
+
+    lock = Lock()
+    inFlight = 0
+    maxInFlight = 0
+    hits = Counter()
+
+
+    def do_GET(self):
+        with self.lock:
+            StandIn.inFlight += 1
+            StandIn.maxInFlight = max(StandIn.maxInFlight, StandIn.inFlight)
+            StandIn.hits[self.path] += 1
+            hits = StandIn.hits[self.path]
+        sleep(0.05)
+        # out of flight before the client can see the answer and send the next request
+        with self.lock:
+            StandIn.inFlight -= 1
+
+        if self.path in PAGES:
+            self._answer(200, PAGES[self.path])
+        elif self.path == "/flaky":
+            self._answer(503, "busy") if hits <= 2 else self._answer(200, "finally")
+        elif self.path == "/down":
+            self._answer(503, "busy")
+        elif self.path == "/drop":
+            self._drop()
+        else:
+            self._answer(404, "not found")
+
+
+    def _answer(self, code, body):
+        body = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def _drop(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "100")
+        self.end_headers()
+        self.wfile.write(b"<html>half a pa")
+        self.close_connection = True
+
+
+    def log_message(self, *args):
+        pass
+
+
+######################################################################
+######################################################################
+
+
+class FetchEngineTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+        cls.baseUrl = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        Thread(target=cls.server.serve_forever, daemon=True).start()
+
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+
+    def setUp(self):
+        StandIn.maxInFlight = 0
+        StandIn.hits.clear()
+        self.engine = FetchEngine(maxWorkers=8, perHost=3, timeout=5, attempts=3, backoff=0.01)
+
+
+    def tearDown(self):
+        self.engine.shutdown()
+
+
+    def test_fetch_many_respects_host_limit(self):
+        urls = [f"{self.baseUrl}{path}" for path in PAGES]
+        pages = self.engine.fetch_many(urls)
+
+        self.assertEqual(pages, {f"{self.baseUrl}{path}": body for path, body in PAGES.items()})
+        self.assertEqual(StandIn.maxInFlight, 3)
+
+
+    def test_shared_host_limit(self):
+        # what league_updater hands every process
+        self.engine.set_host_limit(f"127.0.0.1:{self.server.server_address[1]}", Lock())
+        self.engine.fetch_many(f"{self.baseUrl}{path}" for path in PAGES)
+
+        self.assertEqual(StandIn.maxInFlight, 1)
+
+
+    def test_retries_server_errors(self):
+        self.assertEqual(self.engine.read(f"{self.baseUrl}/flaky"), "finally")
+        self.assertEqual(StandIn.hits["/flaky"], 3)
+
+
+    def test_client_errors_are_not_retried(self):
+        with self.assertRaises(HTTPError) as raised:
+            self.engine.read(f"{self.baseUrl}/gone")
+
+        self.assertEqual(raised.exception.code, 404)
+        self.assertEqual(StandIn.hits["/gone"], 1)
+
+
+    def test_errors_surface_once_attempts_run_out(self):
+        with self.assertRaises(HTTPError) as raised:
+            self.engine.read(f"{self.baseUrl}/down")
+        self.assertEqual(raised.exception.code, 503)
+        self.assertEqual(StandIn.hits["/down"], 3)
+
+        with self.assertLogs(get_logger(), level="ERROR") as logged:
+            pages = self.engine.fetch_many([f"{self.baseUrl}/gone", f"{self.baseUrl}{next(iter(PAGES))}"])
+        self.assertIsNone(pages[f"{self.baseUrl}/gone"])
+        self.assertIsNotNone(pages[f"{self.baseUrl}{next(iter(PAGES))}"])
+        self.assertIn("/gone", logged.output[0])
+
+
+    def test_dropped_connections_return_none(self):
+        with self.assertRaises(IncompleteRead):
+            self.engine.read(f"{self.baseUrl}/drop")
+        self.assertEqual(StandIn.hits["/drop"], 3)
+
+        with self.assertLogs(get_logger(), level="ERROR"):
+            pages = self.engine.fetch_many([f"{self.baseUrl}/drop", f"{self.baseUrl}{next(iter(PAGES))}"])
+        self.assertIsNone(pages[f"{self.baseUrl}/drop"])
+        self.assertEqual(pages[f"{self.baseUrl}{next(iter(PAGES))}"], next(iter(PAGES.values())))
+
+
+
+if __name__ == "__main__":
+    unittest.main()
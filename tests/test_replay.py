@@ -0,0 +1,108 @@
+from datetime import datetime
+import unittest
+
+try:
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    from fefelson_sports.database.agents.database_agent import SQLAlchemyDatabaseAgent
+    from fefelson_sports.database.orms import Period, Team
+    from fefelson_sports.database.orms.database import SessionFactory
+    from fefelson_sports.models.boxscores import Boxscore
+except (ImportError, KeyError):
+    # no driver, or no DATABASE_URL in .env
+    SessionFactory = None
+
+
+######################################################################
+######################################################################
+
+
+GAME_TIME = "2001-01-02T19:00:00"
+
+
+if SessionFactory is not None:
+
+    class PeriodsOnly(SQLAlchemyDatabaseAgent):
+        """The common boxscore rows without a league's stat tables"""
+
+        def __init__(self):
+            super().__init__("NBA")
+
+
+        def _insert_league_specific_data(self, boxscore, mapping, session):
+            pass
+
+
+######################################################################
+######################################################################
+
+
+class ReplayTest(unittest.TestCase):
+    """
+    Runs against the configured database inside one transaction that is rolled back
+    """
+
+    def setUp(self):
+        if SessionFactory is None:
+            self.skipTest("no database configured")
+        self.session = SessionFactory()
+        try:
+            self.session.execute(text("SELECT 1"))
+        except OperationalError:
+            self.session.close()
+            self.skipTest("database not reachable")
+
+        teamIds = [teamId for teamId, in self.session.query(Team.team_id).filter_by(league_id="NBA").limit(2)]
+        if len(teamIds) < 2:
+            self.session.close()
+            self.skipTest("no NBA teams")
+
+        self.boxscore = Boxscore("NBA")
+        self.agent = PeriodsOnly()
+        self.game = {"gameType": "season", "status": "final", "homeId": teamIds[0],
+                        "awayId": teamIds[1], "gameTime": GAME_TIME}
+
+
+    def tearDown(self):
+        self.session.rollback()
+        self.session.close()
+
+
+    def _boxscore(self, periodPts: list, replay: bool) -> dict:
+        bScore = self.boxscore.prepare(self.game, self.session, replay)
+        bScore["yahoo"] = {
+            "provider": "yahoo",
+            "stadium": {"stadium_id": "replay_test", "name": "Replay Arena"},
+            "game": {"game_id": "yahoo.g", "league_id": "NBA", "home_id": "yahoo.h", "away_id": "yahoo.a",
+                        "winner_id": "yahoo.h", "loser_id": "yahoo.a", "stadium_id": "replay_test",
+                        "game_date": datetime.fromisoformat(GAME_TIME), "season": 2001,
+                        "game_type": "season", "game_result": "won"},
+            "periods": [{"game_id": "yahoo.g", "team_id": "yahoo.h", "opp_id": "yahoo.a", "period": period, "pts": pts}
+                            for period, pts in enumerate(periodPts, start=1)],
+            "gameLines": [],
+            "overUnder": None
+        }
+        return bScore
+
+
+    def _period_pts(self, gameId: str) -> list:
+        return [period.pts for period in self.session.query(Period).filter_by(game_id=gameId).order_by(Period.period)]
+
+
+    def test_replay_writes_over_an_ingested_game(self):
+        first = self._boxscore([20, 30], replay=False)
+        self.agent.insert_boxscore(first, self.session)
+        self.assertEqual(self._period_pts(first["game_id"]), [20, 30])
+
+        # the daily update leaves an ingested game alone
+        self.assertIsNone(self.boxscore.prepare(self.game, self.session))
+
+        again = self._boxscore([25], replay=True)
+        self.agent.insert_boxscore(again, self.session, replace=True)
+        self.assertEqual(self._period_pts(again["game_id"]), [25])
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import json
+import unittest
+
+from fefelson_sports.providers.yahoo.yahoo_downloader import APP_MAIN, YahooDownloadAgent, iter_next_f
+
+
+######################################################################
+######################################################################
+
+
+# characters str.splitlines() breaks on that show up inside Yahoo's json strings
+LINE_BREAKS = "\u2028 \u2029 \x1c \x85"
+
+
+def compact(value) -> str:
+    # how the pages write their json
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def next_f(text: str) -> str:
+    return f"<script>self.__next_f.push({json.dumps([1, text], ensure_ascii=False)})</script>"
+
+
+class SavedPage:
+
+    def __init__(self, page: str):
+        self.page = page
+
+
+    def read(self, url: str) -> str:
+        return self.page
+
+
+######################################################################
+######################################################################
+
+
+class YahooPageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.agent = YahooDownloadAgent("NBA")
+
+
+    def test_boxscore_payloads_keep_line_breaks(self):
+        details = {"game": {"gameId": "nba.g.1", "notes": f"recap{LINE_BREAKS}end"}}
+        stats = {"bettingRestriction": False, "game": {"lines": f"a{LINE_BREAKS}b"}}
+        page = "\n".join([next_f('0:{"other":1}'), next_f(f"1:{compact(stats)}"),
+                            next_f(f"2:{compact(details)}")])
+        self.agent.fetcher = SavedPage(page)
+
+        data = self.agent.fetch_boxscore("/nba/game")
+        self.assertEqual(data["gameDetails"], details["game"])
+        self.assertEqual(data["gameStats"], stats["game"])
+
+
+    def test_app_main_keeps_line_breaks(self):
+        stores = {"context": {"dispatcher": {"stores": {"GamesStore": {"title": f"x{LINE_BREAKS}y"}}}}}
+        self.agent.fetcher = SavedPage(f"<script>{APP_MAIN}{compact(stores)};</script>")
+
+        self.assertEqual(self.agent._fetch_url("/nba/scoreboard"), stores["context"]["dispatcher"]["stores"])
+
+
+    def test_markers_skip_other_payloads(self):
+        page = next_f("0:nothing here") + next_f('1:{"playerData":{"id":1}}')
+        self.assertEqual(list(iter_next_f(page, "playerData")), ['1:{"playerData":{"id":1}}'])
+
+
+
+if __name__ == "__main__":
+    unittest.main()